@@ -0,0 +1,119 @@
+'''
+CATIA asyncio python module.
+Asynchronous front-end of catia module for asyncio applications. Each session lives in a thread of its own
+(single-threaded apartment: CoInitialize and all COM calls of the session are made in it), helpers of catia module
+are queued to this thread and return awaitables. Calls are run in order of submission, so they can be pipelined:
+several calls may be submitted before awaiting, while event loop keeps running local computations.
+COM-objects returned by calls belong to session thread: they are passed back as arguments of next calls only.
+Usage:
+	session = await AsyncSession.start('part.CATPart', backend=FakeApplication)
+	await session.create_hybrid_body('points')
+	async with session.batch_update():
+		points = [session.create_point_coord('pt_{0}'.format(i), coords) for i, coords in enumerate(cloud)]
+		await asyncio.gather(*points)
+	await session.close()
+'''
+
+import sys
+import asyncio
+import functools
+from queue import Queue
+from threading import Thread
+from contextlib import asynccontextmanager
+
+import catia
+
+try:
+	import pythoncom
+except ImportError:
+	pythoncom = None
+
+
+## CATIA session pinned to dedicated thread. Helpers of catia module are available as coroutine-like methods
+# returning futures (session.create_point_coord(...)), any function can be run in session thread by call().
+class AsyncSession():
+
+	def __init__(self, visible=True, backend=None, loop=None):
+		self.loop = loop or asyncio.get_running_loop()
+		self.calls = Queue()
+		self.session = None
+		self.thread = Thread(target=self.__run, daemon=True)
+		self.thread.start()
+		# Session is created in its thread: COM-objects are bound to thread which created them
+		self.ready = self.call(self.__create_session, visible, backend)
+
+	## Starts session in new thread and opens document in it.
+	@classmethod
+	async def start(cls, catia_path=None, visible=True, backend=None):
+		session = cls(visible, backend)
+		await session.ready
+		if catia_path is not None:
+			await session.call(session.session.open, catia_path)
+		return session
+
+	def __create_session(self, visible, backend):
+		self.session = catia.CATIA(visible, backend)
+		catia.bind_session(self.session)
+		return self.session
+
+	def __run(self):
+		if pythoncom is not None:
+			pythoncom.CoInitialize()
+		try:
+			while True:
+				item = self.calls.get()
+				if item is None:
+					break
+				future, function, args, kwargs = item
+				try:
+					res = function(*args, **kwargs)
+				except BaseException as e:
+					self.loop.call_soon_threadsafe(self.__set_exception, future, e)
+				else:
+					self.loop.call_soon_threadsafe(self.__set_result, future, res)
+		finally:
+			catia.bind_session(None)
+			if pythoncom is not None:
+				pythoncom.CoUninitialize()
+
+	@staticmethod
+	def __set_result(future, res):
+		if not future.cancelled():
+			future.set_result(res)
+
+	@staticmethod
+	def __set_exception(future, e):
+		if not future.cancelled():
+			future.set_exception(e)
+
+	## Queues call of function in session thread and returns future of its result.
+	def call(self, function, *args, **kwargs):
+		future = self.loop.create_future()
+		self.calls.put((future, function, args, kwargs))
+		return future
+
+	def __getattr__(self, name):
+		helper = getattr(catia, name)
+		if not callable(helper):
+			raise AttributeError(name)
+		return functools.partial(self.call, helper)
+
+	## Asynchronous version of catia.batch_update: calls queued within block are updated once at its end.
+	@asynccontextmanager
+	async def batch_update(self, every=0):
+		batch = catia.batch_update(every)
+		await self.call(batch.__enter__)
+		try:
+			yield self
+		except BaseException:
+			if not await self.call(batch.__exit__, *sys.exc_info()):
+				raise
+		else:
+			await self.call(batch.__exit__, None, None, None)
+
+	## Quits CATIA application (unless quit is False) and stops session thread.
+	async def close(self, quit=True):
+		if quit:
+			await self.call(self.session.quit)
+		self.calls.put(None)
+		await self.loop.run_in_executor(None, self.thread.join)
@@ -0,0 +1,369 @@
+'''
+Benchmark of catia module against fake CATIA backend.
+Reports number of COM calls, part updates and simulated time (for given latencies of COM call and part update)
+for each public helper of catia module and for representative build scripts.
+Also compares wall time of scalar and batch functions of linalgebra and of curve interpolation.
+Usage: python benchmark.py [call latency, ms] [update latency, ms]
+'''
+
+import os
+import sys
+import tempfile
+from time import perf_counter
+from functools import partial
+
+import numpy as np
+
+import catia
+import earlybind
+import linalgebra as la
+from fakecatia import FakeApplication
+
+
+## Starts new session with fake backend and creates basic geometry used by benchmark cases.
+def fixture(latency, update_latency):
+	catia.start_catia('Benchmark.CATPart', backend=partial(FakeApplication, latency, update_latency))
+	g = {}
+	g['hb'] = catia.create_hybrid_body('Benchmark')
+	g['p1'] = catia.create_point_coord('p1', (0.0, 0.0, 0.0))
+	g['p2'] = catia.create_point_coord('p2', (100.0, 0.0, 0.0))
+	g['p3'] = catia.create_point_coord('p3', (0.0, 100.0, 10.0))
+	g['plane'] = catia.get_origin_plane('xy')
+	g['line'] = catia.create_line_pt_pt('line', g['p1'], g['p2'])
+	g['line_2'] = catia.create_line_pt_pt('line_2', g['p1'], g['p3'])
+	g['dir'] = catia.create_direction(g['line_2'])
+	g['surface'] = catia.create_extrude('surface', g['line'], 0.0, 50.0, g['dir'])
+	g['surface_2'] = catia.create_extrude('surface_2', g['line_2'], 0.0, 50.0, catia.create_direction(g['line']))
+	g['axis'] = catia.create_axis_system('axis', g['p1'], [1, 0, 0], [0, 1, 0], [0, 0, 1])
+	g['real'] = catia.create_real('real', 1.0)
+	g['param_set'] = catia.create_parametere_set('Set')
+	g['sketch'] = catia.create_sketch('sketch', g['plane'], [0, 0, 0], [1, 0, 0], [0, 1, 0])
+	return g
+
+## Opens sketch of fixture and creates 2 points in it.
+def sketch_fixture(g):
+	catia.open_sketch(g['sketch'])
+	g['sp1'] = catia.sketch_create_point('sp1', [0.0, 0.0])
+	g['sp2'] = catia.sketch_create_point('sp2', [10.0, 0.0])
+	return g
+
+# Benchmark cases for public helpers: (helper name, call with fixture geometry, fixture preparation)
+helper_cases = [
+	('hide', lambda g: catia.hide(g['line']), None),
+	('create_hybrid_body', lambda g: catia.create_hybrid_body('new'), None),
+	('activate_hybrid_body', lambda g: catia.activate_hybrid_body('Benchmark'), None),
+	('create_point_coord', lambda g: catia.create_point_coord('pt', (1.0, 2.0, 3.0)), None),
+	('create_point_coord (ref axis)', lambda g: catia.create_point_coord('pt', (1.0, 2.0, 3.0), g['axis']), None),
+	('create_points, 1000 points', lambda g: catia.create_points(np.zeros((1000, 3))), None),
+	('create_points, 1000 points (ref axis)', lambda g: catia.create_points(np.zeros((1000, 3)), 'pt_{0}', g['axis']), None),
+	('create_point_datum', lambda g: catia.create_point_datum('datum', g['p3']), None),
+	('create_axis_system', lambda g: catia.create_axis_system('ax', g['p2'], [1, 0, 0], [0, 1, 0], [0, 0, 1]), None),
+	('create_plane_offset_pt', lambda g: catia.create_plane_offset_pt('pl', g['plane'], g['p3']), None),
+	('create_direction', lambda g: catia.create_direction(g['line']), None),
+	('create_line_pt_dir', lambda g: catia.create_line_pt_dir('ln', g['p1'], g['dir'], 0.0, 10.0, True), None),
+	('create_line_dir_on_support', lambda g: catia.create_line_dir_on_support('ln', g['p1'], g['dir'], g['plane'], 0.0, 10.0, True), None),
+	('create_line_bitang', lambda g: catia.create_line_bitang('ln', g['line'], g['line_2'], g['plane']), None),
+	('create_hybrid_split', lambda g: catia.create_hybrid_split('split', g['surface'], g['surface_2'], 1), None),
+	('create_translate', lambda g: catia.create_translate('tr', g['line'], g['dir'], 10.0), None),
+	('create_intersection', lambda g: catia.create_intersection('int', g['surface'], g['surface_2']), None),
+	('create_plane_offset', lambda g: catia.create_plane_offset('pl', g['plane'], 10.0, True), None),
+	('create_line_angle', lambda g: catia.create_line_angle('ln', g['line'], g['plane'], g['p1'], 0.0, 10.0, 45.0), None),
+	('create_boundary_of_surfaces', lambda g: catia.create_boundary_of_surfaces('bnd', g['surface']), None),
+	('create_extremum', lambda g: catia.create_extremum('ext', g['line'], g['dir'], 1), None),
+	('create_line_pt_pt', lambda g: catia.create_line_pt_pt('ln', g['p2'], g['p3']), None),
+	('create_line_pt_pt_on_support', lambda g: catia.create_line_pt_pt_on_support('ln', g['p1'], g['p2'], g['plane']), None),
+	('create_plane_normal', lambda g: catia.create_plane_normal('pl', g['line'], g['p1']), None),
+	('create_circle_ctr_pt', lambda g: catia.create_circle_ctr_pt('cir', g['p1'], g['p2'], g['plane']), None),
+	('create_extrude', lambda g: catia.create_extrude('ext', g['line'], 0.0, 10.0, g['dir']), None),
+	('create_join', lambda g: catia.create_join('join', 0, g['surface'], g['surface_2']), None),
+	('create_plane_angle', lambda g: catia.create_plane_angle('pl', g['plane'], g['line'], 30.0, True), None),
+	('create_empty_rotate', lambda g: catia.create_empty_rotate('rot', g['line_2'], g['line'], 30.0), None),
+	('create_boolean', lambda g: catia.create_boolean('bool', True), None),
+	('create_boolean (set)', lambda g: catia.create_boolean('bool', True, 'Set'), None),
+	('create_string', lambda g: catia.create_string('str', 'value'), None),
+	('create_real', lambda g: catia.create_real('r', 1.0), None),
+	('create_real (set)', lambda g: catia.create_real('r', 1.0, 'Set'), None),
+	('create_dimension', lambda g: catia.create_dimension('dim', 'LENGTH', 1.0), None),
+	('create_point_on_curve_from_percent', lambda g: catia.create_point_on_curve_from_percent('pt', g['line'], 0.5, True), None),
+	('create_point_on_curve_extr', lambda g: catia.create_point_on_curve_extr('pt', g['line'], '+X'), None),
+	('create_circle_bitang_point', lambda g: catia.create_circle_bitang_point('cir', g['line'], g['line_2'], g['p3'], g['plane'], 1, 1), None),
+	('create_revol', lambda g: catia.create_revol('rev', g['line_2'], 0.0, 360.0, g['line']), None),
+	('create_formula', lambda g: catia.create_formula('f', '', g['real'], '2.0'), None),
+	('create_sketch', lambda g: catia.create_sketch('sk', g['plane'], [0, 0, 0], [1, 0, 0], [0, 1, 0]), None),
+	('open_sketch', lambda g: catia.open_sketch(g['sketch']), None),
+	('sketch_create_point', lambda g: catia.sketch_create_point('sp', [1.0, 2.0]), sketch_fixture),
+	('sketch_create_line', lambda g: catia.sketch_create_line('sl', [0.0, 0.0], [10.0, 0.0], g['sp1'], g['sp2']), sketch_fixture),
+	('sketch_create_constraint', lambda g: catia.sketch_create_constraint('cst', catia.catia_constant_distance, g['sp1'], g['sp2'], 10.0), sketch_fixture),
+	('sketch_create_projection', lambda g: catia.sketch_create_projection('proj', g['line']), sketch_fixture),
+	('sketch_create_intersection', lambda g: catia.sketch_create_intersection(g['surface']), sketch_fixture),
+	('close_sketch', lambda g: catia.close_sketch(), sketch_fixture),
+	('create_curve_par', lambda g: catia.create_curve_par('par', g['line'], g['surface'], 5.0, False), None),
+	('create_curve_par_dir_safe', lambda g: catia.create_curve_par_dir_safe('par', g['line'], g['surface'], 5.0, '+Z'), None),
+	('get_point_coords', lambda g: catia.get_point_coords(g['p3']), None),
+	('get_reference', lambda g: catia.get_reference(g['line']), None),
+	('get_item', lambda g: catia.get_item('line'), None),
+	('get_item (set name)', lambda g: catia.get_item('line', 'Benchmark'), None),
+	('get_parametre_ref', lambda g: catia.get_parametre_ref('real'), None),
+	('get_parametre_val', lambda g: catia.get_parametre_val('real'), None),
+	('get_axis_system', lambda g: catia.get_axis_system('axis'), None),
+	('get_origin_plane', lambda g: catia.get_origin_plane('yz'), None),
+	('get_hybrid_body', lambda g: catia.get_hybrid_body('Benchmark'), None),
+	('parametre_exists', lambda g: catia.parametre_exists('real'), None),
+	('set_color', lambda g: catia.set_color(g['line'], 'red'), None),
+	('create_parametere_set', lambda g: catia.create_parametere_set('Set_2'), None),
+]
+
+## Build script: cloud of points joined by polyline.
+def script_polyline(n):
+	points = [catia.create_point_coord('pt_{0}'.format(i), (float(i), float(i % 7), 0.0)) for i in range(n)]
+	for i in range(n - 1):
+		catia.create_line_pt_pt('ln_{0}'.format(i), points[i], points[i + 1])
+
+## Build script: cloud of points created one by one.
+def script_point_cloud(n):
+	for i in range(n):
+		catia.create_point_coord('pt_{0}'.format(i), (float(i), 0.0, 0.0))
+
+## Build script: cloud of points created by bulk helper.
+def script_point_cloud_bulk(n):
+	catia.create_points(np.arange(3.0 * n).reshape(-1, 3), 'pt_{0}')
+
+## Build script: rotated copies of a profile around an axis.
+def script_rotate_pattern(n, g):
+	for i in range(n):
+		catia.create_empty_rotate('rot_{0}'.format(i), g['line_2'], g['line'], 360.0 * i / n)
+
+## Build script: parameters set filled with real parameters.
+def script_parameters(n):
+	for i in range(n):
+		catia.create_real('r_{0}'.format(i), float(i), 'Set')
+
+## Build script: parameters set filled by bulk helper.
+def script_parameters_bulk(n):
+	catia.create_parameters({'r_{0}'.format(i): float(i) for i in range(n)}, 'Set')
+
+## Build script: snapshot of all parameters, change of one tenth of them and write back of changed values only.
+def script_parameters_snapshot(n):
+	catia.create_parameters({'r_{0}'.format(i): float(i) for i in range(n)}, 'Set')
+	snapshot = catia.read_parameters(short_names=True)
+	values = dict(snapshot, **{'r_{0}'.format(i): -1.0 for i in range(0, n, 10)})
+	catia.write_parameters(values, snapshot)
+
+## Build script: direction-safe offsets of curve.
+def script_offsets(n, g):
+	for i in range(n):
+		catia.create_curve_par_dir_safe('par_{0}'.format(i), g['line'], g['surface'], 1.0 + i, '+Z')
+
+## Build script: points colored one by one.
+def script_colors(n):
+	for i, point in enumerate(catia.create_points(np.zeros((n, 3)), 'pt_{0}')):
+		catia.set_color(point, ('red', 'blue', 'lime')[i % 3])
+
+## Build script: points colored by bulk styling.
+def script_colors_bulk(n):
+	points = catia.create_points(np.zeros((n, 3)), 'pt_{0}')
+	catia.apply_styles([(point, ('red', 'blue', 'lime')[i % 3]) for i, point in enumerate(points)])
+
+## Build script: closed sketch profile of n vertices created element by element, vertices constrained on lines.
+def script_sketch_profile(n, g):
+	catia.open_sketch(catia.create_sketch('sk', g['plane'], [0, 0, 0], [1, 0, 0], [0, 1, 0]))
+	coords = [[float(np.cos(2 * np.pi * i / n)), float(np.sin(2 * np.pi * i / n))] for i in range(n)]
+	points = [catia.sketch_create_point('sp_{0}'.format(i), coords[i]) for i in range(n)]
+	for i in range(n):
+		line = catia.sketch_create_line('sl_{0}'.format(i), coords[i], coords[(i + 1) % n], points[i], points[(i + 1) % n])
+		catia.sketch_create_constraint(None, catia.catia_constant_on, points[i], line)
+		catia.sketch_create_constraint(None, catia.catia_constant_on, points[(i + 1) % n], line)
+	catia.close_sketch()
+
+## Build script: closed sketch profile of n vertices created by bulk helper.
+def script_sketch_profile_bulk(n, g):
+	catia.open_sketch(catia.create_sketch('sk', g['plane'], [0, 0, 0], [1, 0, 0], [0, 1, 0]))
+	t = np.linspace(0.0, 2 * np.pi, n, endpoint=False)
+	catia.sketch_create_profile(np.c_[np.cos(t), np.sin(t)], 'sp_{0}', 'sl_{0}')
+	catia.close_sketch()
+
+## Build script: join of polyline segments in one join.
+def script_join(n):
+	points = catia.create_points([(float(i), float(i % 7), 0.0) for i in range(n + 1)], 'pt_{0}')
+	catia.create_join('join', 0, *[catia.create_line_pt_pt('ln_{0}'.format(i), points[i], points[i + 1]) for i in range(n)])
+
+## Build script: join of polyline segments by tree of joins of 64 segments.
+# Fake backend can not show the gain of the tree: its update latency is the same for any feature, while update of
+# a real join grows with the number of its elements. The row shows the overhead of the tree (partition joins, their
+# updates and measurement of centers) and the number of COM calls only.
+def script_join_tree(n):
+	points = catia.create_points([(float(i), float(i % 7), 0.0) for i in range(n + 1)], 'pt_{0}')
+	catia.create_join_tree('join', 0, [catia.create_line_pt_pt('ln_{0}'.format(i), points[i], points[i + 1]) for i in range(n)])
+
+## Runs batched version of build script.
+def batched(script):
+	def run(*args):
+		with catia.batch_update():
+			script(*args)
+	return run
+
+# Build scripts: (name, script, arguments builder)
+script_cases = [
+	('polyline, 500 points', script_polyline, lambda g: (500,)),
+	('polyline, 500 points, batch', batched(script_polyline), lambda g: (500,)),
+	('point cloud, 10000 points', script_point_cloud, lambda g: (10000,)),
+	('point cloud, 10000 points, create_points', script_point_cloud_bulk, lambda g: (10000,)),
+	('rotate pattern, 200 copies', script_rotate_pattern, lambda g: (200, g)),
+	('rotate pattern, 200 copies, batch', batched(script_rotate_pattern), lambda g: (200, g)),
+	('colors, 2000 points', script_colors, lambda g: (2000,)),
+	('colors, 2000 points, apply_styles', script_colors_bulk, lambda g: (2000,)),
+	('parameters, 500 reals', script_parameters, lambda g: (500,)),
+	('parameters, 500 reals, create_parameters', script_parameters_bulk, lambda g: (500,)),
+	('parameters, 500 reals, snapshot and diff', script_parameters_snapshot, lambda g: (500,)),
+	('sketch profile, 300 vertices', script_sketch_profile, lambda g: (300, g)),
+	('sketch profile, 300 vertices, sketch_create_profile', script_sketch_profile_bulk, lambda g: (300, g)),
+	('join, 1000 segments', script_join, lambda g: (1000,)),
+	('join, 1000 segments, tree (overhead)', script_join_tree, lambda g: (1000,)),
+	('curve offsets, 20 dir safe', script_offsets, lambda g: (20, g)),
+	('curve offsets, 20 dir safe, batch', batched(script_offsets), lambda g: (20, g)),
+]
+
+## Reads coordinates of points by formulas, as direction-selecting helpers did before get_point_coords:
+# 3 dimension parameters and 3 formulas per point, deleted from tree after reading.
+def formula_coords(*points):
+	hybrid_body_name = catia.cur_catia.current_hybrid_body.Name
+	temp_elements, res = [], []
+	for k, point in enumerate(points):
+		dimensions = [catia.create_dimension('probe_{0}_{1}'.format(k, axis), 'LENGTH', 0.0) for axis in 'XYZ']
+		for i, dimension in enumerate(dimensions):
+			text_definition = '{0}\\{1}.coord({2})'.format(hybrid_body_name, point.Name, i + 1)
+			temp_elements.append(catia.create_formula('probe_{0}_{1}'.format(k, i), '', dimension, text_definition))
+		temp_elements += dimensions
+		res.append(tuple(dimension.Value for dimension in dimensions))
+	catia.delete_elements(*temp_elements)
+	return res
+
+# Coordinates query of 2 points (as needed to select direction): (name, call with fixture geometry)
+coords_cases = [
+	('formulas', lambda g: formula_coords(g['p2'], g['p3'])),
+	('measurable', lambda g: [catia.get_point_coords(g['p2']), catia.get_point_coords(g['p3'])]),
+]
+
+## Runs function in fresh session and returns COM calls, part updates and simulated time of its run.
+def measure(run, prepare=None, latency=0.001, update_latency=0.05):
+	g = fixture(latency, update_latency)
+	if prepare:
+		prepare(g)
+	log = catia.cur_catia.app.log
+	log.reset()
+	run(g)
+	return log.count(), log.updates, log.simulated_time
+
+## Runs build script in new session with given backend and returns numbers of all COM calls and of type information reads.
+def measure_session(backend, script, *args):
+	catia.start_catia('Benchmark.CATPart', backend=backend)
+	catia.create_hybrid_body('Benchmark')
+	script(*args)
+	log = catia.cur_catia.app.log
+	return log.count(), sum(1 for call in log.calls if call[0] == 'ITypeInfo' or call[1] == 'GetTypeInfo')
+
+## Session with polyline script through early binding with cold and warm dispatch cache.
+# Fake dynamic dispatch has no cost of IDispatch name lookups and type information reads, so it is not compared.
+def early_binding_report(latency, update_latency):
+	fake = partial(FakeApplication, latency, update_latency)
+	backend = partial(earlybind.early_bound_application, os.path.join(tempfile.mkdtemp(), 'dispatch_cache.json'), fake)
+	rows = [('cold cache', measure_session(backend, script_polyline, 200))]
+	earlybind.dispatch_cache(catia.cur_catia.app).save()
+	rows.append(('warm cache', measure_session(backend, script_polyline, 200)))
+	print('Early binding, session with polyline of 200 points')
+	print('{0:<40}{1:>10}{2:>20}'.format('case', 'calls', 'type info calls'))
+	for name, (calls, type_info_calls) in rows:
+		print('{0:<40}{1:>10}{2:>20}'.format(name, calls, type_info_calls))
+	print()
+
+## Wall time of scalar functions of linalgebra applied point by point and of their batch versions on (n,3) array.
+def linalgebra_report(n=20000):
+	points = np.random.default_rng(0).uniform(-1000.0, 1000.0, (n, 3))
+	point_list = points.tolist()
+	p1, p2, v = [0.0, 0.0, 0.0], [1.0, 2.0, 3.0], [3.0, -1.0, 2.0]
+	cases = [
+		('vector_rotate', lambda: [la.vector_rotate(p, v, 30.0) for p in point_list], lambda: la.vector_rotate_batch(points, v, 30.0)),
+		('point_rotate', lambda: [la.point_rotate(p, p1, p2, 30.0) for p in point_list], lambda: la.point_rotate_batch(points, p1, p2, 30.0)),
+		('point_proj_on_axis', lambda: [la.point_proj_on_axis(p, p1, p2) for p in point_list], lambda: la.point_proj_on_axis_batch(points, p1, p2)),
+		('distance_point_axis', lambda: [la.distance_point_axis(p, p1, p2) for p in point_list], lambda: la.distance_point_axis_batch(points, p1, p2)),
+		('distance_2points', lambda: [la.distance_2points(p, p2) for p in point_list], lambda: la.distance_2points_batch(points, p2)),
+		('cross_product', lambda: [la.cross_product(p, v) for p in point_list], lambda: la.cross_product_batch(points, v)),
+		('dot_product', lambda: [la.dot_product(p, v) for p in point_list], lambda: la.dot_product_batch(points, v)),
+		('unit', lambda: [la.unit(p) for p in point_list], lambda: la.unit_batch(points)),
+		('3 placements / Transform', lambda: [la.summ(la.point_rotate(la.point_rotate(p, p1, p2, 30.0), p1, v, 45.0), v) for p in point_list],
+			lambda: la.Transform.chain(la.Transform.axis_rotation(p1, p2, 30.0), la.Transform.axis_rotation(p1, v, 45.0), la.Transform.translation(v))(points)),
+	]
+	print('linalgebra, {0} points'.format(n))
+	print('{0:<40}{1:>14}{2:>14}{3:>10}'.format('function', 'scalar, ms', 'batch, ms', 'speedup'))
+	for name, scalar, batch in cases:
+		scalar_time, batch_time = wall_time(scalar), wall_time(batch)
+		print('{0:<40}{1:>14.2f}{2:>14.2f}{3:>10.0f}'.format(name, scalar_time * 1000, batch_time * 1000, scalar_time / batch_time))
+	print()
+
+## Time per query of lin_interp, scalar and vectorized evaluation of Interpolator on curve of n points.
+def interpolation_report(n=10000, queries=2000):
+	rng = np.random.default_rng(0)
+	ps = sorted(zip(rng.uniform(0.0, 1000.0, n).tolist(), rng.uniform(-1.0, 1.0, n).tolist()))
+	x = rng.uniform(-10.0, 1010.0, queries)
+	x_list = x.tolist()
+	cases = [('lin_interp', lambda: [la.lin_interp(x_, ps) for x_ in x_list])]
+	for mode in la.Interpolator.modes:
+		interpolator = la.Interpolator(ps, mode)
+		cases.append(('Interpolator {0}, scalar'.format(mode), lambda: [interpolator(x_) for x_ in x_list]))
+		cases.append(('Interpolator {0}, array'.format(mode), lambda: interpolator(x)))
+	print('Interpolation, curve of {0} points'.format(n))
+	print('{0:<40}{1:>14}'.format('case', 'us / query'))
+	for name, run in cases:
+		print('{0:<40}{1:>14.3f}'.format(name, wall_time(run) / queries * 1e6))
+	print()
+
+## Time per (T, x) query of hand-written interpolation around lin_interp and of CurvesTable (scalar and batch).
+def table_report(temperatures=20, n=500, queries=2000):
+	rng = np.random.default_rng(0)
+	courbes = {float(t): sorted(zip(rng.uniform(0.0, 1000.0, n).tolist(), rng.uniform(0.0, 1.0, n).tolist()))
+			   for t in np.linspace(-50.0, 500.0, temperatures)}
+	ts = sorted(courbes)
+	t, x = rng.uniform(-60.0, 510.0, queries), rng.uniform(-10.0, 1010.0, queries)
+	def lin_interp_2d(t_, x_):
+		if t_ >= ts[-1] or t_ <= ts[0]:
+			return la.lin_interp(x_, courbes[ts[-1] if t_ >= ts[-1] else ts[0]])
+		j = la.bisect_left(ts, t_)
+		w = (t_ - ts[j-1]) / (ts[j] - ts[j-1])
+		return (1.0 - w) * la.lin_interp(x_, courbes[ts[j-1]]) + w * la.lin_interp(x_, courbes[ts[j]])
+	table = la.CurvesTable(courbes)
+	cases = [('lin_interp loops', lambda: [lin_interp_2d(t_, x_) for t_, x_ in zip(t.tolist(), x.tolist())]),
+			 ('CurvesTable, scalar', lambda: [table(t_, x_) for t_, x_ in zip(t.tolist(), x.tolist())]),
+			 ('CurvesTable, batch', lambda: table(t, x))]
+	print('Interpolation table, {0} temperatures x {1} points'.format(temperatures, n))
+	print('{0:<40}{1:>14}'.format('case', 'us / query'))
+	for name, run in cases:
+		print('{0:<40}{1:>14.3f}'.format(name, wall_time(run) / queries * 1e6))
+	print()
+
+## Best wall time of several runs of function.
+def wall_time(run, repeat=3):
+	res = []
+	for i in range(repeat):
+		start = perf_counter()
+		run()
+		res.append(perf_counter() - start)
+	return min(res)
+
+def report(title, rows):
+	print(title)
+	print('{0:<40}{1:>10}{2:>10}{3:>14}'.format('case', 'calls', 'updates', 'time, s'))
+	for name, (calls, updates, simulated_time) in rows:
+		print('{0:<40}{1:>10}{2:>10}{3:>14.3f}'.format(name, calls, updates, simulated_time))
+	print()
+
+def main(latency=0.001, update_latency=0.05):
+	report('Public helpers', [(name, measure(run, prepare, latency, update_latency)) for name, run, prepare in helper_cases])
+	report('Coordinates of 2 points', [(name, measure(run, None, latency, update_latency)) for name, run in coords_cases])
+	report('Build scripts', [(name, measure(lambda g: script(*args(g)), None, latency, update_latency)) for name, script, args in script_cases])
+	early_binding_report(latency, update_latency)
+	linalgebra_report()
+	interpolation_report()
+	table_report()
+
+if __name__ == '__main__':
+	main(*[float(arg) / 1000 for arg in sys.argv[1:3]])
@@ -9,11 +9,23 @@ __status__ = 'TEST'
 __date__ = '15 janvier 2018'
 
 
-from itertools import chain
-import win32api
-import win32com.client.dynamic
-import pythoncom
-from pywintypes import com_error
+from itertools import chain, count
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import local
+from time import perf_counter
+
+import numpy as np
+from linalgebra import vector, cross_product, dot_product, point_proj_on_axis, spatial_partition, prefetch, read_points_chunks
+try:
+	import win32api
+	import win32com.client.dynamic
+	import pythoncom
+	from pywintypes import com_error
+except ImportError:
+	# No pywin32 outside of Windows: only pluggable backends (e.g. fakecatia) can be used
+	win32com = pythoncom = None
+	from fakecatia import com_error
 
 ## Dictionary which store rgb codes of colors
 rgb_colors = {
@@ -72,72 +84,412 @@ catia_constant_driving = 0
 catia_constant_driven = 1
 
 
-## Class for storing catia application COM-object and general actions with documents."""
+## Default backend: returns CATIA application COM-object through dynamic dispatch.
+def com_application():
+	pythoncom.CoInitialize()
+	return win32com.client.Dispatch('CATIA.Application')
+
+## Returns object wrapped by proxy (e.g. profiler.ComProxy, which keeps it as _obj) or object itself.
+def unwrapped(obj):
+	return getattr(obj, '__dict__', {}).get('_obj', obj)
+
+## In-memory index of part tree: geometrical sets and their shapes, parameters sets, parameters and axis systems by name.
+# Built on opening of document and kept up to date by helpers of this module; name lookups fall back to COM on miss.
+# Objects are stored by put / add, which record their locations, so rename and remove do not scan the tables.
+class PartIndex():
+
+	def __init__(self):
+		self.hybrid_bodies = {}
+		# {geometrical set name: {shape name: shape}}
+		self.shapes = {}
+		self.param_sets = {}
+		self.parameters = {}
+		self.axis_systems = {}
+		# {id(object): [(table, key)]}
+		self.locations = {}
+		# Short names of parameters: {short name: full name} and names shared by several parameters (not indexed)
+		self.short_names = {}
+		self.ambiguous = set()
+
+	def build(self, part):
+		self.__init__()
+		hybrid_bodies = part.HybridBodies
+		for i in range(1, hybrid_bodies.Count + 1):
+			hybrid_body = hybrid_bodies.Item(i)
+			hybrid_body_name = hybrid_body.Name
+			self.add_hybrid_body(hybrid_body_name, hybrid_body)
+			hybrid_shapes = hybrid_body.HybridShapes
+			for j in range(1, hybrid_shapes.Count + 1):
+				shape = hybrid_shapes.Item(j)
+				self.add_shape(hybrid_body_name, shape.Name, shape)
+		param_sets = part.Parameters.RootParameterSet.ParameterSets
+		for i in range(1, param_sets.Count + 1):
+			param_set = param_sets.Item(i)
+			self.add(self.param_sets, param_set.Name, param_set)
+		parameters = part.Parameters
+		for i in range(1, parameters.Count + 1):
+			parameter = parameters.Item(i)
+			self.add_parameter(parameter.Name, parameter)
+		axis_systems = part.AxisSystems
+		for i in range(1, axis_systems.Count + 1):
+			axis_system = axis_systems.Item(i)
+			self.add(self.axis_systems, axis_system.Name, axis_system)
+
+	## Stores object in table by key, replacing the previous one.
+	def put(self, table, key, obj):
+		self.discard(table, key)
+		table[key] = obj
+		self.locations.setdefault(id(unwrapped(obj)), []).append((table, key))
+
+	## Removes key from table.
+	def discard(self, table, key):
+		previous = table.pop(key, None)
+		if previous is not None:
+			locations = self.locations.get(id(unwrapped(previous)), [])
+			locations[:] = [(t, k) for t, k in locations if t is not table or k != key]
+
+	## Stores object in table by key unless the key is taken.
+	def add(self, table, key, obj):
+		if key not in table:
+			self.put(table, key, obj)
+
+	def add_hybrid_body(self, name, hybrid_body):
+		self.add(self.hybrid_bodies, name, hybrid_body)
+		self.shapes.setdefault(name, {})
+
+	def add_shape(self, hybrid_body_name, name, shape):
+		if hybrid_body_name is not None:
+			self.add(self.shapes.setdefault(hybrid_body_name, {}), name, shape)
+
+	## Parameters are listed by full name ('Part1\\Set\\Length'), they are also indexed by short name. Short name shared
+	# by parameters of several sets is not indexed: its lookup falls back to COM (Parameters.Item), as without index.
+	# Helpers creating parameters index them by the name given, which is checked against indexed parameter of this name.
+	def add_parameter(self, name, parameter):
+		short_name = name.split('\\')[-1]
+		if short_name == name:
+			previous = self.parameters.get(name)
+			if previous is not None and unwrapped(previous) is not unwrapped(parameter) or name in self.ambiguous:
+				self.set_ambiguous(name)
+			else:
+				self.put(self.parameters, name, parameter)
+			return
+		self.add(self.parameters, name, parameter)
+		if self.short_names.setdefault(short_name, name) != name or short_name in self.ambiguous:
+			self.set_ambiguous(short_name)
+		else:
+			self.add(self.parameters, short_name, parameter)
+
+	def set_ambiguous(self, short_name):
+		self.ambiguous.add(short_name)
+		self.discard(self.parameters, short_name)
+
+	def tables(self):
+		return [self.hybrid_bodies, self.param_sets, self.parameters, self.axis_systems] + list(self.shapes.values())
+
+	## Returns locations (table, key) of object, dropping the ones where it was replaced.
+	def __pop_locations(self, obj):
+		return [(table, key) for table, key in self.locations.pop(id(obj), []) if unwrapped(table.get(key)) is obj]
+
+	def rename(self, obj, name):
+		obj = unwrapped(obj)
+		for table, key in self.__pop_locations(obj):
+			self.add(table, name, table.pop(key))
+
+	def remove(self, obj):
+		obj = unwrapped(obj)
+		for table, key in self.__pop_locations(obj):
+			del table[key]
+
+## Class for storing catia application COM-object and general actions with documents.
+# Backend is a callable returning application object: COM (by default) or fake one (fakecatia.FakeApplication).
+# Open documents are kept in registry by path (or name for new documents) with their handles (part, its collections,
+# index, references ...): switching of document used by helpers (activate) only swaps cached handles.
+# If max_documents is set, least recently used documents opened from files are closed: unmodified ones only,
+# unless save_evicted is set (modified documents are saved before closing then).
 class CATIA():
 
-	def __init__(self, visible=True):
-		pythoncom.CoInitialize()
-		self.app = win32com.client.Dispatch('CATIA.Application')
-		self.app.Visible = visible
+	# Handles of document: swapped on switching of documents
+	document_attributes = ('document', 'part', 'hybrid_bodies', 'shape_factory', 'parameteres', 'current_hybrid_body',
+						   'current_hybrid_body_name', 'spa_workbench', 'index', 'reference_cache', 'reference_keys', 'circle_bitang_orientations',
+						   'factory2D', 'current_sketch')
 
-	def __init_part_objects(self):
-		self.part = self.app.ActiveDocument.Part
+	def __init__(self, visible=True, backend=None, max_documents=None, save_evicted=False):
+		self.app = (backend or com_application)()
+		self.app.Visible = visible
+		# Batch mode: None - update after each feature, 0 - update at the end of batch, N - update each N features
+		self.batch_size = None
+		self.pending_features = []
+		self.reference_cache_size = 4096
+		self.circle_bitang_memo_size = 4096
+		# Orientations of create_circle_bitang_point: learned convention of orientation relative to side of point
+		# and statistics of attempts ({attempts: calls}); memo of orientations is kept per document
+		self.circle_bitang_convention = (1, 1)
+		self.circle_bitang_stats = {'calls': 0, 'memo_hits': 0, 'predicted': 0, 'attempts': {}}
+		# Registry of open documents: {path or name: {attribute: handle}}, least recently used first
+		self.documents = OrderedDict()
+		self.document_key = None
+		self.max_documents = max_documents
+		self.save_evicted = save_evicted
+		# Documents opened from files: only they are closed by eviction (new documents have no path to be saved to)
+		self.opened_documents = set()
+
+	def __init_part_objects(self, document, key):
+		self.__leave()
+		self.document = document
+		self.part = document.Part
 		self.hybrid_bodies = self.part.HybridBodies
 		self.shape_factory = self.part.HybridShapeFactory
 		self.parameteres = self.part.Parameters
+		self.current_hybrid_body = None
+		self.current_hybrid_body_name = None
+		self.spa_workbench = None
+		self.index = PartIndex()
+		self.index.build(self.part)
+		# References created from objects: {id(object) or key: (object, reference)}, least recently used are evicted
+		self.reference_cache = OrderedDict()
+		# Keys of cached references of each object: {id(object): {key}}
+		self.reference_keys = {}
+		# Orientations of create_circle_bitang_point: {inputs configuration: (inputs, orientations)}, least recently used
+		# are evicted. Inputs are kept, so ids of the key are not reused by other objects while memoized
+		self.circle_bitang_orientations = OrderedDict()
+		self.factory2D = None
+		self.current_sketch = None
+		self.document_key = key
+		self.documents[key] = {}
+		self.__evict()
+
+	## Updates pending features and stores handles of current document before switching to another one.
+	def __leave(self):
+		if self.document_key is None:
+			return
+		if self.pending_features:
+			flush_update(self)
+		self.documents[self.document_key] = {attr: getattr(self, attr) for attr in self.document_attributes}
+
+	## Closes least recently used documents opened from files above max_documents. Modified documents are kept open
+	# (registry may exceed max_documents then) or saved before closing if save_evicted is set.
+	def __evict(self):
+		if self.max_documents is None:
+			return
+		candidates = [key for key in self.documents if key != self.document_key and key in self.opened_documents
+					  and (self.save_evicted or self.documents[key]['document'].Saved)]
+		for key in candidates[:max(0, len(self.documents) - self.max_documents)]:
+			document = self.documents.pop(key)['document']
+			self.opened_documents.discard(key)
+			if not document.Saved:
+				document.Save()
+			document.Close()
+
+	## Switches document used by helpers to open document (by path or name).
+	def activate(self, key):
+		if key == self.document_key:
+			return
+		handles = self.documents[key]
+		self.__leave()
+		for attr, value in handles.items():
+			setattr(self, attr, value)
+		self.document_key = key
+		self.documents.move_to_end(key)
 
 	def open(self, file_path):
-		self.app.Documents.Open(file_path)
-		self.__init_part_objects()
+		if file_path in self.documents:
+			self.activate(file_path)
+			return
+		self.opened_documents.add(file_path)
+		self.__init_part_objects(self.app.Documents.Open(file_path), file_path)
 
 	def new(self, part_name):
-		self.app.Documents.Add(part_name)
-		self.__init_part_objects()
+		document = self.app.Documents.Add(part_name)
+		self.__init_part_objects(document, document.Name)
 
+	## Saves current document to file, its registry entry is moved to the new path.
 	def save_as(self, file_path):
-		self.app.ActiveDocument.SaveAs(file_path)
+		self.document.SaveAs(file_path)
+		if file_path == self.document_key:
+			return
+		self.documents.pop(file_path, None)
+		self.documents[file_path] = self.documents.pop(self.document_key)
+		self.opened_documents.discard(self.document_key)
+		self.opened_documents.add(file_path)
+		self.document_key = file_path
 
 	def save(self):
-		self.app.ActiveDocument.Save()
+		self.document.Save()
 
+	## Closes current document, the most recently used one becomes current.
 	def close(self):
-		self.app.ActiveDocument.Close()
+		self.document.Close()
+		del self.documents[self.document_key]
+		self.opened_documents.discard(self.document_key)
+		self.document_key = None
+		if self.documents:
+			self.activate(next(reversed(self.documents)))
 
 	def quit(self):
 		self.app.Quit()
 
+## Session used by helpers of this module: session bound to calling thread (see bind_session) or default one.
+# COM-objects of session are bound to the thread which created them, so threads driving their own CATIA sessions
+# (asynccatia, parallel) bind them, while single-threaded scripts use default session set by start_catia.
+class CurrentSession():
+
+	def __init__(self):
+		object.__setattr__(self, '_local', local())
+		object.__setattr__(self, '_default', None)
+
+	def get(self):
+		session = getattr(self._local, 'session', None)
+		return session if session is not None else self._default
+
+	def __getattr__(self, name):
+		return getattr(self.get(), name)
+
+	def __setattr__(self, name, value):
+		setattr(self.get(), name, value)
+
+	def __repr__(self):
+		return 'CurrentSession({0!r})'.format(self.get())
+
+cur_catia = CurrentSession()
+
+## Sets default session, used by threads without session of their own.
+def set_session(session):
+	object.__setattr__(cur_catia, '_default', session)
+
+## Binds session to calling thread (None unbinds it).
+def bind_session(session):
+	cur_catia._local.session = session
+
+## Returns session used by helpers in calling thread.
+def current_session():
+	return cur_catia.get()
+
+## Context manager binding session to calling thread for the duration of block.
+@contextmanager
+def use_session(session):
+	previous = getattr(cur_catia._local, 'session', None)
+	bind_session(session)
+	try:
+		yield session
+	finally:
+		bind_session(previous)
+
 ## Running of CATIA application.
-def start_catia(catia_path, visible=True):
-	global cur_catia
-	cur_catia = CATIA(visible)
+def start_catia(catia_path, visible=True, backend=None, max_documents=None, save_evicted=False):
+	set_session(CATIA(visible, backend, max_documents, save_evicted))
 	cur_catia.open(catia_path)
 
+## Switches document used by helpers to document of given path or name (opened if it is not open yet).
+def switch_document(key):
+	if key in cur_catia.documents:
+		cur_catia.activate(key)
+	else:
+		cur_catia.open(key)
+
 ## Saving of active open document.
 def catia_active_document_save():
 	global cur_catia
 	cur_catia.save()
 
+## Exception raised when postponed part update fails. Keeps the feature which caused the failure.
+class UpdateError(Exception):
+
+	def __init__(self, feature, error):
+		self.feature = feature
+		self.error = error
+		try:
+			feature_name = feature.Name
+		except com_error:
+			feature_name = repr(feature)
+		super().__init__('Update of feature {0} failed: {1}'.format(feature_name, error))
+
+## Exception raised by create_join_tree when join of partition fails to update: name, level and number of partition
+# join, its elements and original error.
+class JoinError(Exception):
+
+	def __init__(self, name, level, partition, elements, error):
+		self.name = name
+		self.level = level
+		self.partition = partition
+		self.elements = elements
+		self.error = error
+		super().__init__('Join {0} of partition {1} (level {2}, {3} elements) failed: {4}'.format(name, partition, level, len(elements), error))
+
+## Updates part after creation of feature. Within batch update is postponed and feature is stored as pending.
+def update_part(feature=None):
+	if cur_catia.batch_size is None:
+		cur_catia.part.Update()
+		return
+	if feature is not None:
+		cur_catia.pending_features.append(feature)
+		if cur_catia.batch_size and len(cur_catia.pending_features) >= cur_catia.batch_size:
+			flush_update()
+
+## Updates part and clears pending features. On failure pending features are updated one by one to find the faulty one.
+def flush_update(session=None):
+	session = session or cur_catia.get()
+	pending, session.pending_features = session.pending_features, []
+	try:
+		session.part.Update()
+	except com_error as e:
+		for feature in pending:
+			try:
+				session.part.UpdateObject(feature)
+			except com_error as feature_error:
+				raise UpdateError(feature, feature_error) from e
+		raise
+
+## Context manager suspending part update after each created feature.
+# Part is updated once at the end of batch or each `every` created features if specified.
+# Nested batches are updated by the outermost one.
+@contextmanager
+def batch_update(every=0):
+	outer_batch_size = cur_catia.batch_size
+	cur_catia.batch_size = every
+	try:
+		yield
+	except:
+		if outer_batch_size is None:
+			cur_catia.pending_features = []
+		raise
+	finally:
+		cur_catia.batch_size = outer_batch_size
+	if outer_batch_size is None:
+		flush_update()
+
 ## Hide specified geometry element.
 def hide(*elements):
-	to_hide = cur_catia.app.ActiveDocument.Selection
-	to_hide.Clear()
-	for geometry in elements:
-		to_hide.Add(geometry)
-	to_hide.VisProperties.SetShow(1)
-	to_hide.Clear()
-	cur_catia.part.Update()
+	apply_styles([(geometry, 'hide') for geometry in elements])
+	update_part()
 
 ## Creating of empty geometrical set.
 def create_hybrid_body(name):
 	hybrid_body = cur_catia.hybrid_bodies.Add()
 	hybrid_body.Name = name
-	cur_catia.part.Update()
+	update_part(hybrid_body)
 	cur_catia.current_hybrid_body = hybrid_body
+	cur_catia.current_hybrid_body_name = name
+	cur_catia.index.add_hybrid_body(name, hybrid_body)
 	return hybrid_body
 
 ## Indicates geometrical set selecting by name as active set for adding any further created geometry objects.
 def activate_hybrid_body(hybrid_body_name):
-	cur_catia.current_hybrid_body = cur_catia.hybrid_bodies.Item(hybrid_body_name)
+	cur_catia.current_hybrid_body = get_hybrid_body(hybrid_body_name)
+	cur_catia.current_hybrid_body_name = hybrid_body_name
+
+## Appends shape to active geometrical set and indexes it by name.
+def append_shape(shape, name=None):
+	cur_catia.current_hybrid_body.AppendHybridShape(shape)
+	if name is not None:
+		index_shape(shape, name)
+
+## Adds shape of active geometrical set to index of part tree.
+def index_shape(shape, name):
+	cur_catia.index.add_shape(cur_catia.current_hybrid_body_name, name, shape)
+
+## Rebuilds index of part tree, e.g. after edition of part outside of this module.
+def refresh_index():
+	cur_catia.index.build(cur_catia.part)
 
 ## Creates a point by coordinates and appends result to active geometrical set.
 def create_point_coord(name, coords, ref_axis_system=False):
@@ -145,17 +497,56 @@ def create_point_coord(name, coords, ref_axis_system=False):
 	if ref_axis_system:
 		point.RefAxisSystem = get_reference(ref_axis_system)
 	point.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(point)
-	cur_catia.part.Update()
+	append_shape(point, name)
+	update_part(point)
 	return point
 
+## Creates points by coordinates ((N,3) array or iterable of points) and appends them to active geometrical set.
+# Names are given by pattern formatted with point number (starting from `start`) or by sequence of names.
+# Reference of axis system is resolved once, part is updated once for all points (or by enclosing batch).
+# Costs 3 COM calls per point (AddNewPointCoord, Name, AppendHybridShape), 4 with axis system, and 1 update.
+# Returns points in order of coordinates.
+def create_points(coords, name='point_{0}', ref_axis_system=False, start=0, index=True):
+	if hasattr(coords, 'tolist'):
+		coords = coords.tolist()
+	names = (name.format(i) for i in count(start)) if isinstance(name, str) else iter(name)
+	shape_factory, hybrid_body = cur_catia.shape_factory, cur_catia.current_hybrid_body
+	ref = get_reference(ref_axis_system) if ref_axis_system else None
+	points = []
+	with batch_update():
+		for point_coords, point_name in zip(coords, names):
+			point = shape_factory.AddNewPointCoord(*point_coords)
+			if ref is not None:
+				point.RefAxisSystem = ref
+			point.Name = point_name
+			hybrid_body.AppendHybridShape(point)
+			if index:
+				index_shape(point, point_name)
+			update_part(point)
+			points.append(point)
+	return points
+
+## Creates points from stream of (k, 3) arrays of coordinates, e.g. read by linalgebra.read_points_chunks.
+# Next chunk is read in background thread while points of current one are created, part is updated once per chunk.
+# Points are named by pattern formatted with point number. Returns number of created points.
+# Streamed points are not kept in part index unless index is set (lookups by name fall back to COM).
+def create_points_from_chunks(chunks, name='point_{0}', ref_axis_system=False, prefetch_size=2, index=False):
+	created = 0
+	for chunk in prefetch(chunks, prefetch_size):
+		created += len(create_points(chunk, name, ref_axis_system, created, index))
+	return created
+
+## Creates points from file of coordinates (x y z per line) with bounded memory: file is read by chunks of chunk_size points.
+def create_points_from_file(path_to_file, name='point_{0}', ref_axis_system=False, chunk_size=10000, index=False):
+	return create_points_from_chunks(read_points_chunks(path_to_file, chunk_size), name, ref_axis_system, index=index)
+
 ## Creates a new datum of point within the current body and appends result to active geometrical set.
 def create_point_datum(name, point):
 	point_ref = get_reference(point)
 	datum = cur_catia.shape_factory.AddNewPointDatum(point_ref)
-	cur_catia.current_hybrid_body.AppendHybridShape(datum)
+	append_shape(datum, name)
 	datum.Name = name
-	cur_catia.part.Update()
+	update_part(datum)
 	return datum
 
 ## Creates an axis system.
@@ -167,14 +558,15 @@ def create_axis_system(name, origin_point, axis_vector_1, axis_vector_2, axis_ve
 	axis_system.PutZAxis(axis_vector_3)
 	axis_system.IsCurrent = True
 	axis_system.Name = name
+	cur_catia.index.add(cur_catia.index.axis_systems, name, axis_system)
 	return axis_system
 
 ## Creates a new offset trough point plane within the current body and appends result to active geometrical set.
 def create_plane_offset_pt(name, reference_plane, point):
 	plane = cur_catia.shape_factory.AddNewPlaneOffsetPt(reference_plane, point)
 	plane.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(plane)
-	cur_catia.part.Update()
+	append_shape(plane, name)
+	update_part(plane)
 	return plane
 
 ## Creates a new direction specified by an element within the current body and appends result to active geometrical set.
@@ -185,32 +577,32 @@ def create_direction(reference_geometry):
 def create_line_pt_dir(name, point, direction, limit_1, limit_2, orientation):
 	line = cur_catia.shape_factory.AddNewLinePtDir(point, direction, limit_1, limit_2, bool(orientation))
 	line.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(line)
-	cur_catia.part.Update()
+	append_shape(line, name)
+	update_part(line)
 	return line
 
 ## Creates a new point-direction line within the current body and appends result to active geometrical set.
 def create_line_dir_on_support(name, point, direction, plane, limit_1, limit_2, orientation):
 	line = cur_catia.shape_factory.AddNewLinePtDirOnSupport(point, direction, plane, limit_1, limit_2, bool(orientation))
 	line.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(line)
-	cur_catia.part.Update()
+	append_shape(line, name)
+	update_part(line)
 	return line
 
 ## Creates a new bitangent line within the current body and appends result to active geometrical set.
 def create_line_bitang(name, curve_1, curve_2, support=None):
 	line = cur_catia.shape_factory.AddNewLineBiTangent(curve_1, curve_2, support)
 	line.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(line)
-	cur_catia.part.Update()
+	append_shape(line, name)
+	update_part(line)
 	return line
 
 ## Creates a new Split within the current body and appends result to active geometrical set.
 def create_hybrid_split(name, surface, splitting_geometry, orientation):
 	split = cur_catia.shape_factory.AddNewHybridSplit(surface, splitting_geometry, orientation)
 	split.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(split)
-	cur_catia.part.Update()
+	append_shape(split, name)
+	update_part(split)
 	return split
 
 ## Creates a new Translate within the current body and appends result to active geometrical set.
@@ -222,40 +614,40 @@ def create_translate(name, geometry, direction, distance):
 	translate.Direction = direction
 	translate.DistanceValue = distance
 	translate.VolumeResult = False
-	cur_catia.current_hybrid_body.AppendHybridShape(translate)
-	cur_catia.part.Update()
+	append_shape(translate, name)
+	update_part(translate)
 	return translate
 
 ## Creates a new Intersection within the current body and appends result to active geometrical set.
 def create_intersection(name, geometry_1, geometry_2):
 	intersection = cur_catia.shape_factory.AddNewIntersection(geometry_1, geometry_2)
 	intersection.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(intersection)
-	cur_catia.part.Update()
+	append_shape(intersection, name)
+	update_part(intersection)
 	return intersection
 
 ## Creates a new offset trough point plane within the current body and appends result to active geometrical set.
 def create_plane_offset(name, reference_plane, offset, orientation):
 	plane = cur_catia.shape_factory.AddNewPlaneOffset(reference_plane, offset, bool(orientation))
 	plane.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(plane)
-	cur_catia.part.Update()
+	append_shape(plane, name)
+	update_part(plane)
 	return plane
 
 ## Creates a new angle line within the current body and appends result to active geometrical set.
 def create_line_angle(name, reference_line, plane, point, limit_1, limit_2, angle):
 	line = cur_catia.shape_factory.AddNewLineAngle(reference_line, plane, point, False, limit_1, limit_2, angle, False)
 	line.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(line)
-	cur_catia.part.Update()
+	append_shape(line, name)
+	update_part(line)
 	return line
 
 ## Creates a Boundary within the current body and appends result to active geometrical set.
 def create_boundary_of_surfaces(name, reference_surface):
 	boundary = cur_catia.shape_factory.AddNewBoundaryOfSurface(reference_surface)
-	cur_catia.current_hybrid_body.AppendHybridShape(boundary)
+	append_shape(boundary, name)
 	boundary.Name = name
-	cur_catia.part.Update()
+	update_part(boundary)
 	return boundary
 
 
@@ -268,33 +660,33 @@ def create_extremum(name, geometry, direction, orientation, direction_2=None, or
 	if direction_3:
 		extremum.Direction3 = direction_3
 		extremum.ExtremumType3 = orientation_3
-	cur_catia.current_hybrid_body.AppendHybridShape(extremum)
+	append_shape(extremum, name)
 	extremum.Name = name
-	cur_catia.part.Update()
+	update_part(extremum)
 	return extremum
 
 ## Creates a new point-point line with extensions within the current body and appends result to active geometrical set.
 def create_line_pt_pt(name, point_1, point_2):
 	line = cur_catia.shape_factory.AddNewLinePtPt(point_1, point_2)
 	line.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(line)
-	cur_catia.part.Update()
+	append_shape(line, name)
+	update_part(line)
 	return line
 
 ## Creates a new point-point line with support within the current body and appends result to active geometrical set.
 def create_line_pt_pt_on_support(name, point_1, point_2, plane):
 	line = cur_catia.shape_factory.AddNewLinePtPtOnSupport(point_1, point_2, plane)
 	line.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(line)
-	cur_catia.part.Update()
+	append_shape(line, name)
+	update_part(line)
 	return line
 
 ## Creates a new normal plane within the current body and appends result to active geometrical set.
 def create_plane_normal(name, line, point):
 	plane = cur_catia.shape_factory.AddNewPlaneNormal(line, point)
 	plane.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(plane)
-	cur_catia.part.Update()
+	append_shape(plane, name)
+	update_part(plane)
 	return plane
 
 ## Creates a new whole circle defined by its center, a passing point within the current body and appends result to active geometrical set.
@@ -302,44 +694,97 @@ def create_circle_ctr_pt(name, center_point, radius_point, plane):
 	circle = cur_catia.shape_factory.AddNewCircleCtrPt(center_point, radius_point, plane, True)
 	circle.Name = name
 	circle.SetLimitation(1)
-	cur_catia.current_hybrid_body.AppendHybridShape(circle)
-	cur_catia.part.Update()
+	append_shape(circle, name)
+	update_part(circle)
 	return circle
 
 ## Creates a new extrude within the current body and appends result to active geometrical set.
 def create_extrude(name, line, limit_1, limit_2, direction):
 	extrude = cur_catia.shape_factory.AddNewExtrude(line, limit_1, limit_2, direction)
 	extrude.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(extrude)
-	cur_catia.part.Update()
+	append_shape(extrude, name)
+	update_part(extrude)
 	return extrude
 
 ## Creates a new Join within the current body and appends result to active geometrical set.
-def create_join(name, set_connex, *elements):
-	join = cur_catia.shape_factory.AddNewJoin(elements[0], elements[1])
+# Settings of join are keyword arguments of join_elements (deviation, angular_tolerance ...).
+def create_join(name, set_connex, *elements, **settings):
+	join = join_elements(elements, set_connex, **settings)
 	join.Name = name
-	if len(elements) > 2:
-		for i in range(2, len(elements)):
-			join.AddElement(elements[i])
+	append_shape(join, name)
+	update_part(join)
+	return join
+
+## Creates join of elements (at least 2) with given settings, without appending it to geometrical set and updating it.
+def join_elements(elements, set_connex, manifold=0, simplify=0, suppress_mode=0, deviation=0.001,
+				  angular_tolerance_mode=0, angular_tolerance=0.5, federation_propagation=0):
+	join = cur_catia.shape_factory.AddNewJoin(elements[0], elements[1])
+	for element in elements[2:]:
+		join.AddElement(element)
 	join.SetConnex(set_connex)
-	join.SetManifold(0)
-	join.SetSimplify(0)
-	join.SetSuppressMode(0)
-	join.SetDeviation(0.001)
-	join.SetAngularToleranceMode(0)
-	join.SetAngularTolerance(0.5)
-	join.SetFederationPropagation(0)
-	cur_catia.current_hybrid_body.AppendHybridShape(join)
-	cur_catia.part.Update()
+	join.SetManifold(manifold)
+	join.SetSimplify(simplify)
+	join.SetSuppressMode(suppress_mode)
+	join.SetDeviation(deviation)
+	join.SetAngularToleranceMode(angular_tolerance_mode)
+	join.SetAngularTolerance(angular_tolerance)
+	join.SetFederationPropagation(federation_propagation)
 	return join
 
+## Creates join of many elements as tree of joins: elements are split into partitions of at most partition_size
+# elements (spatially by centers of elements, measured if not given, or as given by partitions, e.g. groups of adjacent
+# patches), each partition is joined, then joins of partitions are joined by partition_size until one join is left.
+# Joins of partitions are named '<name>_<level>_<number>', the root one is named name. Each join is updated alone
+# (UpdateObject) right after its creation, so failed join is reported by JoinError with its partition.
+# Settings of joins are keyword arguments of join_elements. Returns root join.
+# Pending features of batch are updated first, so that elements can be measured and joins updated alone.
+def create_join_tree(name, set_connex, elements, partition_size=64, centers=None, partitions=None, **settings):
+	if partition_size < 2:
+		raise ValueError('Partition size must be at least 2, got {0}'.format(partition_size))
+	elements = list(elements)
+	groups = None if partitions is None else [list(group) for group in partitions if len(group)]
+	n_elements = len(elements) if groups is None else sum(len(group) for group in groups)
+	if n_elements < 2:
+		raise ValueError('Join {0} needs at least 2 elements, got {1}'.format(name, n_elements))
+	if groups is None and centers is not None and len(centers) != len(elements):
+		raise ValueError('Join {0}: {1} centers given for {2} elements'.format(name, len(centers), len(elements)))
+	if cur_catia.pending_features:
+		flush_update()
+	if groups is None:
+		if centers is None:
+			# Centers of all elements are measured by one script call
+			centers = measure(elements, 'GetCOG')
+		groups = [[elements[i] for i in group] for group in spatial_partition(centers, partition_size)]
+	level = 0
+	while True:
+		joins = []
+		for i, group in enumerate(groups):
+			if len(group) == 1:
+				joins.append(group[0])
+				continue
+			join_name = name if len(groups) == 1 else '{0}_{1}_{2}'.format(name, level, i)
+			join = join_elements(group, set_connex, **settings)
+			join.Name = join_name
+			append_shape(join, join_name)
+			try:
+				cur_catia.part.UpdateObject(join)
+			except com_error as e:
+				raise JoinError(join_name, level, i, group, e) from e
+			joins.append(join)
+		if len(joins) == 1:
+			return joins[0]
+		# Joins of partitions follow spatial order of partitions: neighbouring ones are joined together
+		parts = -(-len(joins) // partition_size)
+		groups = [joins[len(joins) * k // parts:len(joins) * (k + 1) // parts] for k in range(parts)]
+		level += 1
+
 ## Creates a new angle plane within the current body and appends result to active geometrical set.
 def create_plane_angle(name, reference_plane, reference_line, angle, orientation):
 	plane = cur_catia.shape_factory.AddNewPlaneAngle(reference_plane, reference_line, angle, bool(orientation))
 	plane.ProjectionMode = False
 	plane.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(plane)
-	cur_catia.part.Update()
+	append_shape(plane, name)
+	update_part(plane)
 	return plane
 
 ## Creates a new empty Rotate within the current body and appends result to active geometrical set.
@@ -351,56 +796,127 @@ def create_empty_rotate(name, geometry, line_axis, angle):
 	empty_rotate.Axis = get_reference(line_axis)
 	empty_rotate.AngleValue = angle
 	empty_rotate.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(empty_rotate)
-	cur_catia.part.Update()
+	append_shape(empty_rotate, name)
+	update_part(empty_rotate)
 	return empty_rotate
 
 ## Creates boolean parameter in selected parameter set or root parameter set.
 def create_boolean(name, value=False, param_set=None):
 	if param_set:
-		param_set_ref = cur_catia.parameteres.RootParameterSet.ParameterSets.Item(param_set)
-		boolean = param_set_ref.DirectParameters.CreateBoolean(name, value)
+		boolean = get_parameter_set(param_set).DirectParameters.CreateBoolean(name, value)
 	else:
 		boolean = cur_catia.parameteres.CreateBoolean(name, value)
+	cur_catia.index.add_parameter(name, boolean)
 	return boolean
 
 ## Creates string parameter in selected parameter set or root parameter set.
 def create_string(name, value='', param_set=None):
 	if param_set:
-		param_set_ref = cur_catia.parameteres.RootParameterSet.ParameterSets.Item(param_set)
-		string = param_set_ref.DirectParameters.CreateString('', value)
+		string = get_parameter_set(param_set).DirectParameters.CreateString('', value)
 	else:
 		string = cur_catia.parameteres.CreateString('', value)
 	string.Rename(name)
+	cur_catia.index.add_parameter(name, string)
 	return string
 
 ## Creates real parameter in selected parameter set or root parameter set.
 def create_real(name, value=0.0, param_set=None):
 	if param_set:
-		param_set_ref = cur_catia.parameteres.RootParameterSet.ParameterSets.Item(param_set)
-		real = param_set_ref.DirectParameters.CreateReal('', value)
+		real = get_parameter_set(param_set).DirectParameters.CreateReal('', value)
 	else:
 		real = cur_catia.parameteres.CreateReal('', value)
 	real.Rename(name)
+	cur_catia.index.add_parameter(name, real)
 	return real
 
 ## Creates dimension parameter in selected parameter set or root parameter set.
 def create_dimension(name, dimension_type, value, param_set=None):
 	if param_set:
-		param_set_ref = cur_catia.parameteres.RootParameterSet.ParameterSets.Item(param_set)
-		dimension = param_set_ref.DirectParameters.CreateDimension('', dimension_type, value)
+		dimension = get_parameter_set(param_set).DirectParameters.CreateDimension('', dimension_type, value)
 	else:
 		dimension = cur_catia.parameteres.CreateDimension('', dimension_type, value)
 	dimension.Rename(name)
+	cur_catia.index.add_parameter(name, dimension)
 	dimension.Value = value
 	return dimension
 
+## Creates parameters from dict {name: value} in selected parameter set or root parameter set (resolved once).
+# Type of parameter is chosen by value: bool - boolean, str - string, number - real, (dimension type, value) - dimension.
+# Returns dict {name: parameter}.
+def create_parameters(values, param_set=None):
+	parameters = get_parameter_set(param_set).DirectParameters if param_set else cur_catia.parameteres
+	res = {}
+	for name, value in values.items():
+		if isinstance(value, bool):
+			parameter = parameters.CreateBoolean(name, value)
+		elif isinstance(value, str):
+			parameter = parameters.CreateString('', value)
+			parameter.Rename(name)
+		elif isinstance(value, tuple):
+			dimension_type, value = value
+			parameter = parameters.CreateDimension('', dimension_type, value)
+			parameter.Rename(name)
+			parameter.Value = value
+		else:
+			parameter = parameters.CreateReal('', value)
+			parameter.Rename(name)
+		cur_catia.index.add_parameter(name, parameter)
+		res[name] = parameter
+	return res
+
+## Values of parameters read at once: dict {name: value}, parameters are kept to write values back without lookups.
+class ParameterSnapshot(dict):
+
+	def __init__(self, values=(), parameters=None):
+		super().__init__(values)
+		self.parameters = parameters or {}
+
+	## Returns values of dict which differ from snapshot (or are not in it).
+	def changes(self, values):
+		return {name: value for name, value in values.items() if name not in self or self[name] != value}
+
+## Reads values of all parameters of part (or of parameter set) in one traversal of parameters collection.
+# Names are full names of tree ('Part1\\Set\\Length') or short ones ('Length') if short_names is True
+# (ValueError is raised if short names of parameters collide).
+def read_parameters(param_set=None, short_names=False):
+	parameters = get_parameter_set(param_set).DirectParameters if param_set else cur_catia.parameteres
+	snapshot = ParameterSnapshot()
+	full_names = {}
+	for i in range(1, parameters.Count + 1):
+		parameter = parameters.Item(i)
+		name = parameter.Name
+		cur_catia.index.add_parameter(name, parameter)
+		if short_names:
+			full_name, name = name, name.split('\\')[-1]
+			if name in full_names:
+				raise ValueError('Short name {0} of parameters {1} and {2} collide'.format(name, full_names[name], full_name))
+			full_names[name] = full_name
+		snapshot[name] = parameter.Value
+		snapshot.parameters[name] = parameter
+	return snapshot
+
+## Writes values of parameters from dict {name: value}. With snapshot only changed values are written
+# and snapshot is updated. Part is updated once. Returns written values.
+def write_parameters(values, snapshot=None):
+	changes = snapshot.changes(values) if snapshot is not None else values
+	for name, value in changes.items():
+		parameter = snapshot.parameters.get(name) if snapshot is not None else None
+		if parameter is None:
+			parameter = get_parametre(name)
+		parameter.Value = value
+		if snapshot is not None:
+			snapshot[name] = value
+			snapshot.parameters[name] = parameter
+	if changes:
+		update_part()
+	return changes
+
 ## Creates a new point on a curve from a ratio of distance to an extremity within the current body and appends result to active geometrical set.
 def create_point_on_curve_from_percent(name, line, perc, orientation):
 	point = cur_catia.shape_factory.AddNewPointOnCurveFromPercent(line, perc, orientation)
 	point.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(point)
-	cur_catia.part.Update()
+	append_shape(point, name)
+	update_part(point)
 	return point
 
 ## Creates a new point on a curve extremum appropriated a max coord selected (max x, min x, max y etc.) 
@@ -408,129 +924,100 @@ def create_point_on_curve_from_percent(name, line, perc, orientation):
 def create_point_on_curve_extr(name, line, dir_coord):
 	point_1 = cur_catia.shape_factory.AddNewPointOnCurveFromPercent(line, 1.0, True)
 	point_2 = cur_catia.shape_factory.AddNewPointOnCurveFromPercent(line, 1.0, False)
-	cur_catia.current_hybrid_body.AppendHybridShape(point_1)
-	cur_catia.current_hybrid_body.AppendHybridShape(point_2)
-	cur_catia.part.Update()
-	# getting coordinates
-	point_1_X = create_dimension('point_1_X', 'LENGTH', 0.0)
-	point_2_X = create_dimension('point_2_X', 'LENGTH', 0.0)
-	point_1_Y = create_dimension('point_1_Y', 'LENGTH', 0.0)
-	point_2_Y = create_dimension('point_2_Y', 'LENGTH', 0.0)
-	point_1_Z = create_dimension('point_1_Z', 'LENGTH', 0.0)
-	point_2_Z = create_dimension('point_2_Z', 'LENGTH', 0.0)
-	# formulas . . . 
-	point_1_X_formula = create_formula('point_1_X', '', point_1_X, '{0}\\{1}.coord(1)'.format(cur_catia.current_hybrid_body.Name, point_1.Name))
-	point_2_X_formula = create_formula('point_2_X', '', point_2_X, '{0}\\{1}.coord(1)'.format(cur_catia.current_hybrid_body.Name, point_2.Name))
-	point_1_Y_formula = create_formula('point_1_Y', '', point_1_Y, '{0}\\{1}.coord(2)'.format(cur_catia.current_hybrid_body.Name, point_1.Name))
-	point_2_Y_formula = create_formula('point_2_Y', '', point_2_Y, '{0}\\{1}.coord(2)'.format(cur_catia.current_hybrid_body.Name, point_2.Name))
-	point_1_Z_formula = create_formula('point_1_Z', '', point_1_Z, '{0}\\{1}.coord(3)'.format(cur_catia.current_hybrid_body.Name, point_1.Name))
-	point_2_Z_formula = create_formula('point_2_Z', '', point_2_Z, '{0}\\{1}.coord(3)'.format(cur_catia.current_hybrid_body.Name, point_2.Name))
-	# temporary elements to delete from tree
-	temp_elements = [point_1_X_formula, point_1_Y_formula, point_1_Z_formula, 
-					 point_2_X_formula, point_2_Y_formula, point_2_Z_formula, 
-					 point_1_X        , point_1_Y        , point_1_Z        , 
-					 point_2_X        , point_2_Y        , point_2_Z        ]
+	append_shape(point_1)
+	append_shape(point_2)
+	flush_update()
 	# Selecting poins to delete / return
-	if dir_coord == '+X':
-		if point_1_X.Value > point_2_X.Value:
-			point_to_del = point_2
-			point = point_1
-		else:
-			point_to_del = point_1
-			point = point_2
-	elif dir_coord == '-X':
-		if point_1_X.Value < point_2_X.Value:
-			point_to_del = point_2
-			point = point_1
-		else:
-			point_to_del = point_1
-			point = point_2
-	elif dir_coord == '+Y':
-		if point_1_Y.Value > point_2_Y.Value:
-			point_to_del = point_2
-			point = point_1
-		else:
-			point_to_del = point_1
-			point = point_2
-	elif dir_coord == '-Y':
-		if point_1_Y.Value < point_2_Y.Value:
-			point_to_del = point_2
-			point = point_1
-		else:
-			point_to_del = point_1
-			point = point_2
-	elif dir_coord == '+Z':
-		if point_1_Z.Value > point_2_Z.Value:
-			point_to_del = point_2
-			point = point_1
-		else:
-			point_to_del = point_1
-			point = point_2
-	elif dir_coord == '-Z':
-		if point_1_Z.Value < point_2_Z.Value:
-			point_to_del = point_2
-			point = point_1
-		else:
-			point_to_del = point_1
-			point = point_2
-	point.Name = name
-	sel = cur_catia.app.ActiveDocument.Selection
-	sel.Clear()
-	for element in temp_elements:
-		sel.Add(element)
-	sel.Delete()
-	sel.Clear()
-	cur_catia.shape_factory.DeleteObjectForDatum(point_to_del)
-	cur_catia.part.Update()
+	coords_1, coords_2 = get_points_coords([point_1, point_2]).tolist()
+	if is_farther_along(coords_1, coords_2, dir_coord):
+		point, point_to_del = point_1, point_2
+	else:
+		point, point_to_del = point_2, point_1
+	rename(point, name)
+	index_shape(point, name)
+	delete_feature(point_to_del)
+	update_part(point)
 	return point
 
 
 ## Creates a new circle tangent to 2 curves and passing through one point within the current body and appends result to active geometrical set.
+# Orientations are checked by update failure. Circle lies on the side of point relative to each curve, so orientations
+# are predicted from this side (see predict_bitang_orientations), successful ones are memoized per configuration of inputs;
+# other combinations are tried only if predicted one fails. Attempts are counted in cur_catia.circle_bitang_stats.
 def create_circle_bitang_point(name, line_1, line_2, point, support, orientation_1, orientation_2):
-	try:
-		print(0)
-		circle = cur_catia.shape_factory.AddNewCircleBitangentPoint(line_1, line_2, point, support, orientation_1, orientation_2)
-		cur_catia.current_hybrid_body.AppendHybridShape(circle)
-		cur_catia.part.Update()
-	except:
+	# Orientation is checked by update failure, so postponed features must be built before
+	if cur_catia.pending_features:
+		flush_update()
+	stats, memo = cur_catia.circle_bitang_stats, cur_catia.circle_bitang_orientations
+	inputs = (line_1, line_2, point, support)
+	key = tuple(id(obj) for obj in inputs) + (orientation_1, orientation_2)
+	candidates = [(orientation_1, orientation_2), (-orientation_1, orientation_2), (orientation_1, -orientation_2), (-orientation_1, -orientation_2)]
+	sides = None
+	first = memo[key][1] if key in memo else None
+	if first is not None:
+		memo.move_to_end(key)
+		stats['memo_hits'] += 1
+	else:
+		sides = predict_bitang_sides(line_1, line_2, point, support)
+		if sides is not None:
+			first = tuple(side * convention for side, convention in zip(sides, cur_catia.circle_bitang_convention))
+			stats['predicted'] += 1
+	if first in candidates:
+		candidates.remove(first)
+		candidates.insert(0, first)
+	stats['calls'] += 1
+	for attempt, orientations in enumerate(candidates, 1):
+		circle = cur_catia.shape_factory.AddNewCircleBitangentPoint(line_1, line_2, point, support, *orientations)
+		append_shape(circle, name)
 		try:
-			print(1)
-			cur_catia.shape_factory.DeleteObjectForDatum(circle)
-			circle = cur_catia.shape_factory.AddNewCircleBitangentPoint(line_1, line_2, point, support, -orientation_1, orientation_2)
-			cur_catia.current_hybrid_body.AppendHybridShape(circle)
 			cur_catia.part.Update()
-		except:
-			try:
-				print(2)
-				cur_catia.shape_factory.DeleteObjectForDatum(circle)
-				circle = cur_catia.shape_factory.AddNewCircleBitangentPoint(line_1, line_2, point, support, orientation_1, -orientation_2)
-				cur_catia.current_hybrid_body.AppendHybridShape(circle)
-				cur_catia.part.Update()
-			except:
-				try:
-					print(3)
-					cur_catia.shape_factory.DeleteObjectForDatum(circle)
-					circle = cur_catia.shape_factory.AddNewCircleBitangentPoint(line_1, line_2, point, support, -orientation_1, -orientation_2)
-					cur_catia.current_hybrid_body.AppendHybridShape(circle)
-					cur_catia.part.Update()
-				except com_error as e:
-					raise e
+		except com_error:
+			delete_feature(circle)
+			if attempt == len(candidates):
+				stats['attempts'][attempt] = stats['attempts'].get(attempt, 0) + 1
+				raise
+			continue
+		break
+	stats['attempts'][attempt] = stats['attempts'].get(attempt, 0) + 1
+	memo[key] = (inputs, orientations)
+	memo.move_to_end(key)
+	if len(memo) > cur_catia.circle_bitang_memo_size:
+		memo.popitem(last=False)
+	if sides is not None and all(sides):
+		# Convention of CATIA orientation relative to side of point is learned from successful orientations
+		cur_catia.circle_bitang_convention = tuple(orientation * side for orientation, side in zip(orientations, sides))
 	circle.SetLimitation(1)
 	circle.Name = name
 	return circle
 
+## Returns sides (1 - left, -1 - right, 0 - on curve) of point relative to 2 curves in plane of support or None if
+# they can not be measured. Left side is the side of support normal x curve direction (chord from start to end of curve).
+def predict_bitang_sides(line_1, line_2, point, support):
+	try:
+		point_coords = get_point_coords(point)
+		plane = measure([support], 'GetPlane')[0].tolist()
+		normal = cross_product(plane[3:6], plane[6:9])
+		sides = []
+		for coords in measure([line_1, line_2], 'GetPointsOnCurve').tolist():
+			start, end = coords[0:3], coords[6:9]
+			side = dot_product(cross_product(normal, vector(start, end)), vector(point_proj_on_axis(point_coords, start, end), point_coords))
+			sides.append(1 if side > 0 else -1 if side < 0 else 0)
+	except (com_error, ZeroDivisionError):
+		return None
+	return tuple(sides)
+
 ## Creates a new revolution within the current body and appends result to active geometrical set.
 def create_revol(name, geometry, angle_1, angle_2, line_axis):
 	revol = cur_catia.shape_factory.AddNewRevol(geometry, angle_1, angle_2, line_axis)
 	revol.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(revol)
-	cur_catia.part.Update()
+	append_shape(revol, name)
+	update_part(revol)
 	return revol
 
 ## Creates a formula relation and adds it to the part's collection of relations.
 def create_formula(name, comment, dimension, text_definition):
 	formula = cur_catia.part.Relations.CreateFormula(name, comment, dimension, text_definition)
-	cur_catia.part.Update()
+	update_part(formula)
 	return formula
 
 # Sketching
@@ -539,7 +1026,7 @@ def create_sketch(name, reference_plane, origin, axis_h, axis_v):
 	sketch = cur_catia.current_hybrid_body.HybridSketches.Add(reference_plane)
 	sketch.Name = name
 	sketch.SetAbsoluteAxisData(list(chain(origin, axis_h, axis_v)))
-	cur_catia.part.Update()
+	update_part(sketch)
 	return sketch
 
 ## Open sketch in edit mode.
@@ -551,7 +1038,7 @@ def open_sketch(sketch):
 def sketch_create_point(name, coords):
 	point = cur_catia.factory2D.CreatePoint(*coords)
 	point.Name = name
-	cur_catia.part.Update()
+	update_part(point)
 	return point
 
 ## Creates line in opened sketch through 2 point and its coordinates.
@@ -560,9 +1047,45 @@ def sketch_create_line(name, p1_coords, p2_coords, p1, p2):
 	line.Name = name
 	line.StartPoint = p1
 	line.EndPoint = p2
-	cur_catia.part.Update()
+	update_part(line)
 	return line
 
+## Creates polyline in opened sketch from (N, 2) array of vertices in one editing pass: points, lines between consecutive
+# points (and closing line if closed) and, if con_type is given (e.g. catia_constant_on), constraints of each line with
+# its end points. Elements are named by patterns formatted with their number (None - not named). Part is not updated:
+# sketch is updated once by close_sketch. Returns (points, lines).
+def sketch_create_polyline(coords, point_name='point_{0}', line_name='line_{0}', closed=False, con_type=None):
+	coords = np.asarray(coords, dtype=float).reshape(-1, 2).tolist()
+	factory2D = cur_catia.factory2D
+	points = []
+	for i, point_coords in enumerate(coords):
+		point = factory2D.CreatePoint(*point_coords)
+		if point_name is not None:
+			point.Name = point_name.format(i)
+		points.append(point)
+	ends = [(i, i + 1) for i in range(len(points) - 1)]
+	if closed and len(points) > 2:
+		ends.append((len(points) - 1, 0))
+	lines = []
+	for i, (start, end) in enumerate(ends):
+		line = factory2D.CreateLine(*(coords[start] + coords[end]))
+		if line_name is not None:
+			line.Name = line_name.format(i)
+		line.StartPoint = points[start]
+		line.EndPoint = points[end]
+		lines.append(line)
+	if con_type is not None:
+		constraints = cur_catia.current_sketch.Constraints
+		for line, (start, end) in zip(lines, ends):
+			line_ref = get_reference(line)
+			constraints.AddBiEltCst(con_type, get_reference(points[start]), line_ref)
+			constraints.AddBiEltCst(con_type, get_reference(points[end]), line_ref)
+	return points, lines
+
+## Creates closed profile in opened sketch from (N, 2) array of vertices: closed polyline with vertices constrained on its lines.
+def sketch_create_profile(coords, point_name='point_{0}', line_name='line_{0}', con_type=catia_constant_on):
+	return sketch_create_polyline(coords, point_name, line_name, True, con_type)
+
 ## Creates a new constraint applying to two geometric elements and adds it to the Constraints collection.
 def sketch_create_constraint(name, con_type, geometry_1, geometry_2, val=None, ang_sector=None, mode=0):
 	ref_1 = get_reference(geometry_1)
@@ -579,9 +1102,9 @@ def sketch_create_constraint(name, con_type, geometry_1, geometry_2, val=None, a
 
 ## Creates and returns the projection of an object on the opened sketch.
 def sketch_create_projection(name, geometry):
-	projection = cur_catia.current_sketch.factory2D.CreateProjection(geometry)
+	projection = cur_catia.factory2D.CreateProjection(geometry)
 	projection.Name = name
-	cur_catia.part.Update()
+	update_part(projection)
 	return projection
 
 ## Returns reference to constraint object in sketch by constraint name.
@@ -590,22 +1113,22 @@ def sketch_get_dimention(sketch, constraint_name):
 
 ## Creates and returns the possible intersections of an object with the sketch.
 def sketch_create_intersection(geometry):
-	intersection = cur_catia.current_sketch.factory2D.CreateIntersections(geometry)
-	cur_catia.part.Update()
+	intersection = cur_catia.factory2D.CreateIntersections(geometry)
+	update_part(intersection)
 	return intersection
 
 ## Close sketch.
 def close_sketch():
 	cur_catia.current_sketch.CloseEdition()
-	cur_catia.part.Update()
+	update_part()
 
 ## Creates a new CurvePar within the current body.
 def create_curve_par(name, curve, support, distance, invert_direction, geodesic=False):
 	curve_par = cur_catia.shape_factory.AddNewCurvePar(curve, support, distance, invert_direction, geodesic)
 	curve_par.SmoothingType = 0
 	curve_par.Name = name
-	cur_catia.current_hybrid_body.AppendHybridShape(curve_par)
-	cur_catia.part.Update()
+	append_shape(curve_par, name)
+	update_part(curve_par)
 	return curve_par
 
 ## Creates a new CurvePar by defining offset from curve in support within the current body.
@@ -613,118 +1136,311 @@ def create_curve_par_dir_safe(name, curve, support, distance, dir_coord, geodesi
 	curve_par_1 = cur_catia.shape_factory.AddNewCurvePar(curve, support, distance, True , geodesic)
 	curve_par_2 = cur_catia.shape_factory.AddNewCurvePar(curve, support, distance, False, geodesic)
 	# Creating 2 versions of curve by offset: straightforward direct and inverse
-	cur_catia.current_hybrid_body.AppendHybridShape(curve_par_1)
-	cur_catia.current_hybrid_body.AppendHybridShape(curve_par_2)
-	# Creating midpoints on curves to determine by them which curve satisfies direction needed (dir_coord)
-	mid_point_1 = cur_catia.shape_factory.AddNewPointOnCurveFromPercent(curve_par_1, 0.5, True)
-	mid_point_2 = cur_catia.shape_factory.AddNewPointOnCurveFromPercent(curve_par_2, 0.5, True)
+	append_shape(curve_par_1)
+	append_shape(curve_par_2)
 	# Updating . . . 
-	cur_catia.current_hybrid_body.AppendHybridShape(mid_point_1)
-	cur_catia.current_hybrid_body.AppendHybridShape(mid_point_2)
-	cur_catia.part.Update()
-	cur_catia.part.Update()
-	# getting coordinates
-	mid_point_1_X = create_dimension('mid_point_1_X', 'LENGTH', 0.0)
-	mid_point_2_X = create_dimension('mid_point_2_X', 'LENGTH', 0.0)
-	mid_point_1_Y = create_dimension('mid_point_1_Y', 'LENGTH', 0.0)
-	mid_point_2_Y = create_dimension('mid_point_2_Y', 'LENGTH', 0.0)
-	mid_point_1_Z = create_dimension('mid_point_1_Z', 'LENGTH', 0.0)
-	mid_point_2_Z = create_dimension('mid_point_2_Z', 'LENGTH', 0.0)
-	# formulas . . . 
-	mid_point_1_X_formula = create_formula('mid_point_1_X', '', mid_point_1_X, '{0}\\{1}.coord(1)'.format(cur_catia.current_hybrid_body.Name, mid_point_1.Name))
-	mid_point_2_X_formula = create_formula('mid_point_2_X', '', mid_point_2_X, '{0}\\{1}.coord(1)'.format(cur_catia.current_hybrid_body.Name, mid_point_2.Name))
-	mid_point_1_Y_formula = create_formula('mid_point_1_Y', '', mid_point_1_Y, '{0}\\{1}.coord(2)'.format(cur_catia.current_hybrid_body.Name, mid_point_1.Name))
-	mid_point_2_Y_formula = create_formula('mid_point_2_Y', '', mid_point_2_Y, '{0}\\{1}.coord(2)'.format(cur_catia.current_hybrid_body.Name, mid_point_2.Name))
-	mid_point_1_Z_formula = create_formula('mid_point_1_Z', '', mid_point_1_Z, '{0}\\{1}.coord(3)'.format(cur_catia.current_hybrid_body.Name, mid_point_1.Name))
-	mid_point_2_Z_formula = create_formula('mid_point_2_Z', '', mid_point_2_Z, '{0}\\{1}.coord(3)'.format(cur_catia.current_hybrid_body.Name, mid_point_2.Name))
-	# temporary elements to delete from tree
-	temp_elements = [mid_point_1_X_formula, mid_point_1_Y_formula, mid_point_1_Z_formula, 
-					 mid_point_2_X_formula, mid_point_2_Y_formula, mid_point_2_Z_formula, 
-					 mid_point_1_X        , mid_point_1_Y        , mid_point_1_Z        , 
-					 mid_point_2_X        , mid_point_2_Y        , mid_point_2_Z        ]
-	# Selecting poins to delete / return
-	if dir_coord == '+X':
-		if mid_point_1_X.Value > mid_point_2_X.Value:
-			curve_to_del = curve_par_2
-			curve_par = curve_par_1
-		else:
-			curve_to_del = curve_par_1
-			curve_par = curve_par_2
-	elif dir_coord == '-X':
-		if mid_point_1_X.Value < mid_point_2_X.Value:
-			curve_to_del = curve_par_2
-			curve_par = curve_par_1
-		else:
-			curve_to_del = curve_par_1
-			curve_par = curve_par_2
-	elif dir_coord == '+Y':
-		if mid_point_1_Y.Value > mid_point_2_Y.Value:
-			curve_to_del = curve_par_2
-			curve_par = curve_par_1
-		else:
-			curve_to_del = curve_par_1
-			curve_par = curve_par_2
-	elif dir_coord == '-Y':
-		if mid_point_1_Y.Value < mid_point_2_Y.Value:
-			curve_to_del = curve_par_2
-			curve_par = curve_par_1
-		else:
-			curve_to_del = curve_par_1
-			curve_par = curve_par_2
-	elif dir_coord == '+Z':
-		if mid_point_1_Z.Value > mid_point_2_Z.Value:
-			curve_to_del = curve_par_2
-			curve_par = curve_par_1
-		else:
-			curve_to_del = curve_par_1
-			curve_par = curve_par_2
-	elif dir_coord == '-Z':
-		if mid_point_1_Z.Value < mid_point_2_Z.Value:
-			curve_to_del = curve_par_2
-			curve_par = curve_par_1
-		else:
-			curve_to_del = curve_par_1
-			curve_par = curve_par_2
+	flush_update()
+	# Selecting curve to delete / return by midpoints of curves (measured, no temporary points in tree)
+	middle_1, middle_2 = measure([curve_par_1, curve_par_2], 'GetPointsOnCurve')[:, 3:6].tolist()
+	if is_farther_along(middle_1, middle_2, dir_coord):
+		curve_par, curve_to_del = curve_par_1, curve_par_2
+	else:
+		curve_par, curve_to_del = curve_par_2, curve_par_1
 	# Define properties needed
-	curve_par.Name = name
+	rename(curve_par, name)
+	index_shape(curve_par, name)
 	curve_par.SmoothingType = 0
 	# Deleting temporary elements
-	sel = cur_catia.app.ActiveDocument.Selection
-	sel.Clear()
-	for element in temp_elements:
-		sel.Add(element)
-	sel.Delete()
-	sel.Clear()
-	cur_catia.shape_factory.DeleteObjectForDatum(mid_point_1)
-	cur_catia.shape_factory.DeleteObjectForDatum(mid_point_2)
-	cur_catia.shape_factory.DeleteObjectForDatum(curve_to_del)
+	delete_feature(curve_to_del)
 	# Updating . . . 
-	cur_catia.part.Update()
+	update_part(curve_par)
 	return curve_par
 
 ## Creates a reference from a operator.
-def get_reference(obj):
-	return cur_catia.part.CreateReferenceFromObject(obj)
+# References are cached by object (or by key given) until object is renamed or deleted by helpers of this module.
+def get_reference(obj, key=None):
+	if key is None:
+		key = id(obj)
+	reference = cached_reference(key)
+	if reference is None:
+		reference = cur_catia.part.CreateReferenceFromObject(obj)
+		cur_catia.reference_cache[key] = (obj, reference)
+		cur_catia.reference_keys.setdefault(id(unwrapped(obj)), set()).add(key)
+		if len(cur_catia.reference_cache) > cur_catia.reference_cache_size:
+			evicted_key, (evicted, evicted_reference) = cur_catia.reference_cache.popitem(last=False)
+			keys = cur_catia.reference_keys.get(id(unwrapped(evicted)), set())
+			keys.discard(evicted_key)
+			if not keys:
+				cur_catia.reference_keys.pop(id(unwrapped(evicted)), None)
+	return reference
+
+## Returns cached reference by key or None.
+def cached_reference(key):
+	entry = cur_catia.reference_cache.get(key)
+	if entry is None:
+		return None
+	cur_catia.reference_cache.move_to_end(key)
+	return entry[1]
+
+## Drops cached references of objects. Without arguments the whole cache is cleared.
+def invalidate_reference(*objs):
+	if not objs:
+		cur_catia.reference_cache.clear()
+		cur_catia.reference_keys.clear()
+		return
+	for obj in objs:
+		obj = unwrapped(obj)
+		for key in cur_catia.reference_keys.pop(id(obj), ()):
+			entry = cur_catia.reference_cache.get(key)
+			if entry is not None and unwrapped(entry[0]) is obj:
+				del cur_catia.reference_cache[key]
+
+## Renames feature and drops its cached references.
+def rename(obj, name):
+	obj.Name = name
+	invalidate_reference(obj)
+	cur_catia.index.rename(obj, name)
+
+## Deletes feature from tree.
+def delete_feature(obj):
+	cur_catia.shape_factory.DeleteObjectForDatum(obj)
+	invalidate_reference(obj)
+	cur_catia.index.remove(obj)
+
+## Deletes elements (features, parameters, relations) from tree through selection.
+def delete_elements(*elements):
+	sel = cur_catia.document.Selection
+	sel.Clear()
+	for element in elements:
+		sel.Add(element)
+	sel.Delete()
+	sel.Clear()
+	invalidate_reference(*elements)
+	for element in elements:
+		cur_catia.index.remove(element)
+
+## Returns SPA workbench of active document used for measurements.
+def get_spa_workbench():
+	if cur_catia.spa_workbench is None:
+		cur_catia.spa_workbench = cur_catia.document.GetWorkbench('SPAWorkbench')
+	return cur_catia.spa_workbench
+
+# Measurements are run by CATIA as VBScript (SystemService.Evaluate): coordinates are output array arguments of
+# Measurable methods (GetPoint, GetCOG, GetPointsOnCurve, GetPlane), which are not filled when called through dynamic
+# dispatch (arguments are passed by value). Script loops over objects, so a batch of objects costs one COM call.
+# Describe returns geometry type (Measurable.GeometryName, -1 if object can not be measured) and coordinates
+# (point or start, middle and end points of curve) of each object; ExportBody describes shapes of geometrical set.
+measure_script = """
+Function Measure(part, workbench, objects, method, size)
+	Dim res(), point(2), curve(8), measurable, i, j
+	ReDim res(size * (UBound(objects) + 1) - 1)
+	For i = 0 To UBound(objects)
+		Set measurable = workbench.GetMeasurable(part.CreateReferenceFromObject(objects(i)))
+		Select Case method
+			Case "GetPoint"
+				measurable.GetPoint point
+			Case "GetCOG"
+				measurable.GetCOG point
+			Case "GetPointsOnCurve"
+				measurable.GetPointsOnCurve curve
+			Case "GetPlane"
+				measurable.GetPlane curve
+		End Select
+		For j = 0 To size - 1
+			If size = 3 Then
+				res(i * size + j) = point(j)
+			Else
+				res(i * size + j) = curve(j)
+			End If
+		Next
+	Next
+	Measure = res
+End Function
+
+Function Describe(part, workbench, objects)
+	Dim res(), point(2), curve(8), measurable, kind, i, j
+	ReDim res(10 * (UBound(objects) + 1) - 1)
+	On Error Resume Next
+	For i = 0 To UBound(objects)
+		For j = 1 To 9
+			res(i * 10 + j) = 0
+		Next
+		Err.Clear
+		kind = -1
+		Set measurable = workbench.GetMeasurable(part.CreateReferenceFromObject(objects(i)))
+		kind = measurable.GeometryName
+		If Err.Number <> 0 Then
+			kind = -1
+		ElseIf kind = 10 Then
+			measurable.GetPoint point
+			For j = 0 To 2
+				res(i * 10 + 1 + j) = point(j)
+			Next
+		ElseIf kind >= 7 And kind <= 9 Then
+			measurable.GetPointsOnCurve curve
+			For j = 0 To 8
+				res(i * 10 + 1 + j) = curve(j)
+			Next
+		End If
+		If Err.Number <> 0 Then
+			kind = -1
+		End If
+		res(i * 10) = kind
+	Next
+	Describe = res
+End Function
+
+Function ExportBody(part, workbench, hybridBody)
+	Dim shapes, objects(), names(), i
+	Set shapes = hybridBody.HybridShapes
+	ReDim objects(shapes.Count - 1)
+	ReDim names(shapes.Count - 1)
+	For i = 1 To shapes.Count
+		Set objects(i - 1) = shapes.Item(i)
+		names(i - 1) = objects(i - 1).Name
+	Next
+	ExportBody = Array(names, Describe(part, workbench, objects))
+End Function
+"""
+
+# Constants for catia: script language of SystemService.Evaluate (CATScriptLanguage)
+catia_script_language_vbscript = 0
+
+# Number of values returned by Measurable methods
+measure_sizes = {'GetPoint': 3, 'GetCOG': 3, 'GetPointsOnCurve': 9, 'GetPlane': 9}
+
+## Runs function of measure script in CATIA and returns its result.
+def evaluate_script(function_name, *args):
+	return cur_catia.app.SystemService.Evaluate(measure_script, catia_script_language_vbscript, function_name, list(args))
+
+## Returns values of Measurable method (see measure_sizes) for each of objects: (N, size) array, one COM call.
+def measure(objects, method):
+	objects = list(objects)
+	size = measure_sizes[method]
+	if not objects:
+		return np.zeros((0, size))
+	values = evaluate_script('Measure', cur_catia.part, get_spa_workbench(), objects, method, size)
+	return np.array(values, dtype=float).reshape(len(objects), size)
+
+## Returns coordinates (x, y, z) of updated point: one measure query per point, no temporary objects in tree.
+def get_point_coords(point):
+	return tuple(measure([point], 'GetPoint')[0].tolist())
+
+## Returns coordinates of updated points: (N, 3) array, one measure query for all points.
+def get_points_coords(points):
+	return measure(points, 'GetPoint')
+
+## Returns coordinates of center of gravity of object (e.g. surface).
+def get_center_of_gravity(obj):
+	return tuple(measure([obj], 'GetCOG')[0].tolist())
+
+## Returns coordinates of start, middle and end points of curve.
+def get_curve_points(curve):
+	coords = measure([curve], 'GetPointsOnCurve')[0].tolist()
+	return tuple(coords[0:3]), tuple(coords[3:6]), tuple(coords[6:9])
+
+## Checks if first point lies farther than second one along direction of coordinate axis ('+X', '-X', '+Y', ... '-Z').
+def is_farther_along(coords_1, coords_2, dir_coord):
+	i = 'XYZ'.index(dir_coord[1])
+	if dir_coord[0] == '+':
+		return coords_1[i] > coords_2[i]
+	return coords_1[i] < coords_2[i]
+
+# Constants for catia: measurable geometry type (Measurable.GeometryName)
+catia_measurable_curve = 7
+catia_measurable_circle = 8
+catia_measurable_line = 9
+catia_measurable_point = 10
+
+## Reads coordinates of points and of start, middle and end points of curves among shapes: one script query for
+# all shapes (references are created by script, reference cache is not used), other shapes are skipped.
+# Returns dict of arrays: points (N,3), point_names, curves (M,3,3), curve_names, and statistics: features, skipped,
+# seconds, features_per_second.
+def export_geometry(shapes, names):
+	# Measurements need updated geometry
+	if cur_catia.pending_features:
+		flush_update()
+	start = perf_counter()
+	shapes = list(shapes)
+	values = evaluate_script('Describe', cur_catia.part, get_spa_workbench(), shapes) if shapes else ()
+	return export_result(names, values, start)
+
+## Splits described shapes (names and values of Describe script function) into points and curves.
+def export_result(names, values, start):
+	names = list(names)
+	values = np.array(values, dtype=float).reshape(len(names), 10)
+	kinds = values[:, 0]
+	is_point = kinds == catia_measurable_point
+	is_curve = np.isin(kinds, (catia_measurable_curve, catia_measurable_circle, catia_measurable_line))
+	seconds = perf_counter() - start
+	features = int(is_point.sum() + is_curve.sum())
+	return {'points': values[is_point, 1:4], 'point_names': np.array(names, dtype=str)[is_point],
+			'curves': values[is_curve, 1:10].reshape(-1, 3, 3), 'curve_names': np.array(names, dtype=str)[is_curve],
+			'features': features, 'skipped': len(names) - features, 'seconds': seconds,
+			'features_per_second': features / seconds if seconds else float('inf')}
+
+## Exports points and curves of geometrical set (all its shapes, walked by script in one query) to compressed NPZ
+# file if path is given. Returns exported arrays and statistics (see export_geometry).
+def export_hybrid_body(hybrid_body_name, path=None):
+	if cur_catia.pending_features:
+		flush_update()
+	start = perf_counter()
+	names, values = evaluate_script('ExportBody', cur_catia.part, get_spa_workbench(), get_hybrid_body(hybrid_body_name))
+	res = export_result(names, values, start)
+	if path:
+		np.savez_compressed(path, **{key: res[key] for key in ('points', 'point_names', 'curves', 'curve_names')})
+	return res
 
 ## Returns a reference to item in specified geometrical set. Default - active geomtrical set.
 def get_item(item_name, hybrid_body_name=''):
+	shape = cur_catia.index.shapes.get(hybrid_body_name or cur_catia.current_hybrid_body_name, {}).get(item_name)
+	if shape is not None:
+		return shape
 	if not hybrid_body_name:
-		return cur_catia.current_hybrid_body.HybridShapes.Item(item_name)
+		shape = cur_catia.current_hybrid_body.HybridShapes.Item(item_name)
+		index_shape(shape, item_name)
 	else:
 		hb = get_hybrid_body(hybrid_body_name)
-		return hb.HybridShapes.Item(item_name)
+		shape = hb.HybridShapes.Item(item_name)
+		cur_catia.index.add_shape(hybrid_body_name, item_name, shape)
+	return shape
 
 ## Returns a reference to parameter specified by name.
 def get_parametre_ref(parametre_name):
-	return get_reference(cur_catia.parameteres.Item(parametre_name))
+	key = ('parameter', parametre_name)
+	reference = cached_reference(key)
+	if reference is None:
+		reference = get_reference(get_parametre(parametre_name), key)
+	return reference
 
 ## Returns value of the parameter specified by name.
 def get_parametre_val(parametre_name):
-	return cur_catia.parameteres.Item(parametre_name).Value
+	return get_parametre(parametre_name).Value
+
+## Returns parameter specified by name.
+def get_parametre(parametre_name):
+	parameter = cur_catia.index.parameters.get(parametre_name)
+	if parameter is None:
+		parameter = cur_catia.parameteres.Item(parametre_name)
+		if parametre_name not in cur_catia.index.ambiguous:
+			cur_catia.index.put(cur_catia.index.parameters, parametre_name, parameter)
+	return parameter
+
+## Returns parameters set specified by name.
+def get_parameter_set(param_set_name):
+	param_set = cur_catia.index.param_sets.get(param_set_name)
+	if param_set is None:
+		param_set = cur_catia.parameteres.RootParameterSet.ParameterSets.Item(param_set_name)
+		cur_catia.index.put(cur_catia.index.param_sets, param_set_name, param_set)
+	return param_set
 
 ## Returns reference to AxisSystem specified by its name.
 def get_axis_system(name):
-	return cur_catia.part.AxisSystems.Item(name)
+	axis_system = cur_catia.index.axis_systems.get(name)
+	if axis_system is None:
+		axis_system = cur_catia.part.AxisSystems.Item(name)
+		cur_catia.index.put(cur_catia.index.axis_systems, name, axis_system)
+	return axis_system
 
 ## Returns reference to one of origin plane (xy, yz or zx).
 def get_origin_plane(plane):
@@ -737,7 +1453,11 @@ def get_origin_plane(plane):
 
 ## Returns reference to geometrical set by its name.
 def get_hybrid_body(hybrid_body_name):
-	return cur_catia.hybrid_bodies.Item(hybrid_body_name)
+	hybrid_body = cur_catia.index.hybrid_bodies.get(hybrid_body_name)
+	if hybrid_body is None:
+		hybrid_body = cur_catia.hybrid_bodies.Item(hybrid_body_name)
+		cur_catia.index.add_hybrid_body(hybrid_body_name, hybrid_body)
+	return hybrid_body
 
 ## Check if parameter exists in tree.
 def parametre_exists(parametre_name):
@@ -749,21 +1469,51 @@ def parametre_exists(parametre_name):
 
 ## Set color of geometrical object.
 def set_color(geometry, color, heritance=0):
-	args = rgb_colors[color].copy()
-	args.append(heritance)
-	sel = cur_catia.app.ActiveDocument.Selection
-	sel.Clear()
-	sel.Add(geometry)
-	sel.VisProperties.SetRealColor(*args)
+	apply_styles([(geometry, color)], heritance)
+	update_part()
+
+## Returns (color, visible) of style: color name of rgb_colors, 'hide', 'show' or (color or None, visible or None).
+def style_key(style):
+	if style == 'hide':
+		return (None, False)
+	if style == 'show':
+		return (None, True)
+	if isinstance(style, str):
+		return (style, None)
+	return tuple(style)
+
+## Applies visual properties to many geometry elements: mapping (or pairs) geometry -> style (see style_key).
+# Elements are grouped by identical style: one selection and one VisProperties access per group.
+# Visual properties do not need part update, so part is not updated.
+def apply_styles(styles, heritance=0):
+	groups = {}
+	for geometry, style in (styles.items() if hasattr(styles, 'items') else styles):
+		groups.setdefault(style_key(style), []).append(geometry)
+	for color, visible in groups:
+		if color is not None and color not in rgb_colors:
+			raise KeyError('Unknown color {0}'.format(color))
+	sel = cur_catia.document.Selection
+	for (color, visible), elements in groups.items():
+		sel.Clear()
+		for geometry in elements:
+			sel.Add(geometry)
+		vis_properties = sel.VisProperties
+		if color is not None:
+			vis_properties.SetRealColor(*rgb_colors[color], heritance)
+		if visible is not None:
+			vis_properties.SetShow(0 if visible else 1)
 	sel.Clear()
-	cur_catia.part.Update()
 
 ## Creates parametres set.
 def create_parametere_set(name):
 	param_set = cur_catia.parameteres.CreateSetOfParameters(cur_catia.parameteres.RootParameterSet)
 	param_sets = cur_catia.parameteres.RootParameterSet.ParameterSets
-	param_set_ref = get_reference(param_sets.Item(param_sets.Count))
+	param_set_obj = param_sets.Item(param_sets.Count)
+	param_set_ref = get_reference(param_set_obj)
 	cur_catia.shape_factory.ChangeFeatureName(param_set_ref, name)
+	invalidate_reference(param_set_obj)
+	cur_catia.index.remove(param_set_obj)
+	cur_catia.index.add(cur_catia.index.param_sets, name, param_set_obj)
 	return param_set_ref
 
 
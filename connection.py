@@ -0,0 +1,210 @@
+'''
+CATIA connection manager python module.
+Gives catia sessions an application without cold start of CATIA: attaches to already running CATIA instance
+(running object table) if there is one, else asks local broker process to keep warm instance and attaches to it,
+else launches CATIA as catia.com_application does. Broker is a small process started once: it launches CATIA,
+keeps reference to it between script runs and health-checks it (relaunching if needed) before handing it out.
+Broker is reached through multiprocessing.connection on local address. Its messages are pickled, so connections are
+authenticated by random key of the user kept in user profile (passed to started broker by stdin, never by command line).
+Broker backend is given as 'module:callable', so it can run with fake application as stand-in server
+(fakecatia.launch_application with fakecatia.active_application as attach).
+Scripts close their documents but do not quit warm application.
+Usage:
+	catia.start_catia('part.CATPart', backend=ConnectionManager().application)
+	python connection.py [host:port] [module:backend] < key    (runs broker, key of user profile if stdin is a terminal)
+'''
+
+import os
+import sys
+import time
+import importlib
+import subprocess
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+import catia
+
+try:
+	import pythoncom
+	import win32com.client
+except ImportError:
+	pythoncom = None
+
+default_address = ('127.0.0.1', 17412)
+default_authkey_path = os.path.join(os.path.expanduser('~'), '.catia_broker_key')
+default_backend = 'catia:com_application'
+
+
+## Returns authentication key of broker kept in user profile, random key is generated on first use.
+# Key file is created readable by its owner only.
+def load_authkey(path=default_authkey_path):
+	try:
+		with open(path, 'rb') as f:
+			key = f.read()
+		if key:
+			return key
+	except FileNotFoundError:
+		pass
+	key = os.urandom(32)
+	try:
+		fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+	except FileExistsError:
+		# Created by another script meanwhile
+		time.sleep(0.1)
+		return load_authkey(path)
+	with os.fdopen(fd, 'wb') as f:
+		f.write(key)
+	return key
+
+
+## Returns running CATIA application (dynamic dispatch) or None if there is no running instance.
+def attach_application():
+	if pythoncom is None:
+		return None
+	pythoncom.CoInitialize()
+	try:
+		return win32com.client.GetActiveObject('CATIA.Application')
+	except catia.com_error:
+		return None
+
+## Checks if application responds.
+def health_check(app):
+	try:
+		app.Documents.Count
+		return True
+	except Exception:
+		return False
+
+## Returns callable by its path 'module:attribute'.
+def load_backend(path):
+	module_name, attribute = path.split(':')
+	return getattr(importlib.import_module(module_name), attribute)
+
+
+## Broker keeping warm application between script runs. Requests: 'acquire' (health check, relaunch if needed),
+# 'status', 'shutdown'. Replies are dicts: {'ok', 'launches', 'uptime'}. Clients without key are refused.
+class Broker():
+
+	def __init__(self, address=default_address, authkey=None, backend=default_backend):
+		self.address = address
+		self.authkey = authkey if authkey is not None else load_authkey()
+		self.backend = load_backend(backend) if isinstance(backend, str) else backend
+		self.app = None
+		self.launches = 0
+		self.started = time.time()
+
+	def launch(self):
+		self.app = self.backend()
+		self.launches += 1
+
+	def acquire(self):
+		if self.app is None or not health_check(self.app):
+			self.launch()
+		return self.status()
+
+	def status(self):
+		return {'ok': self.app is not None, 'launches': self.launches, 'uptime': time.time() - self.started}
+
+	def reply(self, request):
+		if request == 'acquire':
+			return self.acquire()
+		if request in ('status', 'shutdown'):
+			return self.status()
+		return {'ok': False, 'error': 'Unknown request {0!r}'.format(request)}
+
+	## Serves requests until shutdown. Clients which drop connection are skipped; application is quit at the end.
+	def serve(self):
+		self.launch()
+		try:
+			with Listener(self.address, authkey=self.authkey) as listener:
+				while True:
+					try:
+						conn = listener.accept()
+					except (AuthenticationError, ConnectionError, EOFError):
+						continue
+					with conn:
+						try:
+							request = conn.recv()
+						except (EOFError, OSError):
+							continue
+						try:
+							conn.send(self.reply(request))
+						except (EOFError, OSError):
+							pass
+					if request == 'shutdown':
+						break
+		finally:
+			if self.app is not None and health_check(self.app):
+				self.app.Quit()
+
+## Sends request to broker and returns its reply or None if broker is not running.
+# Raises AuthenticationError if broker does not accept the key.
+def broker_request(request, address=default_address, authkey=None):
+	try:
+		with Client(address, authkey=authkey if authkey is not None else load_authkey()) as conn:
+			conn.send(request)
+			return conn.recv()
+	except (ConnectionError, OSError, EOFError):
+		return None
+
+## Starts broker in detached process (key is passed by its stdin) and waits until it answers.
+def start_broker(address=default_address, authkey=None, backend=default_backend, timeout=120.0):
+	authkey = authkey if authkey is not None else load_authkey()
+	flags = getattr(subprocess, 'DETACHED_PROCESS', 0) | getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0)
+	process = subprocess.Popen([sys.executable, __file__, '{0}:{1}'.format(*address), backend],
+							   creationflags=flags, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+	process.stdin.write(authkey)
+	process.stdin.close()
+	deadline = time.time() + timeout
+	while time.time() < deadline:
+		if process.poll() is not None:
+			raise RuntimeError('Broker exited with code {0}'.format(process.returncode))
+		status = broker_request('status', address, authkey)
+		if status is not None:
+			return process
+		time.sleep(0.1)
+	process.kill()
+	raise RuntimeError('Broker did not answer in {0} s'.format(timeout))
+
+
+## Backend of catia sessions: running instance, then warm instance of broker (started if needed), then launch.
+# Statistics of last call: source of application ('attached', 'broker', 'launched') and time taken.
+class ConnectionManager():
+
+	def __init__(self, address=default_address, authkey=None, attach=attach_application, launch=None,
+				 broker_backend=default_backend, use_broker=True, start_timeout=120.0):
+		self.address = address
+		self.authkey = authkey if authkey is not None else load_authkey()
+		self.attach = attach
+		self.launch = launch or catia.com_application
+		self.broker_backend = broker_backend
+		self.use_broker = use_broker
+		self.start_timeout = start_timeout
+		self.source = None
+		self.seconds = None
+
+	def application(self):
+		start = time.perf_counter()
+		app = self.attach()
+		self.source = 'attached'
+		if (app is None or not health_check(app)) and self.use_broker:
+			status = broker_request('acquire', self.address, self.authkey)
+			if status is None:
+				start_broker(self.address, self.authkey, self.broker_backend, self.start_timeout)
+				status = broker_request('acquire', self.address, self.authkey)
+			app = self.attach() if status and status['ok'] else None
+			self.source = 'broker'
+		if app is None or not health_check(app):
+			app = self.launch()
+			self.source = 'launched'
+		self.seconds = time.perf_counter() - start
+		return app
+
+	def shutdown_broker(self):
+		return broker_request('shutdown', self.address, self.authkey)
+
+
+if __name__ == '__main__':
+	host, port = sys.argv[1].split(':') if len(sys.argv) > 1 else default_address
+	authkey = None if sys.stdin is None or sys.stdin.isatty() else sys.stdin.buffer.read() or None
+	Broker((host, int(port)), authkey, sys.argv[2] if len(sys.argv) > 2 else default_backend).serve()
@@ -0,0 +1,281 @@
+'''
+CATIA early binding python module.
+Optional replacement of late-bound dynamic dispatch for catia module. Members of every CATIA interface
+(DISPID, invoke kind, argument and return types) are read once from its type information and invoked directly
+by IDispatch.InvokeTypes: no IDispatch name lookups in hot helpers. Member tables are persisted between runs in a JSON
+cache keyed by type library GUID and version, so warm start skips reading of members (type of each object is still read).
+Objects without type information, unknown members and members which can not be invoked with cached types fall back
+to dynamic dispatch.
+Usage: catia.start_catia(path, backend=early_bound_application) or
+       catia.start_catia(path, backend=partial(early_bound_application, cache_path, fakecatia.FakeApplication)).
+'''
+
+import os
+import json
+import types
+import atexit
+
+import catia
+
+try:
+	import pythoncom
+	import win32com.client.dynamic
+except ImportError:
+	pythoncom = None
+
+# Invoke kinds (pythoncom.DISPATCH_*)
+dispatch_method = 1
+dispatch_propertyget = 2
+dispatch_propertyput = 4
+dispatch_propertyputref = 8
+invoke_kinds = {dispatch_method: 'call', dispatch_propertyget: 'get', dispatch_propertyput: 'put', dispatch_propertyputref: 'putref'}
+
+# Variant types (pythoncom.VT_*) and type kinds (pythoncom.TKIND_*) used to resolve types of members
+vt_i4 = 3
+vt_dispatch = 9
+vt_unknown = 13
+vt_ptr = 26
+vt_safearray = 27
+vt_carray = 28
+vt_userdefined = 29
+vt_record = 36
+vt_array = 0x2000
+vt_byref = 0x4000
+tkind_enum, tkind_record, tkind_module, tkind_interface, tkind_dispatch, tkind_coclass, tkind_alias = range(7)
+typeflag_dual = 0x40
+
+# Errors of InvokeTypes meaning that member can not be invoked with cached DISPID and types (DISP_E_MEMBERNOTFOUND,
+# DISP_E_TYPEMISMATCH, DISP_E_BADVARTYPE, DISP_E_BADPARAMCOUNT, DISP_E_PARAMNOTOPTIONAL): call is made by dynamic dispatch
+invoke_errors = {-2147352573, -2147352571, -2147352568, -2147352562, -2147352561}
+
+cache_version = 2
+
+default_cache_path = os.path.join(os.path.expanduser('~'), '.catia_dispatch_cache.json')
+
+
+## Persistent cache of CATIA interfaces members: {type name: {'library': type library GUID and version,
+# 'members': {member: {'id': DISPID, kind: [return type, argument types]}}}}. Type library of each cached type is
+# checked once per session, so tables of previous version of CATIA are read again.
+class DispatchCache():
+
+	def __init__(self, path=None):
+		self.path = path
+		self.types = {}
+		self.checked = set()
+		self.dirty = False
+		# Statistics: type information reads and dynamic dispatch fall-backs
+		self.type_reads = 0
+		self.fallbacks = 0
+
+	@classmethod
+	def load(cls, path=None):
+		cache = cls(path)
+		if path and os.path.exists(path):
+			try:
+				with open(path) as f:
+					data = json.load(f)
+				if data.get('version') == cache_version:
+					cache.types = data['types']
+			except (ValueError, KeyError):
+				pass
+		return cache
+
+	def save(self):
+		if self.path and self.dirty:
+			with open(self.path, 'w') as f:
+				json.dump({'version': cache_version, 'types': self.types}, f)
+			self.dirty = False
+
+	## Returns name and members table of object type, reading its type information if type is not cached
+	# or was cached for another version of its type library. Type is read from object each time: property may
+	# return objects of different types (e.g. ActiveDocument).
+	def members(self, oleobj):
+		type_info = oleobj.GetTypeInfo()
+		type_name = type_info.GetDocumentation(-1)[0]
+		if type_name not in self.checked:
+			library = library_key(type_info)
+			if self.types.get(type_name, {}).get('library') != library:
+				self.types[type_name] = {'library': library, 'members': read_members(type_info)}
+				self.type_reads += 1
+				self.dirty = True
+			self.checked.add(type_name)
+		return type_name, self.types[type_name]['members']
+
+## Returns GUID and version of type library containing type.
+def library_key(type_info):
+	library_attr = type_info.GetContainingTypeLib()[0].GetLibAttr()
+	return '{0} {1}.{2}'.format(library_attr[0], library_attr[3], library_attr[4])
+
+## Reads members table from type information (ITypeInfo). Members with types which can not be resolved are left
+# to dynamic dispatch.
+def read_members(type_info):
+	table = {}
+	for i in range(type_info.GetTypeAttr().cFuncs):
+		func_desc = type_info.GetFuncDesc(i)
+		name = type_info.GetNames(func_desc.memid)[0]
+		kind = invoke_kinds.get(func_desc.invkind)
+		if not kind:
+			continue
+		try:
+			types = [[resolve_type(func_desc.rettype[0], type_info), func_desc.rettype[1]],
+					 [[resolve_type(arg[0], type_info), arg[1]] for arg in func_desc.args]]
+		except ValueError:
+			continue
+		member = table.setdefault(name, {'id': func_desc.memid})
+		member[kind] = types
+	return table
+
+## Resolves type description of member (nested for pointers, arrays and user defined types) to variant type
+# accepted by InvokeTypes, as win32com.client.build._ResolveType does (dual interfaces are resolved to VT_DISPATCH).
+def resolve_type(typedesc, type_info):
+	if not isinstance(typedesc, (tuple, list)):
+		return typedesc
+	indirection, sub_typedesc = typedesc
+	if indirection == vt_ptr:
+		user_defined = isinstance(sub_typedesc, (tuple, list)) and sub_typedesc[0] == vt_userdefined
+		resolved = resolve_type(sub_typedesc, type_info)
+		if user_defined and resolved in (vt_dispatch, vt_unknown, vt_record):
+			return resolved
+		return resolved | vt_byref
+	if indirection == vt_safearray:
+		return vt_array | resolve_type(sub_typedesc, type_info)
+	if indirection == vt_carray:
+		return vt_carray
+	if indirection == vt_userdefined:
+		try:
+			ref_type_info = type_info.GetRefTypeInfo(sub_typedesc)
+		except catia.com_error:
+			return vt_unknown
+		type_attr = ref_type_info.GetTypeAttr()
+		if type_attr.typekind == tkind_alias:
+			return resolve_type(type_attr.tdescAlias, ref_type_info)
+		if type_attr.typekind in (tkind_enum, tkind_module):
+			return vt_i4
+		if type_attr.typekind == tkind_dispatch:
+			return vt_dispatch
+		if type_attr.typekind in (tkind_interface, tkind_coclass):
+			return vt_dispatch if type_attr.wTypeFlags & typeflag_dual else vt_unknown
+		if type_attr.typekind == tkind_record:
+			return vt_record
+	raise ValueError('Type {0!r} can not be resolved'.format(typedesc))
+
+## Checks if error of InvokeTypes means that call should be made by dynamic dispatch.
+def is_invoke_error(e):
+	if isinstance(e, TypeError):
+		return True
+	return isinstance(e, catia.com_error) and bool(e.args) and e.args[0] in invoke_errors
+
+## Checks if value returned by COM call is a dispatch interface.
+def is_dispatch(value):
+	if pythoncom is not None and isinstance(value, pythoncom.TypeIIDs[pythoncom.IID_IDispatch]):
+		return True
+	return hasattr(value, '_oleobj_')
+
+
+## Early-bound wrapper of COM-object. Members are invoked by cached DISPID and types, unknown ones (and members
+# which can not be invoked with cached types) by dynamic dispatch.
+class EarlyBound():
+
+	def __init__(self, oleobj, cache, dynamic=None):
+		type_name, members = cache.members(oleobj)
+		object.__setattr__(self, '_oleobj_', oleobj)
+		object.__setattr__(self, '_cache', cache)
+		object.__setattr__(self, '_dynamic', dynamic)
+		object.__setattr__(self, '_type_name', type_name)
+		object.__setattr__(self, '_members', members)
+
+	def _dynamic_object(self):
+		if self._dynamic is None:
+			object.__setattr__(self, '_dynamic', win32com.client.dynamic.Dispatch(self._oleobj_))
+		self._cache.fallbacks += 1
+		return self._dynamic
+
+	def _invoke(self, member, kind, args):
+		return_type, arg_types = member[kind]
+		flags = {'call': dispatch_method, 'get': dispatch_propertyget, 'put': dispatch_propertyput, 'putref': dispatch_propertyputref}[kind]
+		return self._oleobj_.InvokeTypes(member['id'], 0, flags, tuple(return_type),
+										 tuple(tuple(arg_type) for arg_type in arg_types[:len(args)]), *[unwrap(arg) for arg in args])
+
+	def _wrap(self, value):
+		if not is_dispatch(value):
+			return value
+		dynamic = value if hasattr(value, '_oleobj_') else None
+		oleobj = value._oleobj_ if dynamic is not None else value
+		try:
+			return EarlyBound(oleobj, self._cache, dynamic)
+		except Exception:
+			# No type information: object is used through dynamic dispatch
+			self._cache.fallbacks += 1
+			return dynamic if dynamic is not None else win32com.client.dynamic.Dispatch(oleobj)
+
+	def _call(self, name, member, args):
+		try:
+			return self._wrap(self._invoke(member, 'call', args))
+		except Exception as e:
+			if not is_invoke_error(e):
+				raise
+		return self._wrap(getattr(self._dynamic_object(), name)(*[unwrap(arg) for arg in args]))
+
+	def __getattr__(self, name):
+		member = self._members.get(name)
+		if member is None or not ('call' in member or 'get' in member):
+			value = getattr(self._dynamic_object(), name)
+			if isinstance(value, (types.MethodType, types.FunctionType)):
+				return (lambda *args: self._wrap(value(*[unwrap(arg) for arg in args])))
+			return self._wrap(value)
+		if 'call' in member:
+			return (lambda *args: self._call(name, member, args))
+		try:
+			return self._wrap(self._invoke(member, 'get', ()))
+		except Exception as e:
+			if not is_invoke_error(e):
+				raise
+		return self._wrap(getattr(self._dynamic_object(), name))
+
+	def __setattr__(self, name, value):
+		member = self._members.get(name)
+		if member is not None and ('put' in member or 'putref' in member):
+			kind = 'putref' if 'putref' in member and (is_dispatch(value) or 'put' not in member) else 'put'
+			try:
+				self._invoke(member, kind, (value,))
+				return
+			except Exception as e:
+				if not is_invoke_error(e):
+					raise
+		setattr(self._dynamic_object(), name, unwrap(value))
+
+	def __eq__(self, other):
+		return self._oleobj_ == unwrap(other)
+
+	def __hash__(self):
+		return hash(self._oleobj_)
+
+	def __repr__(self):
+		return '<EarlyBound {0}>'.format(self._type_name)
+
+## Returns object to pass in COM call: interface of early-bound wrapper, items of lists and tuples are unwrapped too.
+def unwrap(value):
+	if isinstance(value, EarlyBound):
+		return value._oleobj_
+	if isinstance(value, (list, tuple)):
+		return type(value)(unwrap(item) for item in value)
+	return value
+
+
+## Backend of catia.CATIA: application wrapped by early-bound wrapper with cache loaded from file (saved at exit).
+# Falls back to application given by backend (dynamic dispatch by default) if it has no type information.
+def early_bound_application(cache_path=default_cache_path, backend=None):
+	app = (backend or catia.com_application)()
+	cache = DispatchCache.load(cache_path)
+	try:
+		wrapped = EarlyBound(app._oleobj_, cache, app)
+	except Exception:
+		return app
+	atexit.register(cache.save)
+	return wrapped
+
+## Returns cache of early-bound application (None for dynamic dispatch).
+def dispatch_cache(app):
+	if isinstance(app, EarlyBound):
+		return app._cache
+	return None
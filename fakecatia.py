@@ -0,0 +1,787 @@
+'''
+Fake CATIA python module.
+Pure python stand-in for CATIA COM-objects (Application, Document, Part, HybridShapeFactory, Parameters, Selection ...)
+used to run and measure catia module scripts without CATIA and Windows.
+Every COM method call and property access is recorded in CallLog, a latency can be simulated for each of them.
+'''
+
+import re
+import time
+import zlib
+import inspect
+from itertools import count
+
+try:
+	from pywintypes import com_error
+except ImportError:
+	## Replacement of pywintypes.com_error outside of Windows.
+	class com_error(Exception):
+		pass
+
+
+## Log of COM calls shared by all fake objects of one application.
+class CallLog():
+
+	def __init__(self, latency=0.0, update_latency=None, sleep=False):
+		self.latency = latency
+		self.update_latency = latency if update_latency is None else update_latency
+		self.sleep = sleep
+		self.reset()
+
+	def reset(self):
+		# (object type, member name, access kind: 'call', 'get' or 'put')
+		self.calls = []
+		self.simulated_time = 0.0
+
+	def record(self, type_name, member, kind):
+		self.calls.append((type_name, member, kind))
+		delay = self.update_latency if member in ('Update', 'UpdateObject') else self.latency
+		self.simulated_time += delay
+		if self.sleep and delay:
+			time.sleep(delay)
+
+	def count(self, member=None):
+		if member is None:
+			return len(self.calls)
+		return sum(1 for call in self.calls if call[1] == member)
+
+	@property
+	def updates(self):
+		return self.count('Update')
+
+	def summary(self):
+		res = {}
+		for type_name, member, kind in self.calls:
+			key = '{0}.{1}'.format(type_name, member)
+			res[key] = res.get(key, 0) + 1
+		return res
+
+
+## Base class of fake COM-objects. Members named with capital letter are recorded as COM calls / property accesses.
+class FakeObject():
+
+	def __init__(self, log):
+		object.__setattr__(self, 'log', log)
+
+	def __getattribute__(self, name):
+		if not name[:1].isupper():
+			return object.__getattribute__(self, name)
+		try:
+			value = object.__getattribute__(self, name)
+		except AttributeError:
+			value = object.__getattribute__(self, 'dynamic_member')(name)
+		log = object.__getattribute__(self, 'log')
+		type_name = type(self).__name__
+		if callable(value) and not isinstance(value, FakeObject):
+			def method(*args):
+				log.record(type_name, name, 'call')
+				return value(*[from_dispatch(arg) for arg in args])
+			return method
+		log.record(type_name, name, 'get')
+		return value
+
+	def __setattr__(self, name, value):
+		if name[:1].isupper():
+			self.log.record(type(self).__name__, name, 'put')
+		object.__setattr__(self, name, from_dispatch(value))
+
+	def dynamic_member(self, name):
+		raise AttributeError(name)
+
+	def set(self, **properties):
+		for name, value in properties.items():
+			object.__setattr__(self, name, value)
+
+	def prop(self, name, default=None):
+		return vars(self).get(name, default)
+
+	@property
+	def _oleobj_(self):
+		return FakeDispatch(self)
+
+
+## Emulation of IDispatch interface of fake object (used by early binding).
+class FakeDispatch():
+
+	def __init__(self, obj):
+		self.obj = obj
+
+	def __eq__(self, other):
+		return isinstance(other, FakeDispatch) and other.obj is self.obj
+
+	def __hash__(self):
+		return id(self.obj)
+
+	def GetTypeInfo(self):
+		self.obj.log.record(type(self.obj).__name__, 'GetTypeInfo', 'call')
+		return FakeTypeInfo(self.obj)
+
+	## As pywin32, takes only resolved variant types: (VT_*, flags) for result and each argument.
+	def InvokeTypes(self, dispid, lcid, flags, return_type, arg_types, *args):
+		for type_desc in (return_type,) + tuple(arg_types):
+			if not all(isinstance(item, int) for item in type_desc):
+				raise TypeError('The VARIANT type is unknown ({0!r})'.format(type_desc))
+		name = FakeTypeInfo(self.obj).names.get(dispid)
+		if name is None:
+			raise com_error(-2147352573, 'Member not found', None, None)
+		if flags & 1:
+			return getattr(self.obj, name)(*args)
+		if flags & 2:
+			return getattr(self.obj, name)
+		setattr(self.obj, name, args[0])
+
+
+## Returns fake object passed to COM call through its IDispatch interface.
+def from_dispatch(value):
+	if isinstance(value, FakeDispatch):
+		return value.obj
+	if isinstance(value, (list, tuple)):
+		return type(value)(from_dispatch(item) for item in value)
+	return value
+
+
+# GUID and version (major, minor) of fake type library
+type_library = ('{5A1E0C7A-0000-4000-8000-00000000CA7A}', 1, 0)
+
+
+## Emulation of type information of fake object: its methods and properties (class ones and set on object) with stable DISPIDs.
+# Properties holding objects are typed as real interface-typed members: pointer to user defined type (dual interface).
+class FakeTypeInfo():
+
+	variant = (12, 0, None)
+	interface = ((26, (29, 1)), 0, None)
+
+	def __init__(self, obj):
+		self.obj = obj
+		self.funcs = []
+		self.names = {}
+		members = {name: getattr(type(obj), name) for name in dir(type(obj)) if name[:1].isupper()}
+		members.update({name: vars(obj)[name] for name in vars(obj) if name[:1].isupper()})
+		for name, member in sorted(members.items()):
+			memid = zlib.crc32(name.encode()) & 0x7fffffff
+			self.names[memid] = name
+			if inspect.isfunction(member):
+				params = [p for p in inspect.signature(member).parameters.values() if p.kind == p.POSITIONAL_OR_KEYWORD][1:]
+				self.funcs.append(FakeFuncDesc(memid, 1, self.variant, [self.variant] * len(params)))
+			elif isinstance(member, FakeObject):
+				self.funcs.append(FakeFuncDesc(memid, 2, self.interface, []))
+			else:
+				self.funcs.append(FakeFuncDesc(memid, 2, self.variant, []))
+				if not isinstance(member, property):
+					self.funcs.append(FakeFuncDesc(memid, 4, (24, 0, None), [self.variant]))
+
+	def record(self, member):
+		self.obj.log.record('ITypeInfo', member, 'call')
+
+	def GetDocumentation(self, memid):
+		self.record('GetDocumentation')
+		return (type(self.obj).__name__, '', 0, '')
+
+	def GetTypeAttr(self):
+		self.record('GetTypeAttr')
+		return FakeTypeAttr(len(self.funcs), 4)
+
+	def GetFuncDesc(self, i):
+		self.record('GetFuncDesc')
+		return self.funcs[i]
+
+	def GetNames(self, memid):
+		self.record('GetNames')
+		return (self.names[memid],)
+
+	def GetRefTypeInfo(self, href):
+		self.record('GetRefTypeInfo')
+		return FakeInterfaceTypeInfo()
+
+	def GetContainingTypeLib(self):
+		self.record('GetContainingTypeLib')
+		return (FakeTypeLib(), 0)
+
+
+## Type information of interface referenced by interface-typed member (dual interface).
+class FakeInterfaceTypeInfo():
+
+	def GetTypeAttr(self):
+		return FakeTypeAttr(0, 3, 0x40)
+
+
+class FakeTypeLib():
+
+	## TLIBATTR: GUID, LCID, SYSKIND, major version, minor version, flags
+	def GetLibAttr(self):
+		guid, major, minor = type_library
+		return (guid, 0, 1, major, minor, 0)
+
+
+class FakeTypeAttr():
+
+	def __init__(self, funcs, typekind, type_flags=0):
+		self.cFuncs = funcs
+		self.typekind = typekind
+		self.wTypeFlags = type_flags
+
+
+class FakeFuncDesc():
+
+	def __init__(self, memid, invkind, rettype, args):
+		self.memid = memid
+		self.invkind = invkind
+		self.rettype = rettype
+		self.args = args
+
+
+## Ordered named collection (HybridBodies, HybridShapes, ParameterSets, AxisSystems ...). Items are indexed from 1 or by name.
+class FakeCollection(FakeObject):
+
+	def __init__(self, log, items=None):
+		super().__init__(log)
+		self.set(items=items if items is not None else [])
+
+	@property
+	def Count(self):
+		return len(self.items)
+
+	def Item(self, key):
+		if isinstance(key, int):
+			if 1 <= key <= len(self.items):
+				return self.items[key - 1]
+		else:
+			for item in self.items:
+				if item.prop('Name') == key:
+					return item
+		raise com_error('Item {0} not found'.format(key))
+
+	def append(self, item):
+		self.items.append(item)
+		return item
+
+	def remove(self, item):
+		if item in self.items:
+			self.items.remove(item)
+			return True
+		return False
+
+
+## Geometrical element: hybrid shape, direction, sketch element, axis system, origin plane ...
+class FakeShape(FakeObject):
+
+	counter = count(1)
+
+	def __init__(self, log, kind, args=()):
+		super().__init__(log)
+		self.set(kind=kind, args=args, broken=False, Name='{0}.{1}'.format(kind, next(FakeShape.counter)))
+
+	def dynamic_member(self, name):
+		# Setters and modifiers of feature definition (SetConnex, AddElement, PutXAxis ...)
+		if name.startswith(('Set', 'Add', 'Put')):
+			return (lambda *args: None)
+		raise AttributeError(name)
+
+	def coords(self):
+		if self.kind == 'PointCoord':
+			return tuple(float(c) for c in self.args[:3])
+		if self.kind == 'PointOnCurveFromPercent':
+			ends = self.args[0].ends()
+			if ends:
+				(p1, p2), perc = ends, self.args[1]
+				if not self.args[2]:
+					perc = 1.0 - perc
+				return tuple(c1 + (c2 - c1) * perc for c1, c2 in zip(p1, p2))
+		if self.kind == 'PointDatum':
+			return self.args[0].coords()
+		return (0.0, 0.0, 0.0)
+
+	## Normal of plane (origin planes; other planes are simulated parallel to XY).
+	def normal(self):
+		return {'PlaneYZ': (1.0, 0.0, 0.0), 'PlaneZX': (0.0, 1.0, 0.0)}.get(self.kind, (0.0, 0.0, 1.0))
+
+	## Side of point relative to curve on support: 1 on the left of curve direction (normal x direction), -1 on the right.
+	def side(self, point, support):
+		ends = self.ends()
+		if not ends:
+			return 0
+		(x1, y1, z1), (x2, y2, z2) = ends
+		nx, ny, nz = support.normal()
+		tx, ty, tz = x2 - x1, y2 - y1, z2 - z1
+		px, py, pz = (c - c1 for c, c1 in zip(point.coords(), (x1, y1, z1)))
+		d = (ny*tz - nz*ty) * px + (nz*tx - nx*tz) * py + (nx*ty - ny*tx) * pz
+		return 1 if d > 0 else -1 if d < 0 else 0
+
+	def ends(self):
+		if self.kind in ('LinePtPt', 'LinePtPtOnSupport'):
+			return self.args[0].coords(), self.args[1].coords()
+		if self.kind == 'CurvePar':
+			ends = self.args[0].ends()
+			if ends:
+				# Offset is simulated along Z, its sign is defined by invert direction flag
+				shift = -self.args[2] if self.args[3] else self.args[2]
+				return tuple((x, y, z + shift) for x, y, z in ends)
+		return None
+
+
+## Reference created from object by Part.CreateReferenceFromObject.
+class FakeReference(FakeObject):
+
+	def __init__(self, log, target):
+		super().__init__(log)
+		self.set(target=target, DisplayName=target.prop('Name'))
+
+	def coords(self):
+		return self.target.coords()
+
+	def ends(self):
+		return self.target.ends()
+
+	def normal(self):
+		return self.target.normal()
+
+
+class FakeHybridShapeFactory(FakeObject):
+
+	def __init__(self, log, part):
+		super().__init__(log)
+		self.set(part=part)
+
+	def dynamic_member(self, name):
+		if name.startswith('AddNew'):
+			kind = name[len('AddNew'):]
+			return (lambda *args: FakeShape(self.log, kind, args))
+		raise AttributeError(name)
+
+	## Circle lies on the side of point relative to each curve: update fails if orientation is not this side.
+	# Assumed rule, the same as catia.predict_bitang_sides: fake results do not validate the prediction against CATIA.
+	def AddNewCircleBitangentPoint(self, curve_1, curve_2, point, support, orientation_1, orientation_2):
+		circle = FakeShape(self.log, 'CircleBitangentPoint', (curve_1, curve_2, point, support, orientation_1, orientation_2))
+		sides = [curve.side(point, support) for curve in (curve_1, curve_2)]
+		circle.set(broken=any(side and side != orientation for side, orientation in zip(sides, (orientation_1, orientation_2))))
+		return circle
+
+	def DeleteObjectForDatum(self, obj):
+		if not self.part.remove(obj):
+			raise com_error('Object to delete not found')
+
+	def ChangeFeatureName(self, reference, name):
+		reference.target.set(Name=name)
+
+
+class FakeHybridBody(FakeObject):
+
+	def __init__(self, log, name):
+		super().__init__(log)
+		self.set(Name=name, HybridShapes=FakeCollection(log), HybridSketches=FakeSketches(log, self))
+
+	def AppendHybridShape(self, shape):
+		self.prop('HybridShapes').append(shape)
+
+
+class FakeHybridBodies(FakeCollection):
+
+	def Add(self):
+		return self.append(FakeHybridBody(self.log, 'Geometrical Set.{0}'.format(len(self.items) + 1)))
+
+
+class FakeSketches(FakeCollection):
+
+	def __init__(self, log, hybrid_body):
+		super().__init__(log)
+		self.set(hybrid_body=hybrid_body)
+
+	def Add(self, reference_plane):
+		return self.append(FakeSketch(self.log, 'Sketch.{0}'.format(len(self.items) + 1)))
+
+
+class FakeSketch(FakeObject):
+
+	def __init__(self, log, name):
+		super().__init__(log)
+		self.set(Name=name, Constraints=FakeConstraints(log), factory=FakeFactory2D(log))
+
+	def SetAbsoluteAxisData(self, data):
+		pass
+
+	def OpenEdition(self):
+		return self.factory
+
+	def CloseEdition(self):
+		pass
+
+
+class FakeFactory2D(FakeObject):
+
+	def CreatePoint(self, *coords):
+		return FakeShape(self.log, 'Point2D', coords)
+
+	def CreateLine(self, *coords):
+		return FakeShape(self.log, 'Line2D', coords)
+
+	def CreateProjection(self, geometry):
+		return FakeShape(self.log, 'Projection', (geometry,))
+
+	def CreateIntersections(self, geometry):
+		return FakeShape(self.log, 'Intersection2D', (geometry,))
+
+
+class FakeConstraints(FakeCollection):
+
+	def AddBiEltCst(self, con_type, reference_1, reference_2):
+		constraint = FakeShape(self.log, 'Constraint', (con_type, reference_1, reference_2))
+		constraint.set(Dimension=FakeParameter(self.log, 'Dimension', 0.0))
+		return self.append(constraint)
+
+
+class FakeParameter(FakeObject):
+
+	def __init__(self, log, name, value):
+		super().__init__(log)
+		self.set(Name=name, Value=value)
+
+	def Rename(self, name):
+		self.set(Name=name)
+
+
+## Parameters of part (Part.Parameters) or direct parameters of parameters set (ParameterSet.DirectParameters).
+class FakeParameters(FakeCollection):
+
+	def __init__(self, log, part, root=False):
+		super().__init__(log)
+		self.set(part=part)
+		if root:
+			self.set(RootParameterSet=FakeParameterSet(log, part, 'Parameters'))
+
+	def create(self, name, value):
+		parameter = FakeParameter(self.log, name, value)
+		self.append(parameter)
+		if self is not self.part.prop('Parameters'):
+			self.part.prop('Parameters').append(parameter)
+		return parameter
+
+	def CreateReal(self, name, value):
+		return self.create(name, float(value))
+
+	def CreateString(self, name, value):
+		return self.create(name, value)
+
+	def CreateBoolean(self, name, value):
+		return self.create(name, bool(value))
+
+	def CreateDimension(self, name, dimension_type, value):
+		return self.create(name, float(value))
+
+	def CreateSetOfParameters(self, parent):
+		param_sets = parent.prop('ParameterSets')
+		return param_sets.append(FakeParameterSet(self.log, self.part, 'Parameters.{0}'.format(len(param_sets.items) + 1)))
+
+
+class FakeParameterSet(FakeObject):
+
+	def __init__(self, log, part, name):
+		super().__init__(log)
+		self.set(Name=name, ParameterSets=FakeCollection(log), DirectParameters=FakeParameters(log, part))
+
+
+class FakeRelations(FakeCollection):
+
+	def __init__(self, log, part):
+		super().__init__(log)
+		self.set(part=part)
+
+	def CreateFormula(self, name, comment, dimension, text_definition):
+		formula = self.append(FakeShape(self.log, 'Formula', (dimension, text_definition)))
+		formula.set(Name=name)
+		self.part.evaluate(formula)
+		return formula
+
+
+## Visual properties of selection: applied to selected objects (show, color attributes).
+class FakeVisProperties(FakeObject):
+
+	def __init__(self, log, selection):
+		super().__init__(log)
+		self.set(selection=selection)
+
+	def SetShow(self, show):
+		for obj in self.selection.selected:
+			obj.set(show=show)
+
+	def SetRealColor(self, red, green, blue, heritance):
+		for obj in self.selection.selected:
+			obj.set(color=(red, green, blue))
+
+
+class FakeSelection(FakeObject):
+
+	def __init__(self, log, document):
+		super().__init__(log)
+		self.set(document=document, selected=[])
+		self.set(VisProperties=FakeVisProperties(log, self))
+
+	@property
+	def Count(self):
+		return len(self.selected)
+
+	def Clear(self):
+		self.selected.clear()
+
+	def Add(self, obj):
+		self.selected.append(obj)
+
+	def Delete(self):
+		for obj in self.selected:
+			self.document.prop('Part').remove(obj)
+		self.selected.clear()
+
+
+class FakeOriginElements(FakeObject):
+
+	def __init__(self, log):
+		super().__init__(log)
+		self.set(PlaneXY=FakeShape(log, 'PlaneXY'), PlaneYZ=FakeShape(log, 'PlaneYZ'), PlaneZX=FakeShape(log, 'PlaneZX'))
+
+
+class FakeAxisSystems(FakeCollection):
+
+	def Add(self):
+		return self.append(FakeShape(self.log, 'AxisSystem'))
+
+
+class FakePart(FakeObject):
+
+	def __init__(self, log, name):
+		super().__init__(log)
+		self.set(Name=name, HybridBodies=FakeHybridBodies(log), AxisSystems=FakeAxisSystems(log),
+				 OriginElements=FakeOriginElements(log), HybridShapeFactory=FakeHybridShapeFactory(log, self))
+		self.set(Parameters=FakeParameters(log, self, root=True), Relations=FakeRelations(log, self))
+		# Part was updated since document was opened or saved
+		self.set(modified=False)
+
+	def shapes(self):
+		for hybrid_body in self.prop('HybridBodies').items:
+			for shape in hybrid_body.prop('HybridShapes').items:
+				yield hybrid_body, shape
+
+	def remove(self, obj):
+		removed = False
+		for hybrid_body in self.prop('HybridBodies').items:
+			removed |= hybrid_body.prop('HybridShapes').remove(obj)
+			removed |= hybrid_body.prop('HybridSketches').remove(obj)
+		removed |= self.prop('HybridBodies').remove(obj)
+		removed |= self.prop('AxisSystems').remove(obj)
+		removed |= self.prop('Parameters').remove(obj)
+		root = self.prop('Parameters').prop('RootParameterSet')
+		for param_set in root.prop('ParameterSets').items:
+			removed |= param_set.prop('DirectParameters').remove(obj)
+		removed |= self.prop('Relations').remove(obj)
+		return removed
+
+	def evaluate(self, formula):
+		# Only formulas reading point coordinates 'Set\Point.coord(i)' are evaluated
+		dimension, text_definition = formula.args
+		match = re.match(r'(.+)\\(.+)\.coord\((\d)\)$', text_definition)
+		if not match:
+			return
+		for hybrid_body, shape in self.shapes():
+			if hybrid_body.prop('Name') == match.group(1) and shape.prop('Name') == match.group(2):
+				dimension.set(Value=shape.coords()[int(match.group(3)) - 1])
+
+	def Update(self):
+		self.set(modified=True)
+		for hybrid_body, shape in self.shapes():
+			if shape.broken:
+				raise com_error('Update of {0} failed'.format(shape.prop('Name')))
+		for formula in self.prop('Relations').items:
+			self.evaluate(formula)
+
+	def UpdateObject(self, obj):
+		self.set(modified=True)
+		if isinstance(obj, FakeShape) and obj.broken:
+			raise com_error('Update of {0} failed'.format(obj.prop('Name')))
+
+	def CreateReferenceFromObject(self, obj):
+		return FakeReference(self.log, obj)
+
+
+class FakeSPAWorkbench(FakeObject):
+
+	def GetMeasurable(self, reference):
+		return FakeMeasurable(self.log, reference)
+
+
+## Measurable of SPA workbench. Coordinates are output array arguments of its methods (GetPoint, GetCOG, GetPointsOnCurve,
+# GetPlane): as through dynamic dispatch, they can not be read by python (see FakeSystemService, measure script).
+class FakeMeasurable(FakeObject):
+
+	def __init__(self, log, reference):
+		super().__init__(log)
+		self.set(reference=reference)
+
+	# Geometry type of reference (CatMeasurableName): 10 - point, 9 - line, 8 - circle, 7 - curve, 6 - plane, 2 - surface
+	@property
+	def GeometryName(self):
+		return self.geometry_name()
+
+	def GetPoint(self, coordinates):
+		raise com_error('Type mismatch: output array argument of GetPoint')
+
+	def GetPointsOnCurve(self, coordinates):
+		raise com_error('Type mismatch: output array argument of GetPointsOnCurve')
+
+	def GetCOG(self, coordinates):
+		raise com_error('Type mismatch: output array argument of GetCOG')
+
+	def GetPlane(self, components):
+		raise com_error('Type mismatch: output array argument of GetPlane')
+
+	def geometry_name(self):
+		kind = self.reference.target.kind
+		if kind.startswith('Point'):
+			return 10
+		if kind.startswith('Line'):
+			return 9
+		if kind.startswith('Circle'):
+			return 8
+		if kind in ('CurvePar', 'Intersection', 'Boundary', 'Join'):
+			return 7
+		if kind.startswith('Plane'):
+			return 6
+		return 2
+
+	## Values filled by method in output array (as seen by script run in CATIA).
+	def values(self, method):
+		if method == 'GetPoint':
+			return tuple(self.reference.coords())
+		if method == 'GetPointsOnCurve':
+			start, end = self.reference.ends() or ((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+			return tuple(start) + tuple((c1 + c2) / 2 for c1, c2 in zip(start, end)) + tuple(end)
+		if method == 'GetCOG':
+			# Center of gravity: point itself, middle of curve ends, origin for other shapes
+			ends = self.reference.ends()
+			if ends:
+				return tuple((c1 + c2) / 2 for c1, c2 in zip(*ends))
+			return tuple(self.reference.coords())
+		if method == 'GetPlane':
+			normal = self.reference.target.normal()
+			first = (0.0, 0.0, 1.0) if normal[2] == 0.0 else (1.0, 0.0, 0.0)
+			second = (normal[1]*first[2] - normal[2]*first[1], normal[2]*first[0] - normal[0]*first[2], normal[0]*first[1] - normal[1]*first[0])
+			return (0.0, 0.0, 0.0) + first + second
+		raise com_error('Unknown method {0}'.format(method))
+
+
+## SystemService of application: Evaluate runs functions of catia.measure_script, emulated in python.
+# Calls made by script are in-process calls of CATIA: only Evaluate itself is recorded.
+class FakeSystemService(FakeObject):
+
+	def Evaluate(self, script, language, function_name, parameters):
+		if 'Function {0}('.format(function_name) not in script:
+			raise com_error('Function {0} is not defined by script'.format(function_name))
+		return getattr(self, 'script_' + function_name)(*parameters)
+
+	def script_Measure(self, part, workbench, objects, method, size):
+		res = []
+		for obj in objects:
+			values = self.measurable(obj).values(method)
+			if len(values) != size:
+				raise com_error('Subscript out of range')
+			res.extend(values)
+		return tuple(res)
+
+	def script_Describe(self, part, workbench, objects):
+		res = []
+		for obj in objects:
+			measurable = self.measurable(obj)
+			kind = measurable.geometry_name()
+			values = (0.0,) * 9
+			if kind == 10:
+				values = measurable.values('GetPoint') + (0.0,) * 6
+			elif kind in (7, 8, 9):
+				values = measurable.values('GetPointsOnCurve')
+			res.extend((kind,) + values)
+		return tuple(res)
+
+	def script_ExportBody(self, part, workbench, hybrid_body):
+		objects = hybrid_body.prop('HybridShapes').items
+		return (tuple(obj.prop('Name') for obj in objects), self.script_Describe(part, workbench, objects))
+
+	def measurable(self, obj):
+		return FakeMeasurable(self.log, FakeReference(self.log, obj))
+
+
+class FakeDocument(FakeObject):
+
+	def __init__(self, log, application, full_name):
+		super().__init__(log)
+		self.set(application=application, FullName=full_name, Name=full_name.replace('\\', '/').split('/')[-1])
+		self.set(Part=FakePart(log, self.prop('Name')), Selection=FakeSelection(log, self))
+
+	def GetWorkbench(self, name):
+		if name != 'SPAWorkbench':
+			raise com_error('Workbench {0} is not available'.format(name))
+		return FakeSPAWorkbench(self.log)
+
+	@property
+	def Saved(self):
+		return not self.prop('Part').modified
+
+	def Save(self):
+		self.prop('Part').set(modified=False)
+
+	def SaveAs(self, file_path):
+		self.set(FullName=file_path, Name=file_path.replace('\\', '/').split('/')[-1])
+		self.prop('Part').set(modified=False)
+
+	def Close(self):
+		self.application.prop('Documents').remove(self)
+
+
+class FakeDocuments(FakeCollection):
+
+	def __init__(self, log, application):
+		super().__init__(log)
+		self.set(application=application)
+
+	def Open(self, file_path):
+		return self.append(FakeDocument(self.log, self.application, file_path))
+
+	def Add(self, document_type):
+		return self.append(FakeDocument(self.log, self.application, '{0}{1}'.format(document_type, len(self.items) + 1)))
+
+
+## Fake CATIA.Application. Can be used as backend of catia.CATIA: CATIA(backend=FakeApplication).
+class FakeApplication(FakeObject):
+
+	def __init__(self, latency=0.0, update_latency=None, sleep=False):
+		super().__init__(CallLog(latency, update_latency, sleep))
+		self.set(Visible=False, Documents=FakeDocuments(self.log, self), SystemService=FakeSystemService(self.log))
+		self.set(running=True)
+
+	## Application which quit does not respond, as COM server which is gone.
+	def __getattribute__(self, name):
+		if name[:1].isupper() and not object.__getattribute__(self, 'prop')('running'):
+			raise com_error('The RPC server is unavailable')
+		return super().__getattribute__(name)
+
+	@property
+	def ActiveDocument(self):
+		documents = self.prop('Documents').items
+		if not documents:
+			raise com_error('No active document')
+		return documents[-1]
+
+	def Quit(self):
+		self.prop('Documents').items.clear()
+		self.set(running=False)
+		if self in running_applications:
+			running_applications.remove(self)
+
+# Running object table of fake applications (stand-in for the one of Windows, per process): launched applications
+# until they quit, the last one is active
+running_applications = []
+
+## Launches fake application registered in running object table (backend of connection.Broker).
+def launch_application(latency=0.0, update_latency=None, sleep=False):
+	app = FakeApplication(latency, update_latency, sleep)
+	running_applications.append(app)
+	return app
+
+## Returns active fake application or None, as GetActiveObject does (attach of connection.ConnectionManager).
+def active_application():
+	return running_applications[-1] if running_applications else None
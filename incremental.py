@@ -0,0 +1,334 @@
+'''
+CATIA incremental build python module.
+Reruns build script on existing part, recreating only features whose inputs changed. Each create_* call is hashed
+(helper, arguments and hashes of upstream features), hashes and names of created elements are stored in sidecar
+index file. On rerun, feature with known hash is looked up by name (part index, no COM calls) instead of being
+created; changed features get new hashes and so do all features depending on them. Elements of previous build which
+were not reused are deleted at the end, children first, so rerun is idempotent and costs in proportion to the change.
+Intermediate shapes which helpers append besides their result (e.g. joins of partitions of create_join_tree) are stored
+with their feature and deleted with it.
+Sketches are always rebuilt (their content is made by sketch_* calls) and so are elements depending on them.
+Usage:
+	catia.start_catia('nacelle.CATPart')
+	with incremental('nacelle.build.json'):
+		build()
+	catia.catia_active_document_save()
+'''
+
+import os
+import json
+import uuid
+import types
+import hashlib
+import inspect
+from contextlib import contextmanager
+
+import numpy as np
+
+import catia
+
+index_version = 1
+# Helpers returning elements which are already in part or out of tree: results are hashed by arguments
+lookups = {'get_item', 'get_hybrid_body', 'get_axis_system', 'get_origin_plane', 'get_parametre', 'get_parameter_set', 'create_direction'}
+# Helpers run as is: they feed other helpers
+not_incremental = {'create_points_from_chunks', 'create_points_from_file'}
+# Helpers whose elements are never reused
+always_rebuilt = {'create_sketch'}
+# Kinds of created elements by helper (others are hybrid shapes of current geometrical set)
+element_kinds = {'create_hybrid_body': 'hybrid_body', 'create_axis_system': 'axis_system', 'create_parametere_set': 'param_set',
+				 'create_boolean': 'parameter', 'create_string': 'parameter', 'create_real': 'parameter',
+				 'create_dimension': 'parameter', 'create_parameters': 'parameter', 'create_formula': 'relation',
+				 'create_sketch': 'sketch'}
+
+
+## Argument can not be hashed (object not returned by hashed call): feature is always rebuilt.
+class Unhashable(Exception):
+	pass
+
+
+## Sidecar index of build: features in order of creation, {'hash', 'op', 'kind', 'body', 'names', 'keys', 'list', 'extra'}
+# each ('extra' - names of intermediate shapes of geometrical set body).
+class BuildIndex():
+
+	def __init__(self, path):
+		self.path = path
+		self.features = []
+		if path and os.path.exists(path):
+			with open(path) as f:
+				data = json.load(f)
+			if data.get('version') == index_version:
+				self.features = data['features']
+
+	def save(self, features):
+		with open(self.path, 'w') as f:
+			json.dump({'version': index_version, 'features': features}, f, separators=(',', ':'))
+
+
+## Incremental build of current part: wraps create_* helpers, reuses features of previous build with the same hash.
+class IncrementalBuild():
+
+	def __init__(self, index_path):
+		self.index = BuildIndex(index_path)
+		# {hash: [positions of features in previous build]}, indexes written before hashes were made unique may repeat them
+		self.previous = {}
+		for i, feature in enumerate(self.index.features):
+			self.previous.setdefault(feature['hash'], []).append(i)
+		self.features = []
+		# Positions of reused features of previous build
+		self.reused = set()
+		# {hash: number of calls with it in this build}: repeated calls get hashes of their own
+		self.occurrences = {}
+		# {id(object): hash}, objects are kept alive by self.objects
+		self.hashes = {}
+		self.objects = []
+		# Elements of this build by name: stale elements of the same name are told apart from them
+		self.current = {}
+		self.depth = 0
+		# Shapes appended by append_shape during current feature
+		self.appended = None
+		self.helpers = {}
+		self.stats = {'reused': 0, 'created': 0, 'deleted': 0}
+
+	def encode(self, value):
+		if value is None or isinstance(value, (str, bool, int, float)):
+			return value
+		if isinstance(value, np.ndarray):
+			return value.tolist()
+		if isinstance(value, np.generic):
+			return value.item()
+		if isinstance(value, (list, tuple)):
+			return [self.encode(item) for item in value]
+		if isinstance(value, dict):
+			return sorted([json.dumps(self.encode(key)), self.encode(item)] for key, item in value.items())
+		feature_hash = self.hashes.get(id(value))
+		if feature_hash is None:
+			raise Unhashable(value)
+		return {'feature': feature_hash}
+
+	## Hash of call: helper, arguments and, for shapes, geometrical set they are created in. Repeated identical calls
+	# are told apart by their number.
+	def hash(self, name, arguments):
+		if name in always_rebuilt:
+			return uuid.uuid4().hex
+		body = catia.cur_catia.current_hybrid_body_name if element_kinds.get(name, 'shape') in ('shape', 'sketch') else None
+		try:
+			data = json.dumps([name, body, {key: self.encode(value) for key, value in arguments.items()}], sort_keys=True)
+		except Unhashable:
+			return uuid.uuid4().hex
+		feature_hash = hashlib.sha1(data.encode()).hexdigest()
+		occurrence = self.occurrences.get(feature_hash, 0)
+		self.occurrences[feature_hash] = occurrence + 1
+		return feature_hash if occurrence == 0 else '{0}#{1}'.format(feature_hash, occurrence)
+
+	## Registers hashes of returned elements (items of list, tuple or dict result, nested ones too, get hashes derived
+	# from call hash).
+	def register(self, res, feature_hash):
+		if isinstance(res, (list, tuple, dict)):
+			for key, element in (res.items() if isinstance(res, dict) else enumerate(res)):
+				self.register(element, '{0}:{1}'.format(feature_hash, key))
+		elif res is not None and not isinstance(res, (str, bool, int, float)):
+			self.hashes[id(res)] = feature_hash
+			self.objects.append(res)
+
+	def wrap_lookup(self, name, helper):
+		signature = inspect.signature(helper)
+		def lookup(*args, **kwargs):
+			res = helper(*args, **kwargs)
+			if id(res) not in self.hashes:
+				self.register(res, self.hash(name, signature.bind(*args, **kwargs).arguments))
+			return res
+		lookup.__name__ = name
+		lookup.__wrapped__ = helper
+		return lookup
+
+	def wrap_helper(self, name, helper):
+		signature = inspect.signature(helper)
+		def incremental_helper(*args, **kwargs):
+			# Helpers called by other helpers are part of their feature
+			if self.depth:
+				return helper(*args, **kwargs)
+			feature_hash = self.hash(name, signature.bind(*args, **kwargs).arguments)
+			res = self.reuse(feature_hash)
+			if res is None:
+				self.depth += 1
+				self.appended = []
+				try:
+					res = helper(*args, **kwargs)
+					appended = self.appended
+				finally:
+					self.depth -= 1
+					self.appended = None
+				self.add_feature(name, feature_hash, res, appended)
+				self.stats['created'] += 1
+			else:
+				self.stats['reused'] += 1
+			self.register(res, feature_hash)
+			return res
+		incremental_helper.__name__ = name
+		incremental_helper.__wrapped__ = helper
+		return incremental_helper
+
+	## Returns element(s) of previous build with given hash or None if there is no such feature or it is not found in part.
+	def reuse(self, feature_hash):
+		positions = [i for i in self.previous.get(feature_hash, []) if i not in self.reused]
+		if not positions:
+			return None
+		feature = self.index.features[positions[0]]
+		try:
+			elements = [find(feature['kind'], feature['body'], name) for name in feature['names']]
+		except catia.com_error:
+			return None
+		self.reused.add(positions[0])
+		self.features.append(feature)
+		self.set_current(feature, elements)
+		if feature['kind'] == 'hybrid_body':
+			catia.activate_hybrid_body(feature['names'][0])
+		if feature['keys'] is not None:
+			return dict(zip(feature['keys'], elements))
+		return elements if feature['list'] else elements[0]
+
+	## Records feature created by helper: its elements and intermediate shapes appended besides them which are left in part.
+	def add_feature(self, name, feature_hash, res, appended=()):
+		elements = list(res.values()) if isinstance(res, dict) else res if isinstance(res, list) else [res]
+		body = catia.cur_catia.current_hybrid_body_name
+		extra = intermediate_shapes(body, elements, appended)
+		feature = {'hash': feature_hash, 'op': name, 'kind': element_kinds.get(name, 'shape'), 'body': body,
+				   'names': [element.Name for element in elements], 'keys': list(res) if isinstance(res, dict) else None,
+				   'list': isinstance(res, list), 'extra': list(extra)}
+		self.features.append(feature)
+		self.set_current(feature, elements)
+		for extra_name, shape in extra.items():
+			self.current.setdefault(('shape', body, extra_name), []).append(shape)
+
+	## Makes elements of feature the ones found by name in part index (stale elements of the same name may be indexed).
+	def set_current(self, feature, elements):
+		index = catia.cur_catia.index
+		tables = {'shape': index.shapes.setdefault(feature['body'], {}), 'hybrid_body': index.hybrid_bodies,
+				  'axis_system': index.axis_systems, 'param_set': index.param_sets, 'parameter': index.parameters}
+		for name, element in zip(feature['names'], elements):
+			self.current.setdefault((feature['kind'], feature['body'], name), []).append(element)
+			table = tables.get(feature['kind'])
+			if table is not None:
+				if feature['kind'] != 'parameter':
+					index.put(table, name, element)
+					continue
+				# Parameters are also indexed by short name unless it is shared by several parameters
+				for key in {name, name.split('\\')[-1]}:
+					if key not in index.ambiguous:
+						index.put(table, key, element)
+
+	## Deletes elements of previous build which were not reused (in reverse order of creation) and saves index.
+	# Stale elements are found through COM: element of the same name created in this build hides them in part index.
+	def finish(self):
+		collections = {}
+		stale = []
+		for i, feature in reversed(list(enumerate(self.index.features))):
+			if i in self.reused:
+				continue
+			body = feature['body']
+			# Intermediate shapes were created before elements of feature
+			for kind, names in ((feature['kind'], feature['names']), ('shape', feature.get('extra', [])[::-1])):
+				if not names:
+					continue
+				if (kind, body) not in collections:
+					try:
+						collections[kind, body] = named_elements(kind, body)
+					except catia.com_error:
+						collections[kind, body] = {}
+				for name in names:
+					current = self.current.get((kind, body, name), [])
+					candidates = [element for element in collections[kind, body].get(name, [])
+								  if not any(element == current_element for current_element in current)]
+					if candidates:
+						collections[kind, body][name].remove(candidates[-1])
+						stale.append(candidates[-1])
+		if stale:
+			catia.delete_elements(*stale)
+			self.stats['deleted'] = len(stale)
+		self.index.save(self.features)
+
+	def enable(self):
+		for name, value in vars(catia).items():
+			if not isinstance(value, types.FunctionType) or value.__module__ != catia.__name__:
+				continue
+			if name in lookups:
+				self.helpers[name] = value
+				setattr(catia, name, self.wrap_lookup(name, value))
+			elif name.startswith('create_') and name not in not_incremental:
+				self.helpers[name] = value
+				setattr(catia, name, self.wrap_helper(name, value))
+		self.helpers['append_shape'] = catia.append_shape
+		catia.append_shape = self.wrap_append(catia.append_shape)
+
+	## Wraps append_shape: shapes appended within feature are recorded to find its intermediate shapes.
+	def wrap_append(self, helper):
+		def append_shape(shape, name=None):
+			helper(shape, name)
+			if self.appended is not None:
+				self.appended.append(shape)
+		append_shape.__name__ = 'append_shape'
+		append_shape.__wrapped__ = helper
+		return append_shape
+
+	def disable(self):
+		for name, helper in self.helpers.items():
+			setattr(catia, name, helper)
+		self.helpers = {}
+
+## Returns element of part by kind, name of geometrical set and name (through part index).
+def find(kind, body, name):
+	if kind == 'hybrid_body':
+		return catia.get_hybrid_body(name)
+	if kind == 'axis_system':
+		return catia.get_axis_system(name)
+	if kind == 'param_set':
+		return catia.get_parameter_set(name)
+	if kind == 'parameter':
+		return catia.get_parametre(name)
+	if kind == 'relation':
+		return catia.cur_catia.part.Relations.Item(name)
+	if kind == 'sketch':
+		return catia.get_hybrid_body(body).HybridSketches.Item(name)
+	return catia.get_item(name, body)
+
+## Returns intermediate shapes of feature by name: shapes appended besides its elements which are still in geometrical
+# set body (in part index, so temporary shapes deleted by helper are skipped), in order of appending.
+def intermediate_shapes(body, elements, appended):
+	index = catia.cur_catia.index
+	table = index.shapes.get(body)
+	ids = {id(catia.unwrapped(element)) for element in elements}
+	res = {}
+	for shape in appended:
+		obj = catia.unwrapped(shape)
+		if id(obj) in ids:
+			continue
+		ids.add(id(obj))
+		for location, key in index.locations.get(id(obj), []):
+			if location is table and catia.unwrapped(table.get(key)) is obj:
+				res[key] = shape
+				break
+	return res
+
+## Returns elements of part of given kind by name: {name: [elements]}.
+def named_elements(kind, body):
+	part = catia.cur_catia.part
+	collection = {'hybrid_body': lambda: part.HybridBodies, 'axis_system': lambda: part.AxisSystems,
+				  'param_set': lambda: part.Parameters.RootParameterSet.ParameterSets, 'parameter': lambda: part.Parameters,
+				  'relation': lambda: part.Relations, 'sketch': lambda: catia.get_hybrid_body(body).HybridSketches,
+				  'shape': lambda: catia.get_hybrid_body(body).HybridShapes}[kind]()
+	res = {}
+	for i in range(1, collection.Count + 1):
+		element = collection.Item(i)
+		res.setdefault(element.Name, []).append(element)
+	return res
+
+## Context manager running build incrementally with sidecar index file.
+@contextmanager
+def incremental(index_path):
+	build = IncrementalBuild(index_path)
+	build.enable()
+	try:
+		yield build
+	finally:
+		build.disable()
+	build.finish()
@@ -1,5 +1,9 @@
 from math import cos, sin, pi, sqrt, atan2
 from bisect import bisect_left
+from itertools import islice
+from threading import Thread, Event
+from queue import Queue, Full
+import numpy as np
 
 vector = (lambda p1, p2: [coo2 - coo1 for coo2, coo1 in zip(p2, p1)])
 length = (lambda v: sqrt(sum([i**2 for i in v])))
@@ -16,10 +20,120 @@ point_rotate = (lambda point, p1,p2, teta: summ(p1, vector_rotate(vector(p1, poi
 
 def vector_rotate(v, axis, teta):
     t = teta * pi / 180
+    c, s = cos(t), sin(t)
     x, y, z = unit(axis)
-    return [(cos(t)+(1-cos(t))*x**2)*v[0] + ((1-cos(t))*x*y-sin(t)*z)*v[1] + ((1-cos(t))*x*z+sin(t)*y)*v[2],
-                    ((1-cos(t))*y*x+sin(t)*z)*v[0] + (cos(t)+(1-cos(t))*y**2)*v[1] + ((1-cos(t))*y*z-sin(t)*x)*v[2],
-                    ((1-cos(t))*z*x-sin(t)*y)*v[0] + ((1-cos(t))*z*y+sin(t)*x)*v[1] + (cos(t)+(1-cos(t))*z**2)*v[2]]
+    return [(c+(1-c)*x**2)*v[0] + ((1-c)*x*y-s*z)*v[1] + ((1-c)*x*z+s*y)*v[2],
+                    ((1-c)*y*x+s*z)*v[0] + (c+(1-c)*y**2)*v[1] + ((1-c)*y*z-s*x)*v[2],
+                    ((1-c)*z*x-s*y)*v[0] + ((1-c)*z*y+s*x)*v[1] + (c+(1-c)*z**2)*v[2]]
+
+# Batch versions: vectors and points are (N,3) arrays, single vectors / points / angles are broadcast over N
+unit_batch = (lambda v: np.asarray(v, dtype=float) / np.linalg.norm(v, axis=-1, keepdims=True))
+cross_product_batch = (lambda v1, v2: np.cross(np.asarray(v1, dtype=float), np.asarray(v2, dtype=float)))
+dot_product_batch = (lambda v1, v2: np.einsum('...i,...i->...', np.asarray(v1, dtype=float), np.asarray(v2, dtype=float)))
+distance_2points_batch = (lambda p1, p2: np.linalg.norm(np.subtract(p2, p1, dtype=float), axis=-1))
+distance_point_axis_batch = (lambda points, p1, p2: distance_2points_batch(points, point_proj_on_axis_batch(points, p1, p2)))
+point_rotate_batch = (lambda points, p1, p2, teta: np.add(p1, vector_rotate_batch(np.subtract(points, p1, dtype=float), np.subtract(p2, p1, dtype=float), teta)))
+
+def point_proj_on_axis_batch(points, p1, p2):
+    p1 = np.asarray(p1, dtype=float)
+    u = unit_batch(np.subtract(p2, p1))
+    return p1 + dot_product_batch(np.subtract(points, p1), u)[..., None] * u
+
+# Rodrigues formula, same convention as vector_rotate (teta in degrees)
+def vector_rotate_batch(v, axis, teta):
+    v = np.asarray(v, dtype=float)
+    k = unit_batch(axis)
+    t = np.radians(teta)[..., None]
+    c, s = np.cos(t), np.sin(t)
+    return v * c + np.cross(k, v) * s + k * dot_product_batch(k, v)[..., None] * (1 - c)
+
+# Recursive median split of points along axis of their largest extent (k-d tree leaves): returns arrays of indices
+# of points, at most size each, with sizes differing by at most one point. Neighbouring groups are close in space.
+def spatial_partition(points, size):
+    points = np.asarray(points, dtype=float).reshape(len(points), -1)
+    groups = []
+    def split(indices, parts):
+        if parts == 1:
+            groups.append(indices)
+            return
+        extent = np.ptp(points[indices], axis=0)
+        order = indices[np.argsort(points[indices, np.argmax(extent)], kind='stable')]
+        half = parts // 2
+        middle = len(order) * half // parts
+        split(order[:middle], half)
+        split(order[middle:], parts - half)
+    if len(points):
+        split(np.arange(len(points)), -(-len(points) // size))
+    return groups
+
+## Rigid transform kept as 4x4 homogeneous matrix. Built from rotation about axis (vector_rotate convention,
+# teta in degrees), rotation about axis through two points (point_rotate convention) or translation.
+# a @ b is transform applying b then a, so chain of placements is composed once and applied by one matrix product.
+# Applied to single point (returns list as point_rotate) or to (N,3) array of points (returns array).
+class Transform():
+
+	def __init__(self, matrix=None):
+		self.matrix = np.identity(4) if matrix is None else np.array(matrix, dtype=float)
+
+	@classmethod
+	def rotation(cls, axis, teta, origin=None):
+		x, y, z = unit(axis)
+		t = teta * pi / 180
+		c, s = cos(t), sin(t)
+		matrix = np.identity(4)
+		matrix[:3, :3] = [[c+(1-c)*x**2, (1-c)*x*y-s*z, (1-c)*x*z+s*y],
+						  [(1-c)*y*x+s*z, c+(1-c)*y**2, (1-c)*y*z-s*x],
+						  [(1-c)*z*x-s*y, (1-c)*z*y+s*x, c+(1-c)*z**2]]
+		if origin is not None:
+			matrix[:3, 3] = np.subtract(origin, matrix[:3, :3] @ np.asarray(origin, dtype=float))
+		return cls(matrix)
+
+	@classmethod
+	def axis_rotation(cls, p1, p2, teta):
+		return cls.rotation(vector(p1, p2), teta, p1)
+
+	@classmethod
+	def translation(cls, v):
+		matrix = np.identity(4)
+		matrix[:3, 3] = v
+		return cls(matrix)
+
+	## Transform applying transforms one by one in given order.
+	@classmethod
+	def chain(cls, *transforms):
+		matrix = np.identity(4)
+		for transform in transforms:
+			matrix = transform.matrix @ matrix
+		return cls(matrix)
+
+	def __matmul__(self, other):
+		return Transform(self.matrix @ other.matrix)
+
+	def then(self, other):
+		return Transform(other.matrix @ self.matrix)
+
+	def inverse(self):
+		rotation = self.matrix[:3, :3].T
+		matrix = np.identity(4)
+		matrix[:3, :3] = rotation
+		matrix[:3, 3] = -rotation @ self.matrix[:3, 3]
+		return Transform(matrix)
+
+	def apply(self, points):
+		points = np.asarray(points, dtype=float)
+		res = points @ self.matrix[:3, :3].T + self.matrix[:3, 3]
+		return res.tolist() if points.ndim == 1 else res
+
+	## Applies rotation part only (to vectors or directions).
+	def apply_vector(self, v):
+		v = np.asarray(v, dtype=float)
+		res = v @ self.matrix[:3, :3].T
+		return res.tolist() if v.ndim == 1 else res
+
+	__call__ = apply
+
+	def __repr__(self):
+		return 'Transform({0})'.format(self.matrix.tolist())
 
 # OK
 def lin_interp(x_, ps):
@@ -31,6 +145,151 @@ def lin_interp(x_, ps):
 		i = bisect_left([p[0] for p in ps], x_)
 		return ps[i-1][1] + (ps[i][1] - ps[i-1][1]) * (x_ - ps[i-1][0]) / (ps[i][0] - ps[i-1][0])
 
+## Interpolator of curve given as list of points (x, y) sorted by x (read_courbe output).
+# Built once: keeps contiguous x / y arrays and polynomial coefficients of each interval.
+# Evaluated for scalar (bisection, O(log n)) or for array of abscissas (vectorized). Values outside of curve
+# are clamped as in lin_interp. Modes: 'linear', 'cubic' (natural cubic spline), 'monotone' (Fritsch-Carlson).
+class Interpolator():
+
+	modes = ('linear', 'cubic', 'monotone')
+
+	def __init__(self, ps, mode='linear'):
+		assert mode in self.modes, 'Unknown interpolation mode {0}'.format(mode)
+		assert len(ps), 'Empty curve given'
+		data = np.asarray(ps, dtype=float).reshape(-1, 2)
+		self.mode = mode
+		self.x = np.ascontiguousarray(data[:, 0])
+		self.y = np.ascontiguousarray(data[:, 1])
+		# Python lists are faster than arrays for scalar bisection
+		self.x_list = self.x.tolist()
+		self.y_list = self.y.tolist()
+		self.coefs = self.__coefficients() if mode != 'linear' and len(self.x) > 2 else None
+		self.coefs_list = self.coefs.tolist() if self.coefs is not None else None
+
+	## Polynomial coefficients (a, b, c, d) of each interval: y = a + b*dx + c*dx**2 + d*dx**3, dx = x - x_i.
+	# Intervals of zero length (duplicate abscissas) have no polynomial: spline of such curve would be NaN
+	def __coefficients(self):
+		x, y = self.x, self.y
+		h = np.diff(x)
+		if not np.all(h > 0):
+			i = int(np.argmax(h <= 0))
+			raise ValueError('Abscissas of curve must be strictly increasing for {0} interpolation: x[{1}] = {2}, x[{3}] = {4}'
+							 .format(self.mode, i, x[i], i + 1, x[i + 1]))
+		delta = np.diff(y) / h
+		if self.mode == 'cubic':
+			# Second derivatives of natural spline: tridiagonal system solved by Thomas algorithm
+			n = len(x)
+			m = np.zeros(n)
+			diag = 2.0 * (h[:-1] + h[1:])
+			rhs = 6.0 * np.diff(delta)
+			for i in range(1, n - 2):
+				w = h[i] / diag[i - 1]
+				diag[i] -= w * h[i]
+				rhs[i] -= w * rhs[i - 1]
+			for i in range(n - 3, -1, -1):
+				m[i + 1] = (rhs[i] - h[i + 1] * m[i + 2]) / diag[i]
+			b = delta - h * (2.0 * m[:-1] + m[1:]) / 6.0
+			c = m[:-1] / 2.0
+			d = np.diff(m) / (6.0 * h)
+		else:
+			# Slopes of monotone cubic Hermite interpolation: weighted harmonic mean of secants, zero at extrema
+			slopes = np.empty(len(x))
+			slopes[0], slopes[-1] = delta[0], delta[-1]
+			w1 = 2.0 * h[1:] + h[:-1]
+			w2 = h[1:] + 2.0 * h[:-1]
+			same_sign = delta[:-1] * delta[1:] > 0
+			with np.errstate(divide='ignore', invalid='ignore'):
+				slopes[1:-1] = np.where(same_sign, (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:]), 0.0)
+			b = slopes[:-1]
+			c = (3.0 * delta - 2.0 * slopes[:-1] - slopes[1:]) / h
+			d = (slopes[:-1] + slopes[1:] - 2.0 * delta) / h**2
+		return np.column_stack((y[:-1], b, c, d))
+
+	def __call__(self, x_):
+		if isinstance(x_, (int, float)) or np.ndim(x_) == 0:
+			return self.value(x_)
+		return self.values(x_)
+
+	## Value at scalar abscissa.
+	def value(self, x_):
+		xs, ys = self.x_list, self.y_list
+		if x_ >= xs[-1]:
+			return ys[-1]
+		elif x_ <= xs[0]:
+			return ys[0]
+		i = bisect_left(xs, x_)
+		if self.coefs_list is None:
+			return ys[i-1] + (ys[i] - ys[i-1]) * (x_ - xs[i-1]) / (xs[i] - xs[i-1])
+		a, b, c, d = self.coefs_list[i-1]
+		dx = x_ - xs[i-1]
+		return a + dx * (b + dx * (c + dx * d))
+
+	## Values at array of abscissas.
+	def values(self, x_):
+		x_ = np.asarray(x_, dtype=float)
+		x, y = self.x, self.y
+		if len(x) == 1:
+			return np.full(x_.shape, y[0])
+		i = np.clip(np.searchsorted(x, x_, side='left'), 1, len(x) - 1)
+		dx = x_ - x[i-1]
+		if self.coefs is None:
+			res = y[i-1] + (y[i] - y[i-1]) * dx / (x[i] - x[i-1])
+		else:
+			a, b, c, d = self.coefs[i-1].T
+			res = a + dx * (b + dx * (c + dx * d))
+		res = np.where(x_ <= x[0], y[0], res)
+		return np.where(x_ >= x[-1], y[-1], res)
+
+## Table of curves given for several temperatures (read_courbes output): interpolation of (T, x) queries,
+# linear between temperatures and by Interpolator of given mode along curves ('linear' gives bilinear interpolation).
+# Temperatures are clamped to the table range, abscissas are clamped per curve as in lin_interp.
+# Evaluated for scalar query or for batch of queries (arrays of T and x, broadcast together), vectorized over the batch.
+class CurvesTable():
+
+	def __init__(self, courbes, mode='linear'):
+		assert courbes, 'Empty table of curves given'
+		self.temperatures = np.array(sorted(courbes), dtype=float)
+		self.t_list = self.temperatures.tolist()
+		self.curves = [Interpolator(courbes[t], mode) for t in sorted(courbes)]
+
+	def __call__(self, t, x_):
+		if isinstance(t, (int, float)) and isinstance(x_, (int, float)) or np.ndim(t) == 0 and np.ndim(x_) == 0:
+			return self.value(t, x_)
+		return self.values(t, x_)
+
+	## Value of scalar query.
+	def value(self, t, x_):
+		ts, curves = self.t_list, self.curves
+		if t >= ts[-1]:
+			return curves[-1].value(x_)
+		elif t <= ts[0]:
+			return curves[0].value(x_)
+		j = bisect_left(ts, t)
+		w = (t - ts[j-1]) / (ts[j] - ts[j-1])
+		return (1.0 - w) * curves[j-1].value(x_) + w * curves[j].value(x_)
+
+	## Values of batch of queries: curves are evaluated once per temperature interval for all its queries.
+	def values(self, t, x_):
+		t, x_ = np.broadcast_arrays(np.asarray(t, dtype=float), np.asarray(x_, dtype=float))
+		ts = self.temperatures
+		if len(ts) == 1:
+			return self.curves[0].values(x_)
+		t = np.clip(t, ts[0], ts[-1])
+		j = np.clip(np.searchsorted(ts, t, side='left'), 1, len(ts) - 1)
+		w = (t - ts[j-1]) / (ts[j] - ts[j-1])
+		# Queries are grouped by temperature interval
+		order = np.argsort(j, axis=None, kind='stable')
+		j, w, x_ = j.ravel()[order], w.ravel()[order], x_.ravel()[order]
+		bounds = np.searchsorted(j, np.arange(1, len(ts) + 1))
+		res = np.empty(len(order))
+		for k in range(1, len(ts)):
+			group = slice(bounds[k-1], bounds[k])
+			if group.start < group.stop:
+				res[group] = (1.0 - w[group]) * self.curves[k-1].values(x_[group]) + w[group] * self.curves[k].values(x_[group])
+		values = np.empty(len(order))
+		values[order] = res
+		return values.reshape(t.shape)
+
 # OK
 def read_list(path_to_file):
 	res = []
@@ -83,5 +342,80 @@ def check_num(s):
 
 
 def chunks(l, n):
+    if not hasattr(l, '__getitem__'):
+        # Iterators and generators are read lazily, chunks are lists
+        it = iter(l)
+        chunk = list(islice(it, n))
+        while chunk:
+            yield chunk
+            chunk = list(islice(it, n))
+        return
     for i in range(0, len(l), n):
-        yield l[i:i + n] 
\ No newline at end of file
+        yield l[i:i + n]
+
+## Reads lines of numbers from file by chunks: yields (k, columns) arrays of at most n rows, blank lines are skipped.
+# Memory used does not depend on size of file.
+def read_chunks(path_to_file, columns, n=100000):
+    with open(path_to_file) as f:
+        rows = (line.split()[:columns] for line in f if not line.isspace())
+        for chunk in chunks(rows, n):
+            yield np.array(chunk, dtype=float).reshape(-1, columns)
+
+## Streaming version of read_list: yields 1-D arrays of at most n values.
+def read_list_chunks(path_to_file, n=100000):
+    if not path_to_file:
+        return
+    for chunk in read_chunks(path_to_file, 1, n):
+        yield chunk[:, 0]
+
+## Streaming version of read_courbe: yields (k, 2) arrays of at most n points in file order (not sorted).
+def read_courbe_chunks(path_to_file, n=100000):
+    if not path_to_file:
+        return
+    yield from read_chunks(path_to_file, 2, n)
+
+## Streaming reader of point files (x y z per line): yields (k, 3) arrays of at most n points.
+def read_points_chunks(path_to_file, n=100000):
+    yield from read_chunks(path_to_file, 3, n)
+
+## Runs iterator in background thread, keeping at most `size` items ahead of consumer.
+# Used to overlap parsing of next chunk of file with processing (e.g. COM calls) of current one.
+# If consumer stops early (break, error), producer is stopped and source iterator is closed (e.g. its file).
+def prefetch(iterable, size=2):
+    queue = Queue(maxsize=size)
+    end = object()
+    stop = Event()
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((end, e))
+        else:
+            put((end, None))
+        finally:
+            # Source is closed by producer: generator can not be closed from another thread while it runs
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+    Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = queue.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
\ No newline at end of file
@@ -0,0 +1,256 @@
+'''
+CATIA parallel build python module.
+Builds many parts in parallel CATIA sessions: pool of worker processes, each of them owns its own catia session
+(CoInitialize and CATIA application of its own). Job is a build function called with opened part, jobs are
+dispatched in given order, results and errors are collected back in the same order.
+Job exceeding its timeout is stopped by termination of its worker and of worker's CATIA process, worker is replaced
+by a new one. Each worker sends its messages by a pipe of its own, so termination of worker does not affect the others.
+Build functions and backends are sent to workers by pickle: they must be defined at module level
+(functools.partial of them is fine, e.g. partial(fakecatia.FakeApplication, 0.001)).
+Usage: results = run_jobs([Job('part.CATPart', build, (length,)) for length in lengths], workers=4)
+'''
+
+import os
+import sys
+import csv
+import signal
+import traceback
+import subprocess
+import multiprocessing
+import multiprocessing.connection
+from time import perf_counter
+
+import catia
+
+# Workers are started by spawn as on Windows: COM state is never inherited from parent process
+context = multiprocessing.get_context('spawn')
+
+
+## Build job: part is opened (or created if path is None), build function is called with args, part is saved
+# (as save_path if given) and closed. Value returned by build function must be picklable.
+class Job():
+
+	def __init__(self, path, build, args=(), kwargs=None, save_path=None, timeout=None):
+		self.path = path
+		self.build = build
+		self.args = args
+		self.kwargs = kwargs or {}
+		self.save_path = save_path
+		self.timeout = timeout
+
+	def run(self):
+		session = catia.cur_catia
+		if self.path is None:
+			session.new('Part')
+		else:
+			session.open(self.path)
+		try:
+			value = self.build(*self.args, **self.kwargs)
+			if self.save_path:
+				session.save_as(self.save_path)
+			elif self.path is not None:
+				session.save()
+		finally:
+			session.close()
+		return value
+
+## Result of job: value returned by build function or error (formatted traceback), build time and worker process id.
+class JobResult():
+
+	def __init__(self, job_id, path, value=None, error=None, duration=None, worker=None, timed_out=False):
+		self.job_id = job_id
+		self.path = path
+		self.value = value
+		self.error = error
+		self.duration = duration
+		self.worker = worker
+		self.timed_out = timed_out
+
+	@property
+	def ok(self):
+		return self.error is None
+
+	def __repr__(self):
+		state = 'timeout' if self.timed_out else 'ok' if self.ok else 'error'
+		return 'JobResult({0}, {1!r}, {2})'.format(self.job_id, self.path, state)
+
+
+## Returns process id of application: process_id attribute of application (custom backends), or on Windows
+# the CATIA process which appeared while application was launched (launches are serialized by launch lock).
+def application_pid(app, catia_pids_before):
+	pid = getattr(app, 'process_id', None)
+	if pid is not None or catia_pids_before is None:
+		return pid
+	new_pids = catia_pids() - catia_pids_before
+	return new_pids.pop() if len(new_pids) == 1 else None
+
+## Returns ids of running CATIA processes (Windows) or None.
+def catia_pids():
+	if sys.platform != 'win32':
+		return None
+	output = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq CNEXT.exe', '/FO', 'CSV', '/NH'],
+							capture_output=True, text=True).stdout
+	return {int(row[1]) for row in csv.reader(output.splitlines()) if len(row) > 1 and row[1].isdigit()}
+
+## Worker process: starts its own catia session (without document, jobs open their parts), reports process id of its
+# application and runs jobs received from tasks queue until None is received. Messages are sent by worker's own pipe.
+def worker_main(visible, backend, tasks, results, launch_lock):
+	with launch_lock:
+		catia_pids_before = catia_pids()
+		session = catia.CATIA(visible, backend)
+		app_pid = application_pid(session.app, catia_pids_before)
+	catia.set_session(session)
+	results.send(('ready', None, app_pid))
+	while True:
+		task = tasks.get()
+		if task is None:
+			break
+		job_id, job = task
+		results.send(('start', job_id, None))
+		start = perf_counter()
+		try:
+			value = job.run()
+		except Exception:
+			results.send(('error', job_id, (traceback.format_exc(), perf_counter() - start)))
+		else:
+			results.send(('done', job_id, (value, perf_counter() - start)))
+	catia.cur_catia.quit()
+
+
+## Worker process with its own tasks queue and results pipe: running job is known and worker can be stopped by
+# termination without corrupting channels of other workers.
+class Worker():
+
+	def __init__(self, visible, backend, launch_lock):
+		self.tasks = context.Queue()
+		self.results, results = context.Pipe(duplex=False)
+		self.process = context.Process(target=worker_main, args=(visible, backend, self.tasks, results, launch_lock), daemon=True)
+		self.process.start()
+		results.close()
+		self.app_pid = None
+		self.job_id = None
+		self.started = None
+
+	def submit(self, job_id, job):
+		self.job_id = job_id
+		self.started = None
+		self.tasks.put((job_id, job))
+
+	def stop(self):
+		self.tasks.put(None)
+
+	## Terminates worker process and its application (left orphaned by termination of worker otherwise).
+	def kill(self):
+		self.process.terminate()
+		self.process.join()
+		if self.app_pid is not None:
+			try:
+				os.kill(self.app_pid, signal.SIGTERM)
+			except OSError:
+				pass
+		self.results.close()
+
+
+## Pool of worker processes, each with its own catia session.
+# Default timeout is used for jobs without timeout of their own (None - no timeout).
+class Pool():
+
+	def __init__(self, workers=None, visible=False, backend=None, timeout=None, poll_interval=0.1):
+		self.size = workers or multiprocessing.cpu_count()
+		self.visible = visible
+		self.backend = backend
+		self.timeout = timeout
+		self.poll_interval = poll_interval
+		self.launch_lock = context.Lock()
+		self.workers = []
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, exc_traceback):
+		if exc_type is None:
+			self.close()
+		else:
+			self.terminate()
+
+	def new_worker(self):
+		worker = Worker(self.visible, self.backend, self.launch_lock)
+		self.workers.append(worker)
+		return worker
+
+	## Runs jobs and returns their results in order of jobs. on_result is called with each result when it is ready.
+	def run(self, jobs, on_result=None):
+		jobs = list(jobs)
+		results = [None] * len(jobs)
+		waiting = list(range(len(jobs)))[::-1]
+		while len(self.workers) < min(self.size, len(jobs)):
+			self.new_worker()
+		idle = list(self.workers)
+		running = {}
+		def finish(result):
+			results[result.job_id] = result
+			if on_result:
+				on_result(result)
+		def replace(worker, job_id, result):
+			# Failed worker is dropped with its pipe, its job fails
+			worker.kill()
+			self.workers.remove(worker)
+			del running[job_id]
+			finish(result)
+			idle.append(self.new_worker())
+		while waiting or running:
+			while waiting and idle:
+				worker, job_id = idle.pop(), waiting.pop()
+				worker.submit(job_id, jobs[job_id])
+				running[job_id] = worker
+			busy = list(running.values())
+			for conn in multiprocessing.connection.wait([worker.results for worker in busy], self.poll_interval):
+				worker = next(worker for worker in busy if worker.results is conn)
+				if worker.job_id not in running or running[worker.job_id] is not worker:
+					continue
+				job_id = worker.job_id
+				try:
+					state, message_job_id, data = conn.recv()
+				except (EOFError, OSError):
+					# Worker crashed (e.g. CATIA failed to start)
+					replace(worker, job_id, JobResult(job_id, jobs[job_id].path, None,
+													  'Worker exited with code {0}'.format(worker.process.exitcode), None, worker.process.pid))
+					continue
+				if state == 'ready':
+					worker.app_pid = data
+				elif message_job_id != job_id:
+					# Message of job which is not running on this worker any more
+					continue
+				elif state == 'start':
+					worker.started = perf_counter()
+				else:
+					del running[job_id]
+					value, duration = data if state == 'done' else (None, data[1])
+					finish(JobResult(job_id, jobs[job_id].path, value, data[0] if state == 'error' else None, duration, worker.process.pid))
+					idle.append(worker)
+			now = perf_counter()
+			for job_id, worker in list(running.items()):
+				timeout = jobs[job_id].timeout if jobs[job_id].timeout is not None else self.timeout
+				if timeout is not None and worker.started is not None and now - worker.started > timeout:
+					# Hung session cannot be interrupted: worker and its application are terminated and replaced
+					replace(worker, job_id, JobResult(job_id, jobs[job_id].path, None, 'Timeout of {0} s exceeded'.format(timeout),
+													  now - worker.started, worker.process.pid, True))
+		return results
+
+	def close(self):
+		for worker in self.workers:
+			worker.stop()
+		for worker in self.workers:
+			worker.process.join()
+			worker.results.close()
+		self.workers = []
+
+	def terminate(self):
+		for worker in self.workers:
+			worker.kill()
+		self.workers = []
+
+## Runs jobs in pool of worker processes and returns their results in order of jobs.
+def run_jobs(jobs, workers=None, visible=False, backend=None, timeout=None, on_result=None):
+	with Pool(workers, visible, backend, timeout) as pool:
+		return pool.run(jobs, on_result)
@@ -0,0 +1,195 @@
+'''
+CATIA profiling python module.
+Opt-in instrumentation of catia module: COM-objects of current session are wrapped by proxies which count and time
+every method call and property access, helpers of catia module are wrapped to attribute COM calls to them.
+Results are exported as per-helper histogram, Chrome trace (chrome://tracing, Perfetto) or folded stacks (flamegraph.pl).
+'''
+
+import json
+import types
+from time import perf_counter
+from contextlib import contextmanager
+
+import catia
+
+# COM-objects of catia session wrapped by proxies
+com_attributes = ('app', 'document', 'part', 'hybrid_bodies', 'shape_factory', 'parameteres', 'current_hybrid_body',
+				  'spa_workbench', 'factory2D', 'current_sketch')
+# Helpers of catia module which are not wrapped: session management and update machinery
+not_profiled = {'start_catia', 'com_application', 'update_part', 'flush_update', 'batch_update',
+				'set_session', 'bind_session', 'current_session', 'use_session'}
+# Values returned by COM which are not wrapped by proxy
+plain_types = (str, bytes, int, float, bool, tuple, list, dict, type(None))
+# Name of pseudo helper for COM calls made outside of helpers
+toplevel = '<toplevel>'
+
+
+## Proxy of COM-object: forwards method calls and property accesses to the object and reports their duration to profiler.
+class ComProxy():
+
+	def __init__(self, obj, profiler):
+		object.__setattr__(self, '_obj', obj)
+		object.__setattr__(self, '_profiler', profiler)
+
+	def __getattr__(self, name):
+		obj, profiler = self._obj, self._profiler
+		# Private attributes (e.g. _oleobj_ used by win32com to pass the object to COM) are forwarded as is
+		if name.startswith('_'):
+			return getattr(obj, name)
+		start = perf_counter()
+		value = getattr(obj, name)
+		if isinstance(value, (types.MethodType, types.FunctionType, types.BuiltinFunctionType)):
+			def method(*args):
+				start = perf_counter()
+				try:
+					return profiler.wrap(value(*[unwrap(arg) for arg in args]))
+				finally:
+					profiler.record(name, 'call', start, perf_counter())
+			return method
+		profiler.record(name, 'get', start, perf_counter())
+		return profiler.wrap(value)
+
+	def __setattr__(self, name, value):
+		start = perf_counter()
+		try:
+			setattr(self._obj, name, unwrap(value))
+		finally:
+			self._profiler.record(name, 'put', start, perf_counter())
+
+	def __call__(self, *args):
+		return self._profiler.wrap(self._obj(*[unwrap(arg) for arg in args]))
+
+	def __eq__(self, other):
+		return self._obj == unwrap(other)
+
+	def __hash__(self):
+		return hash(self._obj)
+
+	def __repr__(self):
+		return 'ComProxy({0!r})'.format(self._obj)
+
+## Returns object wrapped by proxy (lists and tuples are unwrapped item by item).
+def unwrap(value):
+	if isinstance(value, ComProxy):
+		return object.__getattribute__(value, '_obj')
+	if isinstance(value, (list, tuple)):
+		return type(value)(unwrap(item) for item in value)
+	return value
+
+
+## Converts COM-objects of session (wraps or unwraps them): its handles, handles of other documents in its registry
+# and objects of part indexes, which are returned by lookup helpers (get_item, get_hybrid_body ...).
+def convert_handles(session, convert):
+	handles = [vars(session)] + list(session.documents.values())
+	for document_handles in handles:
+		for attr in com_attributes:
+			if attr in document_handles:
+				document_handles[attr] = convert(document_handles[attr])
+		index = document_handles.get('index')
+		if index is not None:
+			for table in index.tables():
+				for key, value in table.items():
+					table[key] = convert(value)
+
+
+## Collects COM calls of current catia session and attributes them to the enclosing helpers.
+class Profiler():
+
+	def __init__(self):
+		self.stack = []
+		# {(helper, member, kind): [count, total time]}
+		self.stats = {}
+		# Chrome trace events: complete events of helpers and COM calls
+		self.events = []
+		self.helpers = {}
+		self.start = perf_counter()
+
+	def wrap(self, value):
+		if isinstance(value, (plain_types, ComProxy)):
+			return value
+		return ComProxy(value, self)
+
+	def record(self, member, kind, start, end):
+		helper = self.stack[-1] if self.stack else toplevel
+		stat = self.stats.setdefault((helper, member, kind), [0, 0.0])
+		stat[0] += 1
+		stat[1] += end - start
+		self.add_event(member if kind == 'call' else '{0} {1}'.format(kind, member), 'com', start, end)
+
+	def add_event(self, name, category, start, end, stack=None):
+		self.events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': 1, 'tid': 1,
+							'ts': (start - self.start) * 1e6, 'dur': (end - start) * 1e6,
+							'stack': list(self.stack) if stack is None else stack})
+
+	def profile_helper(self, name, helper):
+		def profiled(*args, **kwargs):
+			self.stack.append(name)
+			start = perf_counter()
+			try:
+				return helper(*args, **kwargs)
+			finally:
+				self.stack.pop()
+				self.add_event(name, 'helper', start, perf_counter())
+		profiled.__name__ = name
+		profiled.__wrapped__ = helper
+		return profiled
+
+	## Wraps COM-objects of current session (handles of its documents and objects of their part indexes) by proxies
+	# and helpers of catia module by profiling functions.
+	def enable(self):
+		convert_handles(catia.current_session(), self.wrap)
+		for name, value in vars(catia).items():
+			if isinstance(value, types.FunctionType) and value.__module__ == catia.__name__ \
+					and not name.startswith('_') and name not in not_profiled:
+				self.helpers[name] = value
+				setattr(catia, name, self.profile_helper(name, value))
+
+	## Restores helpers of catia module and COM-objects of current session.
+	def disable(self):
+		for name, helper in self.helpers.items():
+			setattr(catia, name, helper)
+		self.helpers = {}
+		convert_handles(catia.current_session(), unwrap)
+
+	## Returns {helper: {member: (count, total time)}}. Member is a COM method or property access ('get Name', 'put Name').
+	def histogram(self):
+		res = {}
+		for (helper, member, kind), (calls, total_time) in self.stats.items():
+			key = member if kind == 'call' else '{0} {1}'.format(kind, member)
+			res.setdefault(helper, {})[key] = (calls, total_time)
+		return res
+
+	def report(self):
+		lines = ['{0:<40}{1:<40}{2:>10}{3:>14}'.format('helper', 'member', 'calls', 'time, ms')]
+		for helper, members in sorted(self.histogram().items()):
+			for member, (calls, total_time) in sorted(members.items(), key=lambda item: -item[1][1]):
+				lines.append('{0:<40}{1:<40}{2:>10}{3:>14.3f}'.format(helper, member, calls, total_time * 1000))
+		return '\n'.join(lines)
+
+	## Writes trace file in Chrome trace event format.
+	def write_trace(self, path):
+		events = [{k: v for k, v in event.items() if k != 'stack'} for event in self.events]
+		with open(path, 'w') as f:
+			json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+	## Writes folded stacks ('helper;helper;member time_us' per line) for flamegraph.pl / speedscope.
+	def write_folded(self, path):
+		folded = {}
+		for event in self.events:
+			if event['cat'] == 'helper':
+				continue
+			key = ';'.join((event['stack'] or [toplevel]) + [event['name']])
+			folded[key] = folded.get(key, 0) + event['dur']
+		with open(path, 'w') as f:
+			for key, duration in sorted(folded.items()):
+				f.write('{0} {1}\n'.format(key, max(1, int(round(duration)))))
+
+## Context manager profiling current catia session.
+@contextmanager
+def profile():
+	profiler = Profiler()
+	profiler.enable()
+	try:
+		yield profiler
+	finally:
+		profiler.disable()
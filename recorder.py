@@ -0,0 +1,218 @@
+'''
+CATIA build recorder python module.
+Records calls of catia helpers (features, sketches, parameters, lookups of existing elements) made by build script as
+a feature graph: each node keeps helper name, its arguments and nodes of features it depends on. Graph is saved as
+compact JSON recipe, which can be recorded offline (e.g. with fakecatia backend) and replayed in fresh CATIA session:
+replay runs in one batch update and merges runs of create_point_coord into create_points.
+Values measured in recording session (get_point_coords ...) are not recorded: they are baked into recorded arguments.
+Usage:
+	with record() as recorder:
+		build()
+	recorder.save('build.json')
+	...
+	catia.start_catia('empty.CATPart')
+	replay('build.json')
+'''
+
+import json
+import types
+import inspect
+from contextlib import contextmanager
+
+import numpy as np
+
+import catia
+
+recipe_version = 1
+# Recorded helpers: helpers creating, modifying or looking up elements of part
+recorded_prefixes = ('create_', 'sketch_')
+recorded = {'hide', 'set_color', 'apply_styles', 'activate_hybrid_body', 'open_sketch', 'close_sketch', 'write_parameters',
+			'rename', 'delete_feature', 'delete_elements', 'get_item', 'get_hybrid_body', 'get_axis_system', 'get_origin_plane',
+			'get_parametre', 'get_parametre_ref', 'get_parameter_set', 'get_reference'}
+# Helpers which only feed other helpers: their own calls are recorded
+not_recorded = {'create_points_from_chunks', 'create_points_from_file'}
+
+
+## Exception raised when argument of recorded call can not be serialized (e.g. COM-object not returned by recorded call).
+class RecordError(Exception):
+	pass
+
+
+## Records calls of catia helpers as feature graph.
+class Recorder():
+
+	def __init__(self):
+		self.nodes = []
+		# {id(object): (node id, path of keys of object in result)}, objects are kept alive by self.objects
+		self.handles = {}
+		self.objects = []
+		self.depth = 0
+		self.helpers = {}
+
+	def is_recorded(self, name):
+		return (name in recorded or name.startswith(recorded_prefixes)) and name not in not_recorded
+
+	def record_helper(self, name, helper):
+		signature = inspect.signature(helper)
+		def recording(*args, **kwargs):
+			self.depth += 1
+			try:
+				res = helper(*args, **kwargs)
+			finally:
+				self.depth -= 1
+			# Helpers called by recorded helpers are replayed by them
+			if self.depth == 0:
+				self.add_node(name, signature.bind(*args, **kwargs).arguments, res)
+			return res
+		recording.__name__ = name
+		recording.__wrapped__ = helper
+		return recording
+
+	def add_node(self, name, arguments, res):
+		deps = set()
+		node = {'id': len(self.nodes), 'op': name, 'args': {key: self.encode(value, deps) for key, value in arguments.items()}}
+		node['deps'] = sorted(deps)
+		self.nodes.append(node)
+		self.register(res, node['id'])
+
+	## Registers objects returned by call: result itself, items of returned list or tuple or values of returned dict
+	# (nested ones too, e.g. lines of (points, lines) returned by sketch_create_polyline).
+	def register(self, res, node_id, path=()):
+		if isinstance(res, dict):
+			for key, value in res.items():
+				self.register(value, node_id, path + (key,))
+		elif isinstance(res, (list, tuple)):
+			for i, value in enumerate(res):
+				self.register(value, node_id, path + (i,))
+		elif res is not None and not isinstance(res, (str, int, float, bool)):
+			self.register_object(res, node_id, path)
+
+	def register_object(self, obj, node_id, path):
+		self.handles[id(obj)] = (node_id, path)
+		self.objects.append(obj)
+
+	def encode(self, value, deps):
+		if value is None or isinstance(value, (str, bool, int, float)):
+			return value
+		if isinstance(value, np.ndarray):
+			return value.tolist()
+		if isinstance(value, np.generic):
+			return value.item()
+		if isinstance(value, catia.ParameterSnapshot):
+			# Snapshot is bound to recording session: values are written back without it
+			return None
+		if isinstance(value, list):
+			return [self.encode(item, deps) for item in value]
+		if isinstance(value, tuple):
+			return {'tuple': [self.encode(item, deps) for item in value]}
+		if isinstance(value, dict):
+			return {'dict': [[self.encode(key, deps), self.encode(item, deps)] for key, item in value.items()]}
+		handle = self.handles.get(id(value))
+		if handle is None:
+			raise RecordError('Argument {0!r} is not returned by recorded call'.format(value))
+		node_id, path = handle
+		deps.add(node_id)
+		if not path:
+			return {'ref': node_id}
+		return {'ref': node_id, 'key': path[0]} if len(path) == 1 else {'ref': node_id, 'path': list(path)}
+
+	def recipe(self):
+		return {'version': recipe_version, 'nodes': self.nodes}
+
+	def save(self, path):
+		with open(path, 'w') as f:
+			json.dump(self.recipe(), f, separators=(',', ':'))
+
+	## Wraps recorded helpers of catia module.
+	def enable(self):
+		for name, value in vars(catia).items():
+			if isinstance(value, types.FunctionType) and value.__module__ == catia.__name__ and self.is_recorded(name):
+				self.helpers[name] = value
+				setattr(catia, name, self.record_helper(name, value))
+
+	def disable(self):
+		for name, helper in self.helpers.items():
+			setattr(catia, name, helper)
+		self.helpers = {}
+
+## Context manager recording calls of catia helpers.
+@contextmanager
+def record():
+	recorder = Recorder()
+	recorder.enable()
+	try:
+		yield recorder
+	finally:
+		recorder.disable()
+
+
+## Loads recipe from file (or returns given recipe).
+def load(recipe):
+	if isinstance(recipe, str):
+		with open(recipe) as f:
+			recipe = json.load(f)
+	if recipe.get('version') != recipe_version:
+		raise ValueError('Unsupported recipe version {0}'.format(recipe.get('version')))
+	return recipe
+
+def decode(value, results):
+	if isinstance(value, list):
+		return [decode(item, results) for item in value]
+	if isinstance(value, dict):
+		if 'ref' in value:
+			res = results[value['ref']]
+			for key in value.get('path', [value['key']] if 'key' in value else []):
+				res = res[key]
+			return res
+		if 'tuple' in value:
+			return tuple(decode(item, results) for item in value['tuple'])
+		return {decode(key, results): decode(item, results) for key, item in value['dict']}
+	return value
+
+## Calls helper with arguments bound by name (variable positional arguments are passed as positional ones).
+def call(name, arguments):
+	helper = getattr(catia, name)
+	args, kwargs = [], {}
+	for parameter in inspect.signature(helper).parameters.values():
+		if parameter.name not in arguments:
+			continue
+		value = arguments[parameter.name]
+		if parameter.kind == parameter.VAR_POSITIONAL:
+			args.extend(value)
+		elif parameter.kind == parameter.VAR_KEYWORD:
+			kwargs.update(value)
+		elif parameter.kind == parameter.KEYWORD_ONLY:
+			kwargs[parameter.name] = value
+		else:
+			args.append(value)
+	return helper(*args, **kwargs)
+
+## Rebuilds part from recipe in current session. Returns results of nodes (list by node id).
+# Whole recipe is built in one batch update; consecutive create_point_coord with same axis system are created by create_points.
+def replay(recipe, batch=True):
+	nodes = load(recipe)['nodes']
+	results = [None] * len(nodes)
+	def run():
+		i = 0
+		while i < len(nodes):
+			node = nodes[i]
+			if node['op'] == 'create_point_coord':
+				run_end = i + 1
+				while run_end < len(nodes) and nodes[run_end]['op'] == 'create_point_coord' and \
+						nodes[run_end]['args'].get('ref_axis_system', False) == node['args'].get('ref_axis_system', False):
+					run_end += 1
+				if run_end - i > 1:
+					points = catia.create_points([decode(nodes[j]['args']['coords'], results) for j in range(i, run_end)],
+												 [nodes[j]['args']['name'] for j in range(i, run_end)],
+												 decode(node['args'].get('ref_axis_system', False), results))
+					results[i:run_end] = points
+					i = run_end
+					continue
+			results[i] = call(node['op'], {key: decode(value, results) for key, value in node['args'].items()})
+			i += 1
+	if batch:
+		with catia.batch_update():
+			run()
+	else:
+		run()
+	return results
@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import socket
+import threading
+from multiprocessing.connection import Client
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import connection
+import fakecatia
+from fakecatia import FakeApplication
+
+
+def free_address():
+	with socket.socket() as s:
+		s.bind(('127.0.0.1', 0))
+		return s.getsockname()
+
+## Runs broker with fake applications in a thread, so its instances are in running object table of fakecatia.
+@pytest.fixture
+def broker(tmp_path):
+	authkey = connection.load_authkey(str(tmp_path / 'key'))
+	broker = connection.Broker(free_address(), authkey, 'fakecatia:launch_application')
+	thread = threading.Thread(target=broker.serve)
+	thread.start()
+	while connection.broker_request('status', broker.address, authkey) is None:
+		time.sleep(0.01)
+	yield broker
+	connection.broker_request('shutdown', broker.address, authkey)
+	thread.join()
+
+
+def test_authkey_is_generated_once(tmp_path):
+	path = str(tmp_path / 'key')
+	key = connection.load_authkey(path)
+	assert len(key) == 32
+	assert connection.load_authkey(path) == key
+	if os.name == 'posix':
+		assert os.stat(path).st_mode & 0o777 == 0o600
+
+def test_warm_instance_of_broker_is_handed_out(broker):
+	manager = connection.ConnectionManager(broker.address, broker.authkey, attach=fakecatia.active_application,
+										   launch=FakeApplication)
+	assert manager.application() is broker.app
+	assert manager.source == 'attached'
+	# Instance is gone: broker relaunches it on acquire and it is handed out
+	broker.app.Quit()
+	app = manager.application()
+	assert manager.source == 'broker'
+	assert app is broker.app
+	assert broker.launches == 2
+
+def test_broker_refuses_wrong_key(broker):
+	with pytest.raises(connection.AuthenticationError):
+		connection.broker_request('status', broker.address, b'wrong key')
+	assert connection.broker_request('status', broker.address, broker.authkey)['ok']
+
+def test_broker_survives_dropped_client(broker):
+	app = broker.app
+	# Client authenticates and disconnects before sending its request
+	Client(broker.address, authkey=broker.authkey).close()
+	status = connection.broker_request('status', broker.address, broker.authkey)
+	assert status['ok'] and status['launches'] == 1
+	assert broker.app is app
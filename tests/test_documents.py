@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catia
+from fakecatia import FakeApplication
+
+
+def open_documents():
+	catia.start_catia('A.CATPart', backend=FakeApplication, max_documents=2)
+	catia.create_hybrid_body('Set_1')
+	catia.create_point_coord('p1', (0.0, 0.0, 0.0))
+	catia.switch_document('B.CATPart')
+	catia.switch_document('C.CATPart')
+
+def open_names():
+	return [document.Name for document in catia.cur_catia.app.Documents.items]
+
+def test_modified_documents_are_not_evicted():
+	open_documents()
+	assert list(catia.cur_catia.documents) == ['A.CATPart', 'C.CATPart']
+	assert open_names() == ['A.CATPart', 'C.CATPart']
+	assert not catia.cur_catia.documents['A.CATPart']['document'].Saved
+
+def test_modified_documents_are_saved_on_eviction_if_asked():
+	catia.start_catia('A.CATPart', backend=FakeApplication, max_documents=2, save_evicted=True)
+	catia.create_hybrid_body('Set_1')
+	catia.create_point_coord('p1', (0.0, 0.0, 0.0))
+	document = catia.cur_catia.document
+	catia.switch_document('B.CATPart')
+	catia.switch_document('C.CATPart')
+	assert list(catia.cur_catia.documents) == ['B.CATPart', 'C.CATPart']
+	assert document.Saved
+
+def test_save_as_moves_registry_entry():
+	open_documents()
+	catia.switch_document('A.CATPart')
+	catia.cur_catia.save_as('A2.CATPart')
+	assert catia.cur_catia.document_key == 'A2.CATPart'
+	assert list(catia.cur_catia.documents) == ['C.CATPart', 'A2.CATPart']
+	catia.switch_document('C.CATPart')
+	catia.switch_document('A2.CATPart')
+	assert catia.get_item('p1').Name == 'p1'
+	assert open_names() == ['A2.CATPart', 'C.CATPart']
@@ -0,0 +1,58 @@
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catia
+from incremental import incremental
+from fakecatia import FakeApplication
+
+
+def build(n=9, shift=0.0, join=True):
+	catia.create_hybrid_body('hb')
+	points = [catia.create_point_coord('p{0}'.format(i), (float(i), shift if i == 0 else 0.0, 0.0)) for i in range(n + 1)]
+	lines = [catia.create_line_pt_pt('l{0}'.format(i), points[i], points[i + 1]) for i in range(n)]
+	if join:
+		catia.create_join_tree('J', 0, lines, partition_size=3)
+
+def shape_names():
+	shapes = catia.get_hybrid_body('hb').HybridShapes
+	return Counter(shapes.Item(i).Name for i in range(1, shapes.Count + 1))
+
+def run(path, **kwargs):
+	with incremental(path) as build_run:
+		build(**kwargs)
+	return build_run
+
+def start():
+	catia.start_catia('Incremental.CATPart', backend=FakeApplication)
+
+def test_rerun_is_idempotent(tmp_path):
+	path = str(tmp_path / 'build.json')
+	start()
+	run(path)
+	names = shape_names()
+	assert names['J_0_0'] == 1 and names['J'] == 1
+	for _ in range(2):
+		build_run = run(path)
+		assert shape_names() == names
+		assert build_run.stats['created'] == 0 and build_run.stats['deleted'] == 0
+
+def test_changed_input_replaces_sub_joins(tmp_path):
+	path = str(tmp_path / 'build.json')
+	start()
+	run(path)
+	names = shape_names()
+	build_run = run(path, shift=1.0)
+	assert shape_names() == names
+	assert build_run.stats['deleted'] > 0
+
+def test_removed_feature_deletes_sub_joins(tmp_path):
+	path = str(tmp_path / 'build.json')
+	start()
+	run(path)
+	run(path, join=False)
+	names = shape_names()
+	assert not any(name == 'J' or name.startswith('J_') for name in names)
+	assert len(names) == 19
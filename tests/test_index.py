@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catia
+from fakecatia import FakeApplication
+
+
+def start():
+	catia.start_catia('Index.CATPart', backend=FakeApplication)
+	catia.create_hybrid_body('Set_1')
+	return [catia.create_point_coord('p{0}'.format(i), (float(i), 0.0, 0.0)) for i in range(3)]
+
+def test_rename_moves_index_entry_and_drops_references():
+	points = start()
+	reference = catia.get_reference(points[0])
+	catia.rename(points[0], 'q0')
+	shapes = catia.cur_catia.index.shapes['Set_1']
+	assert 'p0' not in shapes and shapes['q0'] is points[0]
+	assert catia.get_reference(points[0]) is not reference
+	catia.rename(points[0], 'r0')
+	assert 'q0' not in shapes and shapes['r0'] is points[0]
+
+def test_remove_drops_only_removed_object():
+	points = start()
+	catia.get_reference(points[1])
+	catia.delete_feature(points[1])
+	assert sorted(catia.cur_catia.index.shapes['Set_1']) == ['p0', 'p2']
+	assert id(points[1]) not in catia.cur_catia.reference_keys
+	# Object replaced in index by another one of the same name is not removed with it
+	catia.cur_catia.index.put(catia.cur_catia.index.shapes['Set_1'], 'p0', points[2])
+	catia.cur_catia.index.remove(points[0])
+	assert catia.cur_catia.index.shapes['Set_1']['p0'] is points[2]
+
+def test_shared_short_name_of_parameters_falls_back_to_com():
+	start()
+	catia.create_parametere_set('S1')
+	first = catia.create_parameters({'L': 1.0, 'W': 3.0}, 'S1')
+	catia.create_parametere_set('S2')
+	catia.create_parameters({'L': 2.0}, 'S2')
+	assert 'L' not in catia.cur_catia.index.parameters
+	assert catia.get_parametre('L') is catia.cur_catia.parameteres.Item('L')
+	assert 'L' not in catia.cur_catia.index.parameters
+	assert catia.get_parametre('W') is first['W']
+
+def test_short_names_of_full_names_are_indexed_unless_shared():
+	index = catia.PartIndex()
+	a, b, c = object(), object(), object()
+	index.add_parameter('Part1\\S1\\L', a)
+	index.add_parameter('Part1\\S1\\W', b)
+	index.add_parameter('Part1\\S2\\L', c)
+	assert index.parameters['Part1\\S2\\L'] is c and index.parameters['W'] is b
+	assert 'L' not in index.parameters
+	index.add_parameter('Part1\\S1\\L', a)
+	assert 'L' not in index.parameters
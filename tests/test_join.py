@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catia
+from fakecatia import FakeApplication
+
+
+def start(n=10):
+	catia.start_catia('Join.CATPart', backend=FakeApplication)
+	catia.create_hybrid_body('hb')
+	points = [catia.create_point_coord('p{0}'.format(i), (float(i), 0.0, 0.0)) for i in range(n + 1)]
+	return [catia.create_line_pt_pt('l{0}'.format(i), points[i], points[i + 1]) for i in range(n)]
+
+def test_join_tree_names_partition_joins_and_root():
+	lines = start(10)
+	join = catia.create_join_tree('J', 0, lines, partition_size=3)
+	assert join.Name == 'J'
+	names = set(catia.cur_catia.index.shapes['hb'])
+	# 10 elements: 4 partitions, then 2 joins of partitions, then root
+	assert {'J_0_0', 'J_0_1', 'J_0_2', 'J_0_3', 'J_1_0', 'J_1_1'} <= names
+	assert catia.cur_catia.app.log.count('AddNewJoin') == 7
+
+def test_given_partitions_are_joined_without_measuring():
+	lines = start(6)
+	catia.cur_catia.app.log.reset()
+	catia.create_join_tree('J', 0, lines, partitions=[lines[:2], lines[2:4], lines[4:]])
+	log = catia.cur_catia.app.log
+	assert log.count('AddNewJoin') == 4
+	assert log.count('Evaluate') == 0
+
+def test_join_tree_in_batch_builds_pending_elements_first():
+	catia.start_catia('Join.CATPart', backend=FakeApplication)
+	catia.create_hybrid_body('hb')
+	with catia.batch_update():
+		points = [catia.create_point_coord('p{0}'.format(i), (float(i), 0.0, 0.0)) for i in range(5)]
+		lines = [catia.create_line_pt_pt('l{0}'.format(i), points[i], points[i + 1]) for i in range(4)]
+		catia.create_join_tree('J', 0, lines, partition_size=2)
+		assert catia.cur_catia.pending_features == []
+
+@pytest.mark.parametrize('elements', [0, 1])
+def test_join_tree_needs_two_elements(elements):
+	lines = start(2)
+	with pytest.raises(ValueError):
+		catia.create_join_tree('J', 0, lines[:elements])
+
+def test_failed_partition_join_raises_join_error(monkeypatch):
+	lines = start(6)
+	join_elements = catia.join_elements
+	def failing_join_elements(elements, *args, **kwargs):
+		join = join_elements(elements, *args, **kwargs)
+		join.set(broken=lines[3] in elements)
+		return join
+	monkeypatch.setattr(catia, 'join_elements', failing_join_elements)
+	with pytest.raises(catia.JoinError) as info:
+		catia.create_join_tree('J', 0, lines, partition_size=2)
+	assert lines[3] in info.value.elements
+	assert info.value.level == 0 and info.value.name == 'J_0_{0}'.format(info.value.partition)
+
+def test_join_tree_does_not_update_part_without_pending_features():
+	lines = start(6)
+	log = catia.cur_catia.app.log
+	log.reset()
+	catia.create_join_tree('J', 0, lines, partition_size=3)
+	assert log.updates == 0
+	# Centers are measured by one script call
+	assert log.count('Evaluate') == 1
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linalgebra import Interpolator, CurvesTable, lin_interp
+
+
+curve = [(0.0, 0.0), (1.0, 2.0), (2.0, 3.0), (4.0, 3.5), (5.0, 6.0)]
+queries = [-1.0, 0.0, 0.5, 1.0, 1.7, 3.0, 4.9, 5.0, 7.0]
+
+def test_linear_interpolator_matches_lin_interp():
+	interpolator = Interpolator(curve)
+	expected = [lin_interp(x, curve) for x in queries]
+	assert [interpolator(x) for x in queries] == pytest.approx(expected)
+	assert interpolator(np.array(queries)) == pytest.approx(expected)
+
+@pytest.mark.parametrize('mode', ['cubic', 'monotone'])
+def test_splines_pass_through_points_and_clamp(mode):
+	interpolator = Interpolator(curve, mode)
+	assert [interpolator(x) for x, y in curve] == pytest.approx([y for x, y in curve])
+	assert interpolator(-1.0) == 0.0 and interpolator(7.0) == 6.0
+	assert interpolator(np.array(queries)) == pytest.approx([interpolator(x) for x in queries])
+
+def test_cubic_spline_reproduces_straight_line():
+	interpolator = Interpolator([(x, 2.0 * x + 1.0) for x in (0.0, 1.0, 3.0, 4.0)], 'cubic')
+	assert interpolator(np.array([0.5, 2.0, 3.5])) == pytest.approx([2.0, 5.0, 8.0])
+
+def test_monotone_spline_does_not_overshoot():
+	interpolator = Interpolator([(0.0, 0.0), (1.0, 0.0), (2.0, 1.0), (3.0, 1.0)], 'monotone')
+	values = interpolator(np.linspace(0.0, 3.0, 301))
+	assert values.min() >= 0.0 and values.max() <= 1.0
+	assert np.all(np.diff(values) >= -1e-12)
+
+@pytest.mark.parametrize('mode', ['cubic', 'monotone'])
+def test_duplicate_abscissas_are_rejected(mode):
+	with pytest.raises(ValueError):
+		Interpolator([(0.0, 0.0), (1.0, 1.0), (1.0, 2.0), (2.0, 3.0)], mode)
+
+def test_curves_table_interpolates_between_temperatures():
+	table = CurvesTable({20.0: [(0.0, 0.0), (10.0, 10.0)], 40.0: [(0.0, 10.0), (10.0, 30.0)]})
+	assert table(30.0, 5.0) == pytest.approx(12.5)
+	# Temperatures are clamped to the table range
+	assert table(0.0, 5.0) == pytest.approx(5.0)
+	assert table(100.0, 5.0) == pytest.approx(20.0)
+
+@pytest.mark.parametrize('mode', ['linear', 'cubic', 'monotone'])
+def test_curves_table_batch_matches_scalar_queries(mode):
+	table = CurvesTable({20.0: curve, 40.0: [(x, 2.0 * y) for x, y in curve], 80.0: [(x, y + 1.0) for x, y in curve]}, mode)
+	t = np.array([10.0, 20.0, 25.0, 50.0, 79.0, 90.0])
+	x = np.array([0.5, 1.5, -2.0, 3.0, 4.5, 6.0])
+	assert table(t, x) == pytest.approx([table(float(ti), float(xi)) for ti, xi in zip(t, x)])
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import subprocess
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catia
+import parallel
+from fakecatia import FakeApplication
+
+
+def build(n):
+	catia.create_hybrid_body('hb')
+	catia.create_points([(float(i), 0.0, 0.0) for i in range(n)])
+	return n
+
+def fail():
+	raise ValueError('boom')
+
+def sleep(seconds):
+	time.sleep(seconds)
+	return seconds
+
+## Fake application with a process standing for CATIA.
+def application_with_process():
+	app = FakeApplication()
+	process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+	app.set(process_id=process.pid)
+	return app
+
+
+def test_results_in_order_of_jobs():
+	jobs = [parallel.Job('p{0}.CATPart'.format(n), build, (n,)) for n in (5, 1, 3, 2)]
+	results = parallel.run_jobs(jobs, workers=2, backend=FakeApplication)
+	assert [result.value for result in results] == [5, 1, 3, 2]
+	assert all(result.ok for result in results)
+
+def test_errors_are_collected():
+	jobs = [parallel.Job(None, build, (1,)), parallel.Job(None, fail), parallel.Job(None, build, (2,))]
+	results = parallel.run_jobs(jobs, workers=2, backend=FakeApplication)
+	assert [result.ok for result in results] == [True, False, True]
+	assert 'ValueError: boom' in results[1].error
+
+def test_timed_out_jobs_do_not_break_pool():
+	jobs = [parallel.Job(None, sleep, (0.3,), timeout=0.3) for i in range(8)] + [parallel.Job(None, sleep, (0.0,))]
+	results = parallel.run_jobs(jobs, workers=4, backend=FakeApplication)
+	assert len(results) == 9 and all(result is not None for result in results)
+	assert results[-1].ok
+
+def test_timeout_kills_application_process():
+	with parallel.Pool(1, backend=application_with_process) as pool:
+		worker = pool.new_worker()
+		results = pool.run([parallel.Job(None, sleep, (5.0,), timeout=0.5)])
+		app_pid = worker.app_pid
+	assert results[0].timed_out
+	assert app_pid is not None
+	deadline = time.time() + 5
+	while is_running(app_pid):
+		assert time.time() < deadline, 'Application process is still running'
+		time.sleep(0.05)
+
+## Checks if process is running (terminated process may be left as zombie by its parent, the terminated worker).
+def is_running(pid):
+	try:
+		os.kill(pid, 0)
+	except OSError:
+		return False
+	try:
+		with open('/proc/{0}/stat'.format(pid)) as f:
+			return f.read().split(')')[-1].split()[0] != 'Z'
+	except OSError:
+		return True
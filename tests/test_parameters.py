@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catia
+from fakecatia import FakeApplication
+
+
+def start():
+	catia.start_catia('Parameters.CATPart', backend=FakeApplication)
+	catia.create_parametere_set('Set')
+	return catia.create_parameters({'Flag': True, 'Label': 'abc', 'Length': ('LENGTH', 12.5), 'Ratio': 0.25}, 'Set')
+
+def test_parameters_are_created_by_type_of_value():
+	parameters = start()
+	log = catia.cur_catia.app.log
+	assert [parameters[name].Value for name in ('Flag', 'Label', 'Length', 'Ratio')] == [True, 'abc', 12.5, 0.25]
+	assert log.count('CreateBoolean') == log.count('CreateString') == log.count('CreateDimension') == log.count('CreateReal') == 1
+	assert catia.get_parametre('Ratio') is parameters['Ratio']
+
+def test_read_parameters_returns_values_and_parameters():
+	parameters = start()
+	snapshot = catia.read_parameters('Set', short_names=True)
+	assert dict(snapshot) == {'Flag': True, 'Label': 'abc', 'Length': 12.5, 'Ratio': 0.25}
+	assert snapshot.parameters['Length'] is parameters['Length']
+
+def test_read_parameters_rejects_colliding_short_names(monkeypatch):
+	start()
+	catia.create_parametere_set('Other')
+	catia.create_parameters({'Ratio': 0.5}, 'Other')
+	names = iter(['Part\\Set\\Ratio', 'Part\\Other\\Ratio'])
+	for parameter in [catia.cur_catia.parameteres.Item(i) for i in range(1, catia.cur_catia.parameteres.Count + 1)]:
+		if parameter.Name == 'Ratio':
+			parameter.set(Name=next(names))
+	with pytest.raises(ValueError):
+		catia.read_parameters(short_names=True)
+
+def test_write_parameters_writes_only_changes_and_updates_once():
+	parameters = start()
+	snapshot = catia.read_parameters('Set', short_names=True)
+	log = catia.cur_catia.app.log
+	log.reset()
+	written = catia.write_parameters({'Ratio': 0.25, 'Length': 20.0, 'Label': 'xyz'}, snapshot)
+	assert written == {'Length': 20.0, 'Label': 'xyz'}
+	assert [call[1:] for call in log.calls if call[1] == 'Value'] == [('Value', 'put')] * 2
+	assert log.updates == 1
+	assert parameters['Length'].Value == 20.0 and snapshot['Length'] == 20.0
+	log.reset()
+	assert catia.write_parameters({'Ratio': 0.25}, snapshot) == {}
+	assert log.updates == 0
@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catia
+import profiler
+from fakecatia import FakeApplication
+
+
+def start():
+	catia.start_catia('Profiled.CATPart', backend=FakeApplication)
+	catia.create_hybrid_body('Set_1')
+	catia.create_hybrid_body('Set_2')
+	catia.create_point_coord('p1', (0.0, 0.0, 0.0))
+
+def test_objects_of_part_index_are_profiled():
+	start()
+	with profiler.profile() as prof:
+		catia.activate_hybrid_body('Set_2')
+		catia.create_point_coord('p2', (1.0, 0.0, 0.0))
+		catia.get_item('p1', 'Set_2').Name
+	histogram = prof.histogram()
+	assert 'AppendHybridShape' in histogram['append_shape']
+	assert 'get Name' in histogram[profiler.toplevel]
+
+def test_index_is_restored_after_profiling():
+	start()
+	with profiler.profile():
+		point = catia.create_point_coord('p2', (1.0, 0.0, 0.0))
+		catia.rename(point, 'p3')
+	assert not isinstance(catia.get_hybrid_body('Set_2'), profiler.ComProxy)
+	assert not isinstance(catia.get_item('p3'), profiler.ComProxy)
+	assert catia.get_item('p3') is profiler.unwrap(point)
+
+def test_selection_of_document_is_profiled():
+	start()
+	with profiler.profile() as prof:
+		catia.hide(catia.get_item('p1'))
+	assert any(member.startswith('get Selection') for member in prof.histogram()['apply_styles'])
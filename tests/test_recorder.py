@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catia
+import recorder
+from fakecatia import FakeApplication
+
+
+def build():
+	catia.create_hybrid_body('hb')
+	sketch = catia.create_sketch('sk', catia.get_origin_plane('xy'), (0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0))
+	catia.open_sketch(sketch)
+	points, lines = catia.sketch_create_polyline([(0.0, 0.0), (10.0, 0.0), (10.0, 5.0)])
+	catia.sketch_create_constraint('perp', catia.catia_constant_perpendicularity, lines[0], lines[1])
+	catia.close_sketch()
+
+def test_items_of_returned_tuple_are_recorded_and_replayed():
+	catia.start_catia('Recorded.CATPart', backend=FakeApplication)
+	with recorder.record() as rec:
+		build()
+	constraint = [node for node in rec.recipe()['nodes'] if node['op'] == 'sketch_create_constraint'][0]
+	polyline = [node for node in rec.recipe()['nodes'] if node['op'] == 'sketch_create_polyline'][0]
+	assert constraint['args']['geometry_1'] == {'ref': polyline['id'], 'path': [1, 0]}
+	catia.start_catia('Replayed.CATPart', backend=FakeApplication)
+	results = recorder.replay(rec.recipe())
+	assert results[polyline['id']][1][1].Name == 'line_1'
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catia
+from fakecatia import FakeApplication
+
+
+def start():
+	catia.start_catia('Styles.CATPart', backend=FakeApplication)
+	catia.create_hybrid_body('hb')
+	points = [catia.create_point_coord('p{0}'.format(i), (float(i), 0.0, 0.0)) for i in range(4)]
+	catia.cur_catia.app.log.reset()
+	return points
+
+def test_styles_are_applied_by_groups():
+	points = start()
+	catia.apply_styles({points[0]: 'red', points[1]: 'red', points[2]: 'hide', points[3]: ('blue', True)})
+	assert points[0].color == points[1].color == tuple(catia.rgb_colors['red'])
+	assert points[2].show == 1 and not hasattr(points[2], 'color')
+	assert points[3].color == tuple(catia.rgb_colors['blue']) and points[3].show == 0
+	log = catia.cur_catia.app.log
+	# One VisProperties access per group of identical style
+	assert log.count('VisProperties') == 3
+	assert log.count('SetRealColor') == 2
+	assert catia.cur_catia.document.Selection.Count == 0
+
+def test_styles_do_not_update_part():
+	points = start()
+	catia.apply_styles([(point, 'green') for point in points])
+	assert catia.cur_catia.app.log.updates == 0
+
+def test_unknown_color_is_rejected_before_any_change():
+	points = start()
+	with pytest.raises(KeyError):
+		catia.apply_styles([(points[0], 'red'), (points[1], 'no such color')])
+	assert not hasattr(points[0], 'color')
+
+def test_hide_and_set_color():
+	points = start()
+	catia.hide(points[0], points[1])
+	catia.set_color(points[2], 'yellow')
+	assert points[0].show == points[1].show == 1
+	assert points[2].color == tuple(catia.rgb_colors['yellow'])
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catia
+from fakecatia import FakeApplication
+
+
+def start():
+	catia.start_catia('Update.CATPart', backend=FakeApplication)
+	catia.create_hybrid_body('hb')
+	log = catia.cur_catia.app.log
+	log.reset()
+	return log
+
+def create_points(n, start=0):
+	return [catia.create_point_coord('p{0}'.format(i), (float(i), 0.0, 0.0)) for i in range(start, start + n)]
+
+def test_update_after_each_feature_without_batch():
+	log = start()
+	create_points(3)
+	assert log.updates == 3
+
+def test_one_update_per_batch():
+	log = start()
+	with catia.batch_update():
+		create_points(10)
+		assert log.updates == 0
+	assert log.updates == 1
+	assert catia.cur_catia.pending_features == []
+	assert catia.cur_catia.batch_size is None
+
+def test_update_every_n_features():
+	log = start()
+	with catia.batch_update(every=4):
+		create_points(10)
+		assert log.updates == 2
+		assert len(catia.cur_catia.pending_features) == 2
+	assert log.updates == 3
+
+def test_nested_batches_are_updated_by_outermost():
+	log = start()
+	with catia.batch_update():
+		create_points(2)
+		with catia.batch_update():
+			create_points(2, 2)
+		assert log.updates == 0
+		assert len(catia.cur_catia.pending_features) == 4
+	assert log.updates == 1
+
+def test_error_in_batch_drops_pending_features():
+	log = start()
+	with pytest.raises(ValueError):
+		with catia.batch_update():
+			create_points(2)
+			raise ValueError('stop')
+	assert log.updates == 0
+	assert catia.cur_catia.pending_features == []
+	assert catia.cur_catia.batch_size is None
+
+def test_update_error_names_broken_feature():
+	start()
+	with pytest.raises(catia.UpdateError) as info:
+		with catia.batch_update():
+			points = create_points(3)
+			points[1].set(broken=True)
+	assert info.value.feature is points[1]
+	assert 'p1' in str(info.value)